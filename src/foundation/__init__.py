@@ -12,6 +12,7 @@ from .loaders.enrollment import set_enrollment_tables
 from .plugins.geodata import set_coordinates
 from .plugins.matching.barangay import (
     apply_barangay_corrections,
+    attach_fuzzy_brgy_id,
     attach_psgc_brgy_id,
 )
 from .plugins.matching.municipality import attach_psgc_muni_id
@@ -13,10 +13,29 @@ from .pipeline import (
     PipelineOutput,
     PluginPipeline,
     frames_from_pipeline_output,
+    resolve_cache_dir,
+    snapshot_sources,
 )
+from .plugins.address import (
+    ADDR_KEY_COLS,
+    ADDRESS_STORE_FILE,
+    ADDRESS_STORE_SCHEMA,
+    AddressStore,
+    merge_address_keys,
+)
+from .plugins.matching.diff import diff_psgc
+from .plugins.psgc import set_psgc
+from .spatial import SpatialIndex, spatial_index_dir
+from .tiles import TileSettings, load_school_points, tiles_dir, write_tiles
 
 console = Console()
 
+SCHOOL_RTREE = "school_coordinates_rtree"
+# Seeded by `prep` from the generic file
+PREP_TABLES = ["school_sizes", "school_grades", "school_epochs"]
+# Loaded incrementally, so they are kept across builds
+ADDRESS_TABLES = ["addresses", "addr"]
+
 
 @click.group()
 def remake():
@@ -47,9 +66,8 @@ def prep():
         text = generic.read_text()
         data = yaml.safe_load(text)
 
-        prep_table(db=db, table_name="school_sizes", values=data["school_sizes"])
-        prep_table(db=db, table_name="school_grades", values=data["school_grades"])
-        prep_table(db=db, table_name="school_epochs", values=data["school_epochs"])
+        for table_name in PREP_TABLES:
+            prep_table(db=db, table_name=table_name, values=data[table_name])
         console.log(f"[green]✓ Built reference tables from {generic.name}[/green]")
     db.close()
 
@@ -63,10 +81,12 @@ def build():
 
     db = _open_wal_database(target)
     try:
+        _drop_build_tables(db)
         pipeline = PluginPipeline()
         console.log(f"[blue]Discovered extractors:[/blue] {len(pipeline.plugins)}")
         order = ", ".join(plugin.name for plugin in pipeline.execution_order)
         console.log(f"[blue]Execution order:[/blue] {order}")
+        _log_snapshots(pipeline)
         output = pipeline.execute()
         data = frames_from_pipeline_output(output)
         db = _load_lookup_tables(
@@ -77,14 +97,155 @@ def build():
         if dropouts is not None:
             db = _load_dropout_tables(db=db, dropouts_df=dropouts)
         db = _load_geography_tables(db=db, data=data, geo_table=geo)
+        match_stats = pipeline.get_output_table(output, "match_stats")
+        if match_stats is not None:
+            db = add_to(db=db, df=match_stats, table_name="match_stats")
         region_names = pipeline.get_output_table(output, "region_names")
         if region_names is not None:
             db = add_to(db=db, df=region_names, table_name="region_names")
+        school_access = pipeline.get_output_table(output, "school_access")
+        if school_access is not None:
+            db = add_to(db=db, df=school_access, table_name="school_access")
         teachers = pipeline.get_output_table(output, "teachers")
         if teachers is not None:
             db = _load_teacher_tables(db=db, teachers_df=teachers)
+        if data.school_coordinates is not None:
+            _save_spatial_index(coordinates_df=data.school_coordinates, target=target)
+    finally:
+        db.close()
+
+
+@remake.command("snapshot")
+def snapshot():
+    """Convert every source file to Parquet snapshots under CACHE_DIR.
+
+    Snapshots are keyed by the SHA-256 of each file, so only new or edited
+    sources are parsed. `build` runs this step first, and its extractors scan
+    the snapshots instead of the CSV and Excel files.
+    """
+    _log_snapshots(PluginPipeline())
+
+
+@remake.command("psgc-diff")
+@click.argument("old", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument("new", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Write the change table to a .csv or .parquet file.",
+)
+def psgc_diff(old: Path, new: Path, output: Path | None):
+    """List added, removed, renamed, reclassified, and re-coded PSGC entries."""
+    changes = diff_psgc(old=set_psgc(old), new=set_psgc(new))
+
+    summary = changes.group_by("change", "geo").len().sort("change", "geo")
+    console.log(f"[blue]PSGC changes[/blue] {old.name} → {new.name}: {changes.height}")
+    for change, geo, count in summary.iter_rows():
+        console.log(f"  {change:<13} {geo or '-':<7} {count}")
+
+    if output is None:
+        with pl.Config(tbl_rows=50, tbl_width_chars=160):
+            console.print(changes)
+    elif output.suffix == ".parquet":
+        changes.write_parquet(output)
+    else:
+        changes.write_csv(output)
+    if output is not None:
+        console.log(f"[green]✓ Wrote change table[/green] {output}")
+
+
+@remake.command("migrate-address-hashes")
+def migrate_address_hashes():
+    """Keep the `_addr_hash` and `address_id` values of an existing database.
+
+    Run once against the current database before the next `prep`. It seeds the
+    address store in `CACHE_DIR` with every PSGC id tuple, hash, and address id
+    found in the geography table, so later builds reuse them and only new
+    tuples get the vectorized hash and a new id.
+    """
+    target = _resolve_db_target()
+    geo = env.str("GEOS_TABLE")
+    db = Database(target)
+    schema = {col: ADDRESS_STORE_SCHEMA[col] for col in ADDR_KEY_COLS}
+    schema["_addr_hash"] = pl.Int64
+    if "address_id" in db[geo].columns_dict:
+        schema["address_id"] = pl.Int64
+    rows = pl.DataFrame(
+        list(db.query(f"SELECT DISTINCT {', '.join(schema)} FROM [{geo}]")),
+        schema=schema,
+    ).filter(pl.col("_addr_hash").is_not_null())
+    db.close()
+
+    store = AddressStore(path=resolve_cache_dir() / ADDRESS_STORE_FILE)
+    # Values in the database win over anything a newer build stored
+    merged = merge_address_keys(rows, store.load())
+    store.save(merged)
+    console.log(
+        f"[green]✓ Seeded {rows.height} address hashes from {geo}[/green] "
+        f"→ {store.path} ({merged.height} keys)"
+    )
+
+
+@remake.command("export-tiles")
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Tile directory (default: <DB_FILE stem>.tiles next to the database).",
+)
+@click.option("--min-zoom", type=int, default=TileSettings.min_zoom, show_default=True)
+@click.option("--max-zoom", type=int, default=TileSettings.max_zoom, show_default=True)
+@click.option(
+    "--cluster-below",
+    type=int,
+    default=TileSettings.cluster_below,
+    show_default=True,
+    help="Zoom levels below this hold clustered aggregates.",
+)
+@click.option(
+    "--workers", type=int, default=None, help="Writer processes (default: CPU count)."
+)
+def export_tiles(
+    output: Path | None,
+    min_zoom: int,
+    max_zoom: int,
+    cluster_below: int,
+    workers: int | None,
+):
+    """Write z/x/y GeoJSON tiles of school points from the built database.
+
+    Only tiles whose content changed since the last export are rewritten.
+    """
+    target = _resolve_db_target()
+    output = output or tiles_dir(target)
+    settings = TileSettings(
+        min_zoom=min_zoom, max_zoom=max_zoom, cluster_below=cluster_below
+    )
+
+    db = Database(target)
+    try:
+        points = load_school_points(db)
     finally:
         db.close()
+    result = write_tiles(points, output_dir=output, settings=settings, workers=workers)
+    console.log(
+        f"[green]✓ Exported tiles[/green] {output} ({points.height} schools): "
+        f"{result.written} written, {result.unchanged} unchanged, "
+        f"{result.removed} removed"
+    )
+
+
+def _log_snapshots(pipeline: PluginPipeline) -> None:
+    """Snapshot the pipeline's sources on its ingest workers and log the counts."""
+
+    report = snapshot_sources(pipeline.paths, workers=pipeline.context.workers)
+    console.log(
+        f"[green]✓ Snapshots:[/green] {report.converted} converted, "
+        f"{report.reused} reused → {pipeline.paths.cache_dir / 'snapshots'}"
+    )
 
 
 def _resolve_db_target() -> Path:
@@ -115,6 +276,26 @@ def _open_wal_database(target: Path) -> Database:
     return db
 
 
+def _drop_build_tables(db: Database) -> None:
+    """Drop what an earlier `build` wrote, so `build` can run again.
+
+    Every view goes, and every table except `PREP_TABLES` and the
+    incrementally loaded `ADDRESS_TABLES`.
+
+    Args:
+        db (Database): Open SQLite database connection.
+    """
+
+    for view in db.view_names():
+        db[view].drop()  # type: ignore
+    # Dropping the R*Tree also drops its shadow tables
+    db.execute(f"DROP TABLE IF EXISTS {SCHOOL_RTREE}")
+    keep = {*PREP_TABLES, *ADDRESS_TABLES, "_counts"}
+    for table in db.table_names():
+        if table not in keep:
+            db[table].drop(ignore=True)  # type: ignore
+
+
 def _load_lookup_tables(
     db: Database, enrollment_df: pl.DataFrame, levels_df: pl.DataFrame
 ) -> Database:
@@ -184,10 +365,260 @@ def _load_geography_tables(
         Database: Database after geography tables are stored.
     """
     db = add_to(db=db, df=data.geo, table_name=geo_table)
-    db = add_to(db=db, df=data.address, table_name="addr")
-    db = add_to(db=db, df=data.psgc, table_name="psgc")
+    if data.school_coordinates is not None:
+        db = _load_school_coordinates(db=db, coordinates_df=data.school_coordinates)
+    if data.school_names is not None:
+        db = add_to(db=db, df=data.school_names, table_name="school_names")
+    if data.addresses is None:
+        db = add_to(db=db, df=data.address, table_name="addr")
+    else:
+        db = _load_address_tables(
+            db=db, addresses_df=data.addresses, address_df=data.address
+        )
+    db = _load_psgc_tables(db=db, psgc_df=data.psgc, closure_df=data.psgc_closure)
 
+    # Adding a foreign key rebuilds `geo_table`, which SQLite refuses while a
+    # view references it, so the views come last
     _attach_psgc_foreign_keys(db=db, geo_table=geo_table)
+    if data.school_coordinates is not None:
+        _create_located_view(db=db, geo_table=geo_table)
+        _load_school_rtree(db=db, geo_table=geo_table)
+    return db
+
+
+def _load_school_coordinates(db: Database, coordinates_df: pl.DataFrame) -> Database:
+    """Insert one coordinate pair per school.
+
+    Args:
+        db (Database): Open SQLite database connection.
+        coordinates_df (pl.DataFrame): `school_id` → longitude/latitude rows.
+
+    Returns:
+        Database: Database with `school_coordinates`.
+    """
+    console.log(
+        "Insert table_name='school_coordinates' values from "
+        f"[green]{coordinates_df.height=}[/green]"
+    )
+    db["school_coordinates"].insert_all(  # type: ignore
+        coordinates_df.with_columns(pl.col("source_date").cast(pl.Utf8)).to_dicts(),
+        pk="school_id",
+        replace=True,
+    )
+    return db
+
+
+def _create_located_view(db: Database, geo_table: str) -> None:
+    """Add `{geo_table}_located`, joining school-years to names and coordinates."""
+    db.create_view(
+        f"{geo_table}_located",
+        f"""SELECT g.*, n.school_name, c.longitude, c.latitude
+        FROM [{geo_table}] g
+        LEFT JOIN school_names n ON n.school_id = g.school_id
+        LEFT JOIN school_coordinates c ON c.school_id = g.school_id""",
+        replace=True,
+    )
+
+
+def _load_school_rtree(db: Database, geo_table: str) -> None:
+    """Index `school_coordinates` in an R*Tree and add bounding-box views.
+
+    The virtual table `school_coordinates_rtree` is keyed by the
+    `school_coordinates` rowid; each school is a point, so its min and max
+    bounds are equal. Each `*_bbox` view exposes `min_lon`, `max_lon`,
+    `min_lat`, `max_lat` from the R*Tree, so a viewport filter on those
+    columns is answered by the index rather than a scan:
+
+        SELECT * FROM enroll_bbox
+        WHERE max_lon >= :west AND min_lon <= :east
+          AND max_lat >= :south AND min_lat <= :north
+
+    R*Tree bounds are 32-bit floats rounded outward, so points within about a
+    metre of an edge may be included; filter on `longitude`/`latitude` too when
+    the edge must be exact.
+
+    Args:
+        db (Database): Open connection with `school_coordinates`, `geo_table`,
+            `school_names`, `psgc`, `enroll`, `school_levels`, and `school_years`.
+        geo_table (str): Name of the slim geography fact table.
+    """
+    db.execute(f"DROP TABLE IF EXISTS {SCHOOL_RTREE}")
+    db.execute(
+        f"CREATE VIRTUAL TABLE {SCHOOL_RTREE} "
+        "USING rtree(id, min_lon, max_lon, min_lat, max_lat)"
+    )
+    db.execute(
+        f"""INSERT INTO {SCHOOL_RTREE}
+        SELECT rowid, longitude, longitude, latitude, latitude
+        FROM school_coordinates"""
+    )
+    for table in (geo_table, "enroll", "school_levels"):
+        if db[table].exists():
+            db[table].create_index(["school_id"], if_not_exists=True)  # type: ignore
+
+    located = """SELECT r.min_lon, r.max_lon, r.min_lat, r.max_lat,
+            c.school_id, c.longitude, c.latitude"""
+    joined = f"""FROM {SCHOOL_RTREE} r
+        JOIN school_coordinates c ON c.rowid = r.id"""
+    db.create_view(
+        f"{geo_table}_bbox",
+        f"""{located}, g.school_year, n.school_name,
+            g.psgc_region_id, region.name AS psgc_region_name,
+            g.psgc_provhuc_id, provhuc.name AS psgc_provhuc_name,
+            g.psgc_muni_id, muni.name AS psgc_muni_name,
+            g.psgc_brgy_id, brgy.name AS psgc_brgy_name
+        {joined}
+        JOIN [{geo_table}] g ON g.school_id = c.school_id
+        LEFT JOIN school_names n ON n.school_id = c.school_id
+        LEFT JOIN psgc region ON region.id = g.psgc_region_id
+        LEFT JOIN psgc provhuc ON provhuc.id = g.psgc_provhuc_id
+        LEFT JOIN psgc muni ON muni.id = g.psgc_muni_id
+        LEFT JOIN psgc brgy ON brgy.id = g.psgc_brgy_id""",
+        replace=True,
+    )
+    db.create_view(
+        "enroll_bbox",
+        f"""{located}, sy.school_year, e.grade_id, e.sex, e.strand_id,
+            e.num_students
+        {joined}
+        JOIN enroll e ON e.school_id = c.school_id
+        LEFT JOIN school_years sy ON sy.id = e.school_year_id""",
+        replace=True,
+    )
+    db.create_view(
+        "school_levels_bbox",
+        f"""{located}, sy.school_year, l.level, l.offered
+        {joined}
+        JOIN school_levels l ON l.school_id = c.school_id
+        LEFT JOIN school_years sy ON sy.id = l.school_year_id""",
+        replace=True,
+    )
+    console.log(f"[green]✓ Indexed school coordinates[/green] in {SCHOOL_RTREE}")
+
+
+def _save_spatial_index(coordinates_df: pl.DataFrame, target: Path) -> None:
+    """Build the school coordinate grid index and persist it next to `target`."""
+    directory = spatial_index_dir(target)
+    index = SpatialIndex.build(
+        coordinates_df.select("school_id", "longitude", "latitude")
+    )
+    index.save(directory)
+    console.log(
+        f"[green]✓ Saved spatial index[/green] {directory} ({index.points.height} schools)"
+    )
+
+
+def _load_address_tables(
+    db: Database, addresses_df: pl.DataFrame, address_df: pl.DataFrame
+) -> Database:
+    """Insert new addresses and only the school-year links that changed.
+
+    `address_id` is stable across builds (see `AddressStore`), so rows already
+    in `addresses` are left alone. The `addr` bridge is keyed by
+    (`school_id`, `school_year`); links whose address changed are upserted and
+    links that no longer exist are deleted.
+
+    Args:
+        db (Database): Open SQLite database connection.
+        addresses_df (pl.DataFrame): Addresses in use, keyed by `address_id`.
+        address_df (pl.DataFrame): School-year → address links.
+
+    Returns:
+        Database: Database after the address tables are brought up to date.
+    """
+    addresses = db["addresses"]
+    if addresses.exists():
+        existing = pl.DataFrame(
+            [row[0] for row in db.execute("SELECT address_id FROM addresses")],
+            schema={"address_id": pl.Int64},
+            orient="row",
+        )
+        addresses_df = addresses_df.join(existing, on="address_id", how="anti")
+    console.log(
+        f"Insert table_name='addresses' values from [green]{addresses_df.height=}[/green]"
+    )
+    addresses.insert_all(addresses_df.to_dicts(), pk="address_id")  # type: ignore
+
+    link_pk = ["school_id", "school_year"]
+    links = db["addr"]
+    if links.exists() and links.pks != link_pk:  # type: ignore
+        links.drop()  # type: ignore
+    existing = pl.DataFrame(schema=address_df.schema)
+    if links.exists():
+        existing = pl.DataFrame(
+            list(links.rows_where(select=", ".join(address_df.columns))),  # type: ignore
+            schema=address_df.schema,
+        )
+    changed = address_df.join(
+        existing, on=address_df.columns, how="anti", nulls_equal=True
+    )
+    stale = existing.join(address_df, on=link_pk, how="anti")
+    console.log(
+        f"Upsert table_name='addr' values from [green]{changed.height=}[/green], "
+        f"delete [green]{stale.height=}[/green]"
+    )
+    links.upsert_all(  # type: ignore
+        changed.to_dicts(),
+        pk=link_pk,
+        foreign_keys=[("address_id", "addresses", "address_id")],
+    )
+    if not stale.is_empty():
+        _delete_stale_links(db=db, stale=stale.select(link_pk))
+    return db
+
+
+def _delete_stale_links(db: Database, stale: pl.DataFrame) -> None:
+    """Delete the `addr` links keyed by `stale` in a single statement.
+
+    The keys go into a temporary table first, so the delete is one
+    `DELETE ... IN (SELECT ...)` however many links a release drops.
+    """
+    with db.conn:
+        db.execute("DROP TABLE IF EXISTS temp.stale_addr")
+        db.execute("CREATE TEMP TABLE stale_addr (school_id TEXT, school_year TEXT)")
+        db.conn.executemany(
+            "INSERT INTO temp.stale_addr VALUES (?, ?)", stale.iter_rows()
+        )
+        db.execute(
+            """DELETE FROM addr WHERE (school_id, school_year) IN
+            (SELECT school_id, school_year FROM temp.stale_addr)"""
+        )
+        db.execute("DROP TABLE temp.stale_addr")
+
+
+def _load_psgc_tables(
+    db: Database, psgc_df: pl.DataFrame, closure_df: pl.DataFrame | None
+) -> Database:
+    """Insert the PSGC reference with indexed parent ids and its closure table.
+
+    Args:
+        db (Database): Open SQLite database connection.
+        psgc_df (pl.DataFrame): PSGC rows with `region_id`/`prov_id`/`muni_id`.
+        closure_df (pl.DataFrame | None): Ancestor/descendant pairs, if emitted.
+
+    Returns:
+        Database: Database after the PSGC tables and indexes are stored.
+    """
+    db = add_to(db=db, df=psgc_df, table_name="psgc")
+    for col in ("region_id", "prov_id", "muni_id", "parent_id"):
+        if col in psgc_df.columns:
+            db["psgc"].create_index([col], if_not_exists=True)  # type: ignore
+
+    if closure_df is None:
+        return db
+
+    console.log(
+        f"Insert table_name='psgc_closure' values from [green]{closure_df.height=}[/green]"
+    )
+    db["psgc_closure"].insert_all(  # type: ignore
+        closure_df.to_dicts(),
+        pk=("ancestor_id", "descendant_id"),
+        foreign_keys=[("ancestor_id", "psgc", "id"), ("descendant_id", "psgc", "id")],
+        replace=True,
+    )
+    db["psgc_closure"].create_index(  # type: ignore
+        ["descendant_id", "depth"], if_not_exists=True
+    )
     return db
 
 
@@ -1,14 +1,18 @@
+import hashlib
+import multiprocessing
+import os
 import re
 import sqlite3
 import time
 import unicodedata
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, TypeVar
 
 import polars as pl
 import yaml
-from environs import Env
+from environs import Env, EnvError
 from rich.console import Console
 from rich.progress import Progress
 from rich.syntax import Syntax
@@ -19,6 +23,9 @@ env.read_env()
 
 console = Console()
 
+T = TypeVar("T")
+R = TypeVar("R")
+
 
 @dataclass
 class SchoolDataBundle:
@@ -93,12 +100,51 @@ def add_to(db: Database, df: pl.DataFrame, table_name: str) -> Database:
     return db
 
 
+def file_sha256(path: Path) -> str:
+    """Return the hex SHA-256 digest of a file, read in chunks."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def resolve_cache_dir() -> Path:
+    """Return `CACHE_DIR` from the environment, defaulting to `data/cache`."""
+    try:
+        return env.path("CACHE_DIR")
+    except EnvError:
+        return Path(__file__).resolve().parents[1].parent / "data" / "cache"
+
+
+def resolve_ingest_workers() -> int:
+    """Return `INGEST_WORKERS` from the environment, defaulting to the CPU count."""
+    return max(env.int("INGEST_WORKERS", None) or os.cpu_count() or 1, 1)
+
+
+def map_in_processes(
+    fn: Callable[[T], R], items: Iterable[T], workers: int = 1
+) -> list[R]:
+    """Apply `fn` to every item on a process pool, keeping the input order.
+
+    Workers are spawned rather than forked, since forking a process whose
+    Polars thread pool is running can deadlock. With one worker or one item
+    everything runs in this process. `fn` must be a module-level function.
+    """
+    items = list(items)
+    workers = min(workers, len(items))
+    if workers <= 1:
+        return [fn(item) for item in items]
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        return list(pool.map(fn, items))
+
+
 # --------------------------------------------------------
 # Load YAML only once (cached)
 # --------------------------------------------------------
+FIXES_PATH = Path(__file__).parent.parent.parent / "data" / "fixes.yml"
+
+
 def load_fixes() -> dict:
-    yaml_path = Path(__file__).parent.parent.parent / "data" / "fixes.yml"
-    with open(yaml_path, "r", encoding="utf-8") as f:
+    with open(FIXES_PATH, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
 
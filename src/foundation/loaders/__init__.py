@@ -1,5 +1,12 @@
 """Loader utilities for foundation pipeline."""
 
 from .enrollment import set_enrollment_tables
+from .excel import ExcelWorkbook, SheetSpec, parse_usecols, read_sheet
 
-__all__ = ["set_enrollment_tables"]
+__all__ = [
+    "ExcelWorkbook",
+    "SheetSpec",
+    "parse_usecols",
+    "read_sheet",
+    "set_enrollment_tables",
+]
@@ -0,0 +1,433 @@
+"""Columnar worksheet reads shared by the workbook-based extractors.
+
+A `SheetSpec` says where a table sits on a worksheet: the Excel column
+letters to keep, the header row(s), and the first data row. `ExcelWorkbook`
+reads specs from a sheet's raw cell grid, a Parquet snapshot (see
+`foundation.snapshots`) with every cell as Utf8. Only the selected columns
+and rows are scanned. `#N/A` and empty cells come back as nulls.
+
+A grid is parsed with fastexcel (calamine) the first time its sheet is read.
+Calamine trims leading empty rows and columns from a sheet. fastexcel keeps
+row numbers absolute, but numbers columns from the first used one. Grid
+columns are therefore named by their absolute Excel letters, shifted by the
+sheet's first used column. For `.xlsx` files that column is found by scanning
+the cell references in the sheet XML.
+
+Examples:
+    >>> parse_usecols("D:E,S")
+    [3, 4, 18]
+    >>> excel_column_name(27)
+    'AB'
+    >>> build_headers([("Grade 1", None, "Grade 2"), ("Male", "Female", "Male")], [0, 1, 2])
+    ['Grade 1 Male', 'Grade 1 Female', 'Grade 2 Male']
+"""
+
+from __future__ import annotations
+
+import re
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+from xml.etree import ElementTree
+
+import fastexcel
+import polars as pl
+
+from ..snapshots import SnapshotStore
+
+NA_VALUES = ["#N/A", ""]
+SHEETS_PART = "sheets"
+
+# Cell start tags; group 2 is "/" for self-closing (value-less) cells
+_CELL_REF = re.compile(rb'<c\b[^>]*?\br="([A-Z]+)\d+"[^>]*?(/?)>')
+_CHUNK = 1 << 20
+
+
+@dataclass(frozen=True)
+class SheetSpec:
+    """Location of a table on a worksheet.
+
+    Attributes:
+        sheet_name: Worksheet to read.
+        usecols: Excel column letters and ranges (`"E,K:Z"`); None keeps all.
+        header: Zero-based index of the first header row.
+        header_rows: Header rows. With more than one, each row is
+            forward-filled across blank (merged) cells and the labels of a
+            column are joined with spaces.
+        data_start: Zero-based index of the first data row; defaults to the
+            row after the header.
+    """
+
+    sheet_name: str
+    usecols: str | None = None
+    header: int = 0
+    header_rows: int = 1
+    data_start: int | None = None
+
+    @property
+    def first_data_row(self) -> int:
+        if self.data_start is not None:
+            return self.data_start
+        return self.header + self.header_rows
+
+
+def excel_column_index(value: str) -> int:
+    """Convert Excel column letters to a zero-based index."""
+
+    value = value.strip().upper()
+    index = 0
+    for char in value:
+        if not char.isalpha():
+            raise ValueError(f"Invalid Excel column reference: {value}")
+        index = index * 26 + (ord(char) - ord("A") + 1)
+    return index - 1
+
+
+def excel_column_name(index: int) -> str:
+    """Convert a zero-based column index to Excel column letters."""
+
+    name = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
+
+
+def parse_usecols(usecols: str | None) -> list[int] | None:
+    """Sorted zero-based indexes of an Excel column spec, None if unset."""
+
+    if not usecols:
+        return None
+
+    indexes: set[int] = set()
+    for part in usecols.split(","):
+        segment = part.strip()
+        if not segment:
+            continue
+        if ":" in segment:
+            start, end = [token.strip() for token in segment.split(":", 1)]
+            indexes.update(
+                range(excel_column_index(start), excel_column_index(end) + 1)
+            )
+        else:
+            indexes.add(excel_column_index(segment))
+    return sorted(indexes)
+
+
+def build_headers(
+    header_rows: list[tuple[str | None, ...]], indexes: list[int]
+) -> list[str]:
+    """Unique column labels for `indexes` from one or more header rows.
+
+    Blank labels become `column_{idx}`, and repeated labels get a `_{n}`
+    suffix.
+    """
+
+    if len(header_rows) == 1:
+        row = header_rows[0]
+        labels = [_label(row[idx] if idx < len(row) else None) for idx in indexes]
+    else:
+        filled_rows = [_forward_fill_row(row) for row in header_rows]
+        labels = []
+        for idx in indexes:
+            tokens = [row[idx] for row in filled_rows if idx < len(row) and row[idx]]
+            labels.append(re.sub(r"\s+", " ", " ".join(tokens)).strip() or None)
+    headers = [
+        label or f"column_{idx}" for label, idx in zip(labels, indexes, strict=True)
+    ]
+    return _ensure_unique_column_names(headers)
+
+
+class ExcelWorkbook:
+    """A workbook whose sheets are read by `SheetSpec` from grid snapshots.
+
+    The workbook itself is only opened to convert a sheet that has no
+    snapshot yet.
+    """
+
+    def __init__(self, path: Path, store: SnapshotStore | None = None):
+        self.path = path
+        self.store = store or SnapshotStore.default()
+        self._reader: fastexcel.ExcelReader | None = None
+        self._sheet_names: list[str] | None = None
+
+    @property
+    def sheet_names(self) -> list[str]:
+        """Worksheet names, also kept as a snapshot part."""
+
+        if self._sheet_names is None:
+            names = self.store.scan(
+                self.path,
+                SHEETS_PART,
+                lambda _: pl.DataFrame({"sheet_name": self._open().sheet_names}),
+            )
+            self._sheet_names = names.collect().to_series().to_list()
+        return self._sheet_names
+
+    def scan_grid(self, sheet_name: str) -> pl.LazyFrame:
+        """Scan the raw cells of `sheet_name`, converting the sheet on first use.
+
+        Row `i` of the grid is Excel row `i + 1`, up to the last used row.
+        Columns are named by Excel letters, from the first used column to
+        the last, and hold every cell as Utf8.
+
+        Raises:
+            ValueError: The sheet is missing.
+        """
+
+        return self.store.scan(
+            self.path, grid_part(sheet_name), self._grid_reader(sheet_name)
+        )
+
+    def snapshot(self) -> int:
+        """Convert every sheet without a grid snapshot; returns how many were."""
+
+        return sum(
+            self.store.ensure(self.path, grid_part(name), self._grid_reader(name))
+            for name in self.sheet_names
+        )
+
+    def read_sheet(
+        self, spec: SheetSpec, source_row: str | None = None
+    ) -> pl.DataFrame:
+        """Read the header and the `usecols` columns of every data row.
+
+        Args:
+            spec (SheetSpec): Sheet, columns, and header layout.
+            source_row (str | None): If set, add an Int64 column of that name
+                with the one-based Excel row number of each data row.
+
+        Raises:
+            ValueError: The sheet is missing or the header is past its end.
+
+        Returns:
+            pl.DataFrame: One Utf8 column per selected column, named by
+                `build_headers`. Selected columns past the sheet's last used
+                column are all null.
+        """
+
+        return pl.concat(self.iter_sheet(spec, source_row=source_row))
+
+    def iter_sheet(
+        self,
+        spec: SheetSpec,
+        batch_rows: int | None = None,
+        source_row: str | None = None,
+    ) -> Iterator[pl.DataFrame]:
+        """Read the data rows of `spec` in slices of `batch_rows` sheet rows.
+
+        The header is read once; each batch is then sliced from the grid
+        snapshot and collected on its own, so only one batch of the sheet is
+        in memory at a time. At least one, possibly empty, batch is yielded.
+
+        Args:
+            spec (SheetSpec): Sheet, columns, and header layout.
+            batch_rows (int | None): Data rows per batch; None reads them all
+                in one batch.
+            source_row (str | None): As in `read_sheet`.
+
+        Raises:
+            ValueError: The sheet is missing or the header is past its end.
+
+        Yields:
+            pl.DataFrame: Consecutive slices of the `read_sheet` frame.
+        """
+
+        grid = self.scan_grid(spec.sheet_name)
+        available = {
+            excel_column_index(name): name for name in grid.collect_schema().names()
+        }
+        indexes = parse_usecols(spec.usecols)
+        # Columns to scan; the first used column always is, so the row count
+        # is known even if no selected column exists
+        columns = available
+        if indexes is not None and spec.header_rows == 1:
+            wanted = {min(available, default=0), *indexes}
+            columns = {idx: name for idx, name in available.items() if idx in wanted}
+        elif indexes is not None:
+            # Merged labels are forward-filled from columns left of the selection
+            columns = {
+                idx: name for idx, name in available.items() if idx <= max(indexes)
+            }
+        grid = grid.select(columns.values())
+        head = grid.slice(spec.header, spec.header_rows).collect()
+        if head.is_empty():
+            raise ValueError(
+                f"Header index {spec.header} is beyond the end of "
+                f"{spec.sheet_name} in {self.path.name}"
+            )
+
+        width = max(columns) + 1
+        header_rows = []
+        for row in head.iter_rows():
+            cells: list[str | None] = [None] * width
+            for idx, value in zip(columns, row, strict=True):
+                cells[idx] = None if value in NA_VALUES else value
+            header_rows.append(tuple(cells))
+        if indexes is None:
+            indexes = list(range(min(columns), width))
+        headers = build_headers(header_rows, indexes)
+
+        start = spec.first_data_row
+        end = max(grid.select(pl.len()).collect().item(), start + 1)
+        for offset in range(start, end, batch_rows or end - start):
+            df = (
+                grid.slice(offset, batch_rows)
+                .collect()
+                .select(
+                    pl.col(columns[idx]).replace(NA_VALUES, None).alias(name)
+                    if idx in columns
+                    else pl.repeat(None, pl.len(), dtype=pl.Utf8).alias(name)
+                    for idx, name in zip(indexes, headers, strict=True)
+                )
+            )
+            if source_row:
+                df = df.with_columns(
+                    (pl.int_range(pl.len(), dtype=pl.Int64) + offset + 1).alias(
+                        source_row
+                    )
+                )
+            yield df
+
+    def _open(self) -> fastexcel.ExcelReader:
+        if self._reader is None:
+            self._reader = fastexcel.read_excel(self.path)
+        return self._reader
+
+    def _grid_reader(self, sheet_name: str) -> Callable[[Path], pl.DataFrame]:
+        return lambda _: self._read_grid(sheet_name)
+
+    def _read_grid(self, sheet_name: str) -> pl.DataFrame:
+        """Parse every cell of `sheet_name` (see `scan_grid`)."""
+
+        if sheet_name not in self.sheet_names:
+            raise ValueError(f"Sheet {sheet_name} is missing from {self.path.name}")
+        sheet = self._open().load_sheet(
+            sheet_name, header_row=None, skip_rows=0, dtypes="string"
+        )
+        rows = sheet.to_polars()
+        if rows.width == 0:
+            return rows
+        offset = first_used_column(self.path, sheet_name)
+        return rows.rename(
+            {
+                name: excel_column_name(col.index + offset)
+                for col, name in zip(sheet.selected_columns, rows.columns, strict=True)
+            }
+        )
+
+
+def grid_part(sheet_name: str) -> str:
+    """Snapshot part holding the raw cell grid of `sheet_name`."""
+
+    return f"grid:{sheet_name}"
+
+
+def read_sheet(
+    path: Path, spec: SheetSpec, source_row: str | None = None
+) -> pl.DataFrame:
+    """Read a single `spec` of `path` (see `ExcelWorkbook.read_sheet`)."""
+
+    return ExcelWorkbook(path).read_sheet(spec, source_row=source_row)
+
+
+def iter_sheet(
+    path: Path,
+    spec: SheetSpec,
+    batch_rows: int | None = None,
+    source_row: str | None = None,
+) -> Iterator[pl.DataFrame]:
+    """Read `spec` of `path` in batches (see `ExcelWorkbook.iter_sheet`)."""
+
+    return ExcelWorkbook(path).iter_sheet(
+        spec, batch_rows=batch_rows, source_row=source_row
+    )
+
+
+def first_used_column(path: Path, sheet_name: str) -> int:
+    """Zero-based column of the leftmost cell holding a value.
+
+    Streams the worksheet XML and stops at the first value in column `A`.
+    Workbooks without sheet XML (`.xls`, `.xlsb`, `.ods`) report 0.
+    """
+
+    if not zipfile.is_zipfile(path):
+        return 0
+    with zipfile.ZipFile(path) as archive:
+        part = _sheet_part(archive, sheet_name)
+        if part is None:
+            return 0
+        first: int | None = None
+        buffer = b""
+        with archive.open(part) as stream:
+            while chunk := stream.read(_CHUNK):
+                buffer += chunk
+                cut = buffer.rfind(b">") + 1
+                for match in _CELL_REF.finditer(buffer, 0, cut):
+                    if match.group(2):
+                        continue
+                    column = excel_column_index(match.group(1).decode())
+                    if first is None or column < first:
+                        first = column
+                        if first == 0:
+                            return 0
+                buffer = buffer[cut:]
+    return first or 0
+
+
+def _sheet_part(archive: zipfile.ZipFile, sheet_name: str) -> str | None:
+    """Archive member holding `sheet_name`, via the workbook relationships."""
+
+    try:
+        workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+        rels = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    except KeyError:
+        return None
+    rel_id = next(
+        (
+            value
+            for sheet in workbook.iter()
+            if sheet.tag.endswith("}sheet") and sheet.get("name") == sheet_name
+            for key, value in sheet.attrib.items()
+            if key.endswith("}id")
+        ),
+        None,
+    )
+    target = next((rel.get("Target") for rel in rels if rel.get("Id") == rel_id), None)
+    if target is None:
+        return None
+    return target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+
+
+def _label(value: str | None) -> str | None:
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _forward_fill_row(row: tuple[str | None, ...]) -> list[str | None]:
+    filled: list[str | None] = []
+    last: str | None = None
+    for cell in row:
+        label = _label(cell)
+        if label:
+            last = label
+        filled.append(last)
+    return filled
+
+
+def _ensure_unique_column_names(headers: list[str]) -> list[str]:
+    seen: dict[str, int] = {}
+    unique_headers: list[str] = []
+    for label in headers:
+        count = seen.get(label, 0)
+        if count:
+            unique_headers.append(f"{label}_{count}")
+            seen[label] = count + 1
+        else:
+            unique_headers.append(label)
+            seen[label] = 1
+    return unique_headers
@@ -7,10 +7,24 @@ import polars as pl
 from environs import EnvError
 from rich.console import Console
 
-from .common import env
+from .common import (
+    env,
+    map_in_processes,
+    resolve_cache_dir,
+    resolve_ingest_workers,
+)
+from .loaders.excel import ExcelWorkbook
 from .plugin import BaseExtractor, ExtractionContext, SourcePaths
+from .plugins.psgc import PSGC_SHEET
 from .registry import PluginRegistry
 from .schema import SCHEMAS
+from .snapshots import (
+    SnapshotReport,
+    SnapshotStore,
+    ensure_csv_snapshot,
+    ensure_excel_snapshot,
+    snapshots_dir,
+)
 
 
 @dataclass(frozen=True)
@@ -22,6 +36,10 @@ class ExtractedFrames:
     geo: pl.DataFrame
     levels: pl.DataFrame
     address: pl.DataFrame
+    psgc_closure: pl.DataFrame | None = None
+    addresses: pl.DataFrame | None = None
+    school_coordinates: pl.DataFrame | None = None
+    school_names: pl.DataFrame | None = None
 
 
 @dataclass
@@ -35,6 +53,41 @@ class PipelineOutput:
         return self.tables.get(name)
 
 
+def snapshot_sources(paths: SourcePaths, workers: int = 1) -> SnapshotReport:
+    """Convert every source file to Parquet under `<cache_dir>/snapshots`.
+
+    The enrollment and geo CSVs and the PSGC sheet become typed tables, and
+    every sheet of the HR and dropout workbooks a raw cell grid. Parts that
+    already exist for a file's hash are reused, so with unchanged sources only
+    the hashes are computed. Files are converted on `workers` processes.
+    """
+    store = SnapshotStore(snapshots_dir(paths.cache_dir))
+    jobs = [(store, "csv", path) for path in sorted(paths.enroll_dir.glob("*.csv"))]
+    jobs.append((store, "csv", paths.geo_file))
+    jobs.append((store, "psgc", paths.psgc_file))
+    for directory in (paths.hr_dir, paths.dropout_dir):
+        jobs.extend(
+            (store, "workbook", path) for path in sorted(directory.glob("*.xlsx"))
+        )
+
+    results = map_in_processes(_snapshot_source, jobs, workers)
+    converted = sum(count for count, _ in results)
+    return SnapshotReport(
+        converted=converted, reused=sum(parts for _, parts in results) - converted
+    )
+
+
+def _snapshot_source(job: tuple[SnapshotStore, str, Path]) -> tuple[int, int]:
+    """Convert the missing parts of one source; returns (converted, parts)."""
+    store, kind, path = job
+    if kind == "csv":
+        return int(ensure_csv_snapshot(path, store)), 1
+    if kind == "psgc":
+        return int(ensure_excel_snapshot(path, PSGC_SHEET, store)), 1
+    workbook = ExcelWorkbook(path, store=store)
+    return workbook.snapshot(), len(workbook.sheet_names)
+
+
 class PipelineExecutionError(RuntimeError):
     """Raised when the plugin dependency graph cannot be resolved."""
 
@@ -46,7 +99,9 @@ class PluginPipeline:
         self.console = Console()
         self.registry = registry or PluginRegistry()
         self.paths = self._resolve_source_paths()
-        self.context = ExtractionContext(paths=self.paths)
+        self.context = ExtractionContext(
+            paths=self.paths, workers=resolve_ingest_workers()
+        )
         self.plugins = self._load_plugins()
         self.execution_order = self._resolve_execution_order()
 
@@ -70,6 +125,7 @@ class PluginPipeline:
             dropout_dir = env.path("DROPOUT_DIR")
         except EnvError:
             dropout_dir = default_dropout_dir
+        cache_dir = resolve_cache_dir()
 
         for label, path in (
             ("enroll_dir", enroll_dir),
@@ -78,6 +134,7 @@ class PluginPipeline:
             ("region_names_file", region_names_file),
             ("hr_dir", hr_dir),
             ("dropout_dir", dropout_dir),
+            ("cache_dir", cache_dir),
         ):
             self.console.log(f"[bold slate_blue1]{label}[/bold slate_blue1]={path}")
 
@@ -88,6 +145,7 @@ class PluginPipeline:
             region_names_file=region_names_file,
             hr_dir=hr_dir,
             dropout_dir=dropout_dir,
+            cache_dir=cache_dir,
         )
 
     def _load_plugins(self) -> dict[str, BaseExtractor]:
@@ -200,10 +258,14 @@ class PluginPipeline:
 def frames_from_pipeline_output(output: PipelineOutput) -> ExtractedFrames:
     return ExtractedFrames(
         psgc=output.tables["psgc"],
+        psgc_closure=output.tables.get("psgc_closure"),
         enrollment=output.tables["enrollment"],
         geo=output.tables["geo"],
         levels=output.tables["school_levels"],
         address=output.tables["address"],
+        addresses=output.tables.get("addresses"),
+        school_coordinates=output.tables.get("school_coordinates"),
+        school_names=output.tables.get("school_names"),
     )
 
 
@@ -18,6 +18,7 @@ class SourcePaths:
     region_names_file: Path
     hr_dir: Path
     dropout_dir: Path
+    cache_dir: Path
 
 
 @dataclass(frozen=True)
@@ -25,6 +26,8 @@ class ExtractionContext:
     """Shared context that is passed to every extractor."""
 
     paths: SourcePaths
+    # Processes for extractors that read independent source files
+    workers: int = 1
 
 
 @dataclass
@@ -0,0 +1,146 @@
+"""Per school-year accessibility metrics from school coordinates and offered levels."""
+
+from __future__ import annotations
+
+import polars as pl
+
+from ..common import console
+from ..plugin import BaseExtractor, ExtractionContext, ExtractionResult
+from ..spatial import QUERY_ID, SpatialIndex
+
+ACCESS_LEVELS = ["jhs", "shs"]
+ACCESS_RADII_KM = [2, 5, 10]
+# Queries per radius search; bounds the candidate pairs held at once
+ACCESS_BATCH = 5_000
+
+
+def build_school_access(
+    geo_df: pl.DataFrame,
+    coordinates: pl.DataFrame,
+    levels: pl.DataFrame,
+    radii_km: list[int] = ACCESS_RADII_KM,
+    batch_size: int = ACCESS_BATCH,
+) -> pl.DataFrame:
+    """Distance to the nearest JHS and SHS, and school counts within `radii_km`.
+
+    Each school year is indexed on its own, so a school only counts in the
+    years it appears in `geo_df`, with the levels it offered that year. The
+    nearest-offering distances come from one batched `SpatialIndex.nearest`
+    call per level, and include the school itself (0.0 when it offers the
+    level). The counts come from radius searches over `batch_size` schools at
+    a time, and exclude the school itself.
+
+    Args:
+        geo_df (pl.DataFrame): School-year rows with `school_id`, `school_year`.
+        coordinates (pl.DataFrame): `school_id`, `longitude`, `latitude`.
+        levels (pl.DataFrame): `school_levels` rows (`school_id`,
+            `school_year`, `level`, `offered`).
+        radii_km (list[int]): Radii to count schools within.
+        batch_size (int): Schools per radius search.
+
+    Returns:
+        pl.DataFrame: One row per school-year in `geo_df` with
+            `nearest_{level}_km` for each of `ACCESS_LEVELS` and
+            `schools_within_{radius}km`; all null for schools without
+            coordinates, and distances null when no school offers the level.
+    """
+    offers = levels.group_by("school_id", "school_year").agg(
+        (pl.col("offered") & (pl.col("level") == level)).any().alias(f"offers_{level}")
+        for level in ACCESS_LEVELS
+    )
+    school_years = geo_df.select("school_id", "school_year").unique(maintain_order=True)
+    located = (
+        school_years.join(
+            coordinates.select("school_id", "longitude", "latitude"),
+            on="school_id",
+            how="inner",
+        )
+        .join(offers, on=["school_id", "school_year"], how="left")
+        .with_columns(
+            pl.col(f"offers_{level}").fill_null(False) for level in ACCESS_LEVELS
+        )
+    )
+
+    count_cols = [f"schools_within_{radius}km" for radius in radii_km]
+    frames = []
+    for (school_year,), points in located.group_by("school_year", maintain_order=True):
+        index = SpatialIndex.build(points.drop("school_year"))
+        queries = points.select(
+            pl.col("school_id").alias(QUERY_ID), "longitude", "latitude"
+        )
+        access = queries.select(QUERY_ID)
+        for level in ACCESS_LEVELS:
+            nearest = index.where(pl.col(f"offers_{level}")).nearest(queries, k=1)
+            access = access.join(
+                nearest.select(
+                    QUERY_ID, pl.col("distance_km").alias(f"nearest_{level}_km")
+                ),
+                on=QUERY_ID,
+                how="left",
+            )
+        counts = pl.concat(
+            _count_within(index, queries.slice(offset, batch_size), radii_km)
+            for offset in range(0, queries.height, batch_size)
+        )
+        frames.append(
+            access.join(counts, on=QUERY_ID, how="left").select(
+                pl.col(QUERY_ID).alias("school_id"),
+                pl.lit(school_year).alias("school_year"),
+                *[f"nearest_{level}_km" for level in ACCESS_LEVELS],
+                *[pl.col(col).fill_null(0).cast(pl.Int64) for col in count_cols],
+            )
+        )
+
+    schema = {
+        "school_id": school_years.schema["school_id"],
+        "school_year": school_years.schema["school_year"],
+        **{f"nearest_{level}_km": pl.Float64 for level in ACCESS_LEVELS},
+        **{col: pl.Int64 for col in count_cols},
+    }
+    access = pl.concat([pl.DataFrame(schema=schema), *frames], how="vertical_relaxed")
+    return school_years.join(
+        access, on=["school_id", "school_year"], how="left", maintain_order="left"
+    )
+
+
+def _count_within(
+    index: SpatialIndex, queries: pl.DataFrame, radii_km: list[int]
+) -> pl.DataFrame:
+    """Other schools within each of `radii_km` of every query."""
+    hits = index.within_radius(queries, radius_km=max(radii_km)).filter(
+        pl.col("school_id") != pl.col(QUERY_ID)
+    )
+    return hits.group_by(QUERY_ID).agg(
+        (pl.col("distance_km") <= radius).sum().alias(f"schools_within_{radius}km")
+        for radius in radii_km
+    )
+
+
+class SchoolAccessExtractor(BaseExtractor):
+    """Precompute nearest-JHS/SHS distances and nearby school counts."""
+
+    name = "school_access"
+    depends_on = ["geo", "school_coordinates", "school_levels"]
+    outputs = ["school_access"]
+    schema_name = "school_access"
+
+    def extract(
+        self,
+        context: ExtractionContext,
+        dependencies: dict[str, pl.DataFrame],
+    ) -> ExtractionResult:
+        access = build_school_access(
+            geo_df=dependencies["geo"],
+            coordinates=dependencies["school_coordinates"],
+            levels=dependencies["school_levels"],
+        )
+        first_count = f"schools_within_{ACCESS_RADII_KM[0]}km"
+        located = access.filter(pl.col(first_count).is_not_null()).height
+        console.log(
+            f"[cyan]School access:[/cyan] {located} of {access.height} "
+            "school-year rows located"
+        )
+        return ExtractionResult(
+            tables={"school_access": access},
+            metrics={"school_access_located_rows": located},
+        )
@@ -1,10 +1,15 @@
 """Address dimension builder that produces canonical hashes for locations."""
 
-import hashlib
+from __future__ import annotations
+
+import os
+import re
 from dataclasses import dataclass
+from pathlib import Path
 
 import polars as pl
 
+from ..common import console
 from ..plugin import BaseExtractor, ExtractionContext, ExtractionResult
 
 ADDR_KEY_COLS = [
@@ -13,30 +18,236 @@ ADDR_KEY_COLS = [
     "psgc_muni_id",
     "psgc_brgy_id",
 ]
+ADDRESS_STORE_FILE = "address_dimension.parquet"
+ADDRESS_STORE_SCHEMA = {
+    "address_id": pl.Int64,
+    **{col: pl.Utf8 for col in ADDR_KEY_COLS},
+    "_addr_hash": pl.Int64,
+}
+
+# SplitMix64 constants (Steele, Lea & Flood 2014)
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+_MIX_1 = 0xBF58476D1CE4E5B9
+_MIX_2 = 0x94D049BB133111EB
+_MASK_64 = (1 << 64) - 1
+# A missing id; no 10-digit PSGC code reaches this value, and ids that do
+# are rejected so they cannot collide with a missing one
+_NULL_ID = _MASK_64
+# Ids as the UInt64 cast reads them
+_ID_PATTERN = re.compile(r"\+?[0-9]+")
+_HASH = "__addr_hash_state"
+_STORED = "__stored"
+
+
+def _splitmix64(z: int) -> int:
+    z = (z + _GOLDEN_GAMMA) & _MASK_64
+    z = ((z ^ (z >> 30)) * _MIX_1) & _MASK_64
+    z = ((z ^ (z >> 27)) * _MIX_2) & _MASK_64
+    return z ^ (z >> 31)
+
+
+def _parse_id(value: str | None) -> int:
+    if value is None:
+        return _NULL_ID
+    if _ID_PATTERN.fullmatch(value) and int(value) < _NULL_ID:
+        return int(value)
+    raise ValueError(f"PSGC id {value!r} is not an unsigned 64-bit integer")
+
+
+def addr_hash(ids: list[str | None]) -> int:
+    """
+    Reference implementation of `with_addr_hash` for one tuple of PSGC ids.
+
+    Each id is read as an unsigned decimal integer (a missing id becomes
+    `2**64 - 1`); any other id that is not below `2**64 - 1` raises
+    `ValueError`, so distinct addresses never share a hash with null. The ids are folded in order with `h = splitmix64(h ^ id)`,
+    starting from `h = 0`. The result is shifted right by one bit so that it
+    fits a non-negative `Int64`. Every step is plain 64-bit integer arithmetic,
+    so the value does not depend on the Polars version or the platform.
+
+    >>> addr_hash(["0100000000", "0102800000", "0102801000", "0102801001"])
+    3589677215628597395
+    """
+    h = 0
+    for value in ids:
+        h = _splitmix64(h ^ _parse_id(value))
+    return h >> 1
+
+
+def _rshift(expr: pl.Expr, bits: int) -> pl.Expr:
+    return expr // pl.lit(1 << bits, dtype=pl.UInt64)
+
+
+def with_addr_hash(df: pl.DataFrame, cols: list[str] = ADDR_KEY_COLS) -> pl.DataFrame:
+    """Vectorized `addr_hash` over the string id columns `cols` as `_addr_hash`.
+
+    Each SplitMix64 step reads the running value more than once, so the steps
+    are materialized one column at a time instead of nested into a single
+    expression, whose size would double with every step.
+
+    Raises:
+        ValueError: A non-null id is not an unsigned integer below `2**64 - 1`.
+
+    >>> df = pl.DataFrame(
+    ...     {
+    ...         "psgc_region_id": ["0100000000"],
+    ...         "psgc_provhuc_id": ["0102800000"],
+    ...         "psgc_muni_id": ["0102801000"],
+    ...         "psgc_brgy_id": ["0102801001"],
+    ...     }
+    ... )
+    >>> with_addr_hash(df)["_addr_hash"].item() == addr_hash(list(df.row(0)))
+    True
+    """
+
+    def u64(value: int) -> pl.Expr:
+        return pl.lit(value, dtype=pl.UInt64)
+
+    def xor_shift(bits: int) -> pl.Expr:
+        return pl.col(_HASH).xor(pl.col(_HASH) // u64(1 << bits))
+
+    for col in cols:
+        parsed = pl.col(col).cast(pl.UInt64, strict=False)
+        invalid = df.filter(
+            pl.col(col).is_not_null() & (parsed.is_null() | (parsed == u64(_NULL_ID)))
+        )[col]
+        if not invalid.is_empty():
+            raise ValueError(
+                f"{col} holds ids that are not unsigned 64-bit integers: "
+                f"{invalid.unique(maintain_order=True).head(3).to_list()}"
+            )
+
+    # Polars integer arithmetic wraps, matching the masked Python version
+    lf = df.lazy().with_columns(u64(0).alias(_HASH))
+    for col in cols:
+        value = pl.col(col).cast(pl.UInt64, strict=False).fill_null(u64(_NULL_ID))
+        lf = (
+            lf.with_columns(pl.col(_HASH).xor(value) + u64(_GOLDEN_GAMMA))
+            .with_columns(xor_shift(30) * u64(_MIX_1))
+            .with_columns(xor_shift(27) * u64(_MIX_2))
+            .with_columns(xor_shift(31))
+        )
+    return (
+        lf.with_columns(_addr_hash=(pl.col(_HASH) // u64(2)).cast(pl.Int64))
+        .drop(_HASH)
+        .collect()
+    )
+
+
+@dataclass(frozen=True)
+class AddressStore:
+    """The address dimension persisted across builds.
+
+    Keys already in the store keep their `_addr_hash` and `address_id`, so rows
+    written by an older hashing scheme (e.g. seeded with
+    `cli migrate-address-hashes`) and every table keyed on `address_id` stay
+    stable from one build to the next.
+
+    Attributes:
+        path: Parquet file with `ADDRESS_STORE_SCHEMA` columns.
+    """
+
+    path: Path
+
+    def load(self) -> pl.DataFrame | None:
+        if not self.path.exists():
+            return None
+        stored = pl.read_parquet(self.path)
+        if "address_id" not in stored.columns:
+            stored = stored.with_columns(address_id=pl.lit(None, dtype=pl.Int64))
+        return stored.select(list(ADDRESS_STORE_SCHEMA)).cast(ADDRESS_STORE_SCHEMA)
+
+    def save(self, rows: pl.DataFrame) -> None:
+        """Write `rows` atomically via a temporary file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.tmp")
+        rows.select(list(ADDRESS_STORE_SCHEMA)).write_parquet(tmp)
+        os.replace(tmp, self.path)
+
+
+def merge_address_keys(
+    preferred: pl.DataFrame, others: pl.DataFrame | None
+) -> pl.DataFrame:
+    """Rows of `preferred`, plus the keys of `others` it does not cover.
+
+    Both frames hold `ADDRESS_STORE_SCHEMA` columns (`address_id` may be
+    missing from `preferred`, as when seeding from a database without it).
+    """
+    if "address_id" not in preferred.columns:
+        preferred = preferred.with_columns(address_id=pl.lit(None, dtype=pl.Int64))
+    preferred = preferred.select(list(ADDRESS_STORE_SCHEMA)).cast(ADDRESS_STORE_SCHEMA)
+    if others is None:
+        return preferred
+    rest = others.join(preferred, on=ADDR_KEY_COLS, how="anti", nulls_equal=True)
+    return pl.concat([preferred, rest.select(list(ADDRESS_STORE_SCHEMA))]).sort(
+        "address_id", nulls_last=True, maintain_order=True
+    )
 
 
 @dataclass(frozen=True)
 class AddressDimension:
     meta_with_hash: pl.DataFrame
     address_df: pl.DataFrame
+    addresses: pl.DataFrame
+
 
+def build_address_dimension(
+    meta_psgc: pl.DataFrame, stored: pl.DataFrame | None = None
+) -> AddressDimension:
+    """Hash each distinct PSGC id tuple once and attach it to every row.
 
-def build_address_dimension(meta_psgc: pl.DataFrame) -> AddressDimension:
-    def _hash_row(cols):
-        key = "|".join(str(v) if v is not None else "" for v in cols)
-        return int(hashlib.md5(key.encode()).hexdigest()[:15], 16)
+    Args:
+        meta_psgc (pl.DataFrame): School-year rows with `ADDR_KEY_COLS`.
+        stored (pl.DataFrame | None): The persisted dimension from earlier
+            builds (`AddressStore.load`). Its keys keep their `_addr_hash` and
+            `address_id`; new hashes get ids after the largest stored one.
 
-    meta_with_hash = meta_psgc.with_columns(
-        pl.concat_list(ADDR_KEY_COLS)
-        .map_elements(_hash_row, return_dtype=pl.Int64)
-        .alias("_addr_hash")
+    Returns:
+        AddressDimension: Hashed metadata, the school-year → address bridge,
+            and the distinct `addresses` in use (`ADDRESS_STORE_SCHEMA`).
+    """
+    if stored is None:
+        stored = pl.DataFrame(schema=ADDRESS_STORE_SCHEMA)
+
+    keys = with_addr_hash(
+        meta_psgc.select(ADDR_KEY_COLS)
+        .unique(maintain_order=True)
+        .join(
+            stored.rename({"_addr_hash": _STORED}),
+            on=ADDR_KEY_COLS,
+            how="left",
+            nulls_equal=True,
+            maintain_order="left",
+        )
+    ).with_columns(pl.coalesce(_STORED, "_addr_hash").alias("_addr_hash"))
+
+    # Stored ids are kept; new hashes are numbered in order of first appearance
+    next_id = (stored["address_id"].max() or 0) + 1
+    fresh = (
+        keys.filter(pl.col("address_id").is_null())
+        .select("_addr_hash")
+        .unique(maintain_order=True)
+        .with_columns(
+            pl.int_range(next_id, next_id + pl.len(), dtype=pl.Int64).alias(_STORED)
+        )
+    )
+    keys = (
+        keys.drop(_STORED)
+        .join(fresh, on="_addr_hash", how="left", maintain_order="left")
+        .with_columns(pl.coalesce("address_id", _STORED).alias("address_id"))
+        .drop(_STORED)
+    )
+
+    addresses = keys.unique(subset=["_addr_hash"], maintain_order=True).select(
+        list(ADDRESS_STORE_SCHEMA)
     )
 
-    addresses = (
-        meta_with_hash.select(ADDR_KEY_COLS + ["_addr_hash"])
-        .unique(subset=["_addr_hash"])
-        .with_columns(pl.int_range(1, pl.len() + 1).alias("address_id"))
-        .with_columns(pl.col("_addr_hash").cast(pl.Int64))
+    meta_with_hash = meta_psgc.join(
+        keys.select(*ADDR_KEY_COLS, "_addr_hash"),
+        on=ADDR_KEY_COLS,
+        how="left",
+        nulls_equal=True,
+        maintain_order="left",
     )
 
     addr_df = (
@@ -47,10 +258,11 @@ def build_address_dimension(meta_psgc: pl.DataFrame) -> AddressDimension:
             how="left",
         )
         .unique()
-        .with_columns(pl.col("_addr_hash").cast(pl.Int64))
     )
 
-    return AddressDimension(meta_with_hash=meta_with_hash, address_df=addr_df)
+    return AddressDimension(
+        meta_with_hash=meta_with_hash, address_df=addr_df, addresses=addresses
+    )
 
 
 class AddressDimensionExtractor(BaseExtractor):
@@ -58,18 +270,33 @@ class AddressDimensionExtractor(BaseExtractor):
 
     name = "address"
     depends_on = ["meta_psgc"]
-    outputs = ["address", "meta_with_hash"]
+    outputs = ["address", "addresses", "meta_with_hash"]
 
     def extract(
         self,
         context: ExtractionContext,
         dependencies: dict[str, pl.DataFrame],
     ) -> ExtractionResult:
-        del context
-        dimension = build_address_dimension(dependencies["meta_psgc"])
+        store = AddressStore(path=context.paths.cache_dir / ADDRESS_STORE_FILE)
+        stored = store.load()
+        dimension = build_address_dimension(dependencies["meta_psgc"], stored=stored)
+        merged = merge_address_keys(dimension.addresses, stored)
+        store.save(merged)
+
+        known = 0 if stored is None else stored["address_id"].count()
+        new_keys = merged["address_id"].count() - known
+        console.log(
+            f"[cyan]Address dimension:[/cyan] {dimension.addresses.height} in use, "
+            f"{new_keys} new, {merged.height} stored"
+        )
         return ExtractionResult(
             tables={
                 "meta_with_hash": dimension.meta_with_hash,
                 "address": dimension.address_df,
-            }
+                "addresses": dimension.addresses,
+            },
+            metrics={
+                "address_keys_in_use": dimension.addresses.height,
+                "address_keys_new": new_keys,
+            },
         )
@@ -5,12 +5,12 @@ from __future__ import annotations
 import re
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Callable, Required, TypedDict
+from typing import Callable, Iterator, Required, TypedDict
 
 import polars as pl
-from openpyxl import load_workbook
 
-from ..common import console
+from ..common import console, map_in_processes
+from ..loaders.excel import SheetSpec, iter_sheet
 from ..plugin import BaseExtractor, ExtractionContext, ExtractionResult
 
 
@@ -67,6 +67,12 @@ DROP_OUT_CONFIGS: list[DropoutSheetConfig] = [
 ]
 
 
+# Sheet rows melted and parsed at a time; bounds the long-format intermediate
+DROPOUT_BATCH_ROWS = 5_000
+# Invalid rows kept per file for the log sample
+INVALID_SAMPLE_ROWS = 3
+
+
 _DROP_OUT_COLUMNS = {
     "school_year": pl.Utf8,
     "school_id": pl.Utf8,
@@ -80,190 +86,41 @@ _DROP_OUT_COLUMNS = {
 }
 
 
-def _excel_column_index(value: str) -> int:
-    """Convert an Excel column letter to a zero-based index."""
-
-    value = value.strip().upper()
-    index = 0
-    for char in value:
-        if not char.isalpha():
-            raise ValueError(f"Invalid Excel column reference: {value}")
-        index = index * 26 + (ord(char) - ord("A") + 1)
-    return index - 1
-
-
-def _parse_usecols(usecols: str | None) -> list[int] | None:
-    if not usecols:
-        return None
-
-    indexes: set[int] = set()
-    for part in usecols.split(","):
-        segment = part.strip()
-        if not segment:
-            continue
-        if ":" in segment:
-            start, end = [token.strip() for token in segment.split(":", 1)]
-            indexes.update(
-                range(_excel_column_index(start), _excel_column_index(end) + 1)
-            )
-        else:
-            indexes.add(_excel_column_index(segment))
-    return sorted(indexes)
-
-
-def _normalize_cell_value(value: object) -> object | None:
-    if value in ("#N/A", None, ""):
-        return None
-    return value
-
-
-def _normalize_header(value: object) -> str | None:
-    if value is None:
-        return None
-    text = str(value).strip()
-    return text if text else None
-
-
-def _forward_fill_row(row: tuple[object | None, ...]) -> list[str | None]:
-    filled: list[str | None] = []
-    last: str | None = None
-    for cell in row:
-        normalized = _normalize_header(cell)
-        if normalized:
-            last = normalized
-        filled.append(last)
-    return filled
-
-
-def _build_headers(
-    header_row: tuple[object | None, ...], indexes: list[int]
-) -> list[str]:
-    headers: list[str] = []
-    for idx in indexes:
-        if idx < len(header_row):
-            value = _normalize_header(header_row[idx])
-        else:
-            value = None
-        headers.append(value or f"column_{idx}")
-    return _ensure_unique_column_names(headers)
-
-
-def _ensure_unique_column_names(headers: list[str]) -> list[str]:
-    seen: dict[str, int] = {}
-    unique_headers: list[str] = []
-    for label in headers:
-        count = seen.get(label, 0)
-        if count:
-            unique_headers.append(f"{label}_{count}")
-            seen[label] = count + 1
-        else:
-            unique_headers.append(label)
-            seen[label] = 1
-    return unique_headers
-
-
-def _build_headers_from_rows(
-    header_rows: list[tuple[object | None, ...]], indexes: list[int]
-) -> list[str]:
-    filled_rows = [_forward_fill_row(row) for row in header_rows]
-    headers: list[str] = []
-    for idx in indexes:
-        tokens: list[str] = []
-        for row in filled_rows:
-            if idx < len(row) and row[idx]:
-                tokens.append(row[idx])  # type: ignore[arg-type]
-        combined = " ".join(tokens)
-        text = re.sub(r"\s+", " ", combined).strip()
-        headers.append(text or f"column_{idx}")
-    return _ensure_unique_column_names(headers)
-
-
-def _read_simple_sheet(path: Path, cfg: DropoutSheetConfig) -> pl.DataFrame:
-    wb = load_workbook(path, data_only=True, read_only=True)
+def _sheet_spec(cfg: DropoutSheetConfig) -> SheetSpec:
     sheet_name = cfg.get("sheet_name")
     if not sheet_name:
         raise ValueError("sheet_name is required in config")
-    try:
-        ws = wb[sheet_name]
-    except KeyError as exc:
-        raise ValueError(f"Missing sheet {sheet_name}") from exc
-
-    rows = list(ws.iter_rows(values_only=True))
-    header_index = cfg.get("header")
-    if header_index is None or header_index >= len(rows):
-        raise ValueError(f"Header index {header_index} out of range for {path.name}")
-
-    header_row = rows[header_index]
-    selected_indexes = _parse_usecols(cfg.get("cols")) or list(range(len(header_row)))
-    headers = _build_headers(header_row, selected_indexes)
-    school_id_col = cfg.get("school_id_col")
-    if school_id_col:
-        headers[0] = school_id_col
-
-    data_start = header_index + 1
-    data_values: list[list[object | None]] = []
-    for offset, row in enumerate(rows[data_start:], start=1):
-        row_cells = []
-        for idx in selected_indexes:
-            value = row[idx] if idx < len(row) else None
-            row_cells.append(_normalize_cell_value(value))
-        row_cells.append(data_start + offset)
-        data_values.append(row_cells)
-
-    columns = headers + ["__source_row"]
-    return pl.DataFrame(data=data_values, schema=columns, orient="row")
-
-
-def _read_merged_headers_sheet(path: Path, cfg: DropoutSheetConfig) -> pl.DataFrame:
-    wb = load_workbook(path, data_only=True, read_only=True)
-    sheet_name = cfg.get("sheet_name")
-    if not sheet_name:
-        raise ValueError("sheet_name is required in config")
-    try:
-        ws = wb[sheet_name]
-    except KeyError as exc:
-        raise ValueError(f"Missing sheet {sheet_name}") from exc
+    if "header" in cfg:
+        return SheetSpec(
+            sheet_name=sheet_name, usecols=cfg.get("cols"), header=cfg["header"]
+        )
 
-    rows = list(ws.iter_rows(values_only=True))
     header_start = cfg.get("header_start")
     header_rows = cfg.get("header_rows")
     if header_start is None or header_rows is None:
         raise ValueError("Merged-sheet config missing header info")
-
-    header_slice = rows[header_start : header_start + header_rows]
-    if not header_slice:
-        raise ValueError(f"Not enough header rows for {path.name}")
-    first_header = header_slice[0]
-    selected_indexes = _parse_usecols(cfg.get("cols")) or list(range(len(first_header)))
-    normalized_header_slice: list[tuple[object | None, ...]] = [
-        tuple(_normalize_cell_value(cell) for cell in row) for row in header_slice
-    ]
-    headers = _build_headers_from_rows(normalized_header_slice, selected_indexes)
-    school_id_col = cfg.get("school_id_col")
-    if school_id_col:
-        headers[0] = school_id_col
-
     data_start = cfg.get("data_start")
     if data_start is None:
         raise ValueError("Merged-sheet config missing data_start")
+    return SheetSpec(
+        sheet_name=sheet_name,
+        usecols=cfg.get("cols"),
+        header=header_start,
+        header_rows=header_rows,
+        data_start=data_start,
+    )
 
-    data_values: list[list[object | None]] = []
-    for offset, row in enumerate(rows[data_start:], start=1):
-        row_cells = []
-        for idx in selected_indexes:
-            value = row[idx] if idx < len(row) else None
-            row_cells.append(_normalize_cell_value(value))
-        row_cells.append(data_start + offset)
-        data_values.append(row_cells)
-
-    columns = headers + ["__source_row"]
-    return pl.DataFrame(data=data_values, schema=columns, orient="row")
 
+def _iter_dropout_batches(
+    path: Path, cfg: DropoutSheetConfig, batch_rows: int
+) -> Iterator[pl.DataFrame]:
+    """Read the sheet of `cfg` in slices of `batch_rows` sheet rows."""
 
-def _read_dropout_df(path: Path, cfg: DropoutSheetConfig) -> pl.DataFrame:
-    if "header" in cfg:
-        return _read_simple_sheet(path, cfg)
-    return _read_merged_headers_sheet(path, cfg)
+    school_id_col = cfg.get("school_id_col")
+    for df in iter_sheet(path, _sheet_spec(cfg), batch_rows, "__source_row"):
+        if school_id_col:
+            df = df.rename({df.columns[0]: school_id_col})
+        yield df
 
 
 def _melt_dropout(
@@ -302,67 +159,62 @@ def _melt_dropout(
     return melted
 
 
-def _normalize_school_id(value: object | None) -> str | None:
-    if value is None:
-        return None
-    text = str(value).strip()
-    if not text:
-        return None
-    if text.endswith(".0"):
-        text = text[: -len(".0")]
-    return text
-
-
-def _parse_numeric(value: object | None) -> int | None:
-    if value is None:
-        return None
-    if isinstance(value, (int, float)):
-        if value != value:  # NaN
-            return None
-        return int(value)
-    cleaned = str(value).strip()
-    if not cleaned:
-        return None
-    cleaned = cleaned.replace(",", "")
-    try:
-        return int(float(cleaned))
-    except ValueError:
-        return None
+def _school_id_expr() -> pl.Expr:
+    """Trimmed text school id without a trailing `.0`; null when blank."""
 
+    text = pl.col("school_id").cast(pl.Utf8).str.strip_chars().str.strip_suffix(".0")
+    return pl.when(text.str.len_chars() > 0).then(text).alias("school_id")
 
-def _parse_dropout_records(
-    df: pl.DataFrame,
+
+def _parse_headers(
+    raw_cols: pl.Series,
     parser: Callable[[str], tuple[str | None, str | None, str | None]],
-) -> tuple[list[dict[str, object | None]], list[dict[str, object | None]]]:
-    records: list[dict[str, object | None]] = []
-    invalid: list[dict[str, object | None]] = []
-    for row in df.to_dicts():
-        grade, strand, sex = parser(row["raw_col"])
-        if not grade or not sex:
-            invalid.append(row)
-            continue
-        school_id = _normalize_school_id(row["school_id"])
-        if not school_id:
-            invalid.append(row)
-            continue
-        num_dropouts = _parse_numeric(row["num_dropouts"])
-        if num_dropouts is None:
-            invalid.append(row)
-            continue
-
-        records.append(
-            {
-                "school_year": row["school_year"],
-                "school_id": school_id,
-                "grade": grade,
-                "strand": strand,
-                "sex": sex,
-                "num_dropouts": num_dropouts,
-                "source_file": row["source_file"],
-                "source_row": row.get("source_row"),
-                "ingested_at": row["ingested_at"],
-            }
-        )
+) -> pl.DataFrame:
+    """Run `parser` once per distinct header; unparseable headers get nulls."""
+
+    parsed = [(raw_col, *parser(raw_col)) for raw_col in raw_cols.unique()]
+    return pl.DataFrame(
+        parsed,
+        schema={
+            "raw_col": pl.Utf8,
+            "grade": pl.Utf8,
+            "strand": pl.Utf8,
+            "sex": pl.Utf8,
+        },
+        orient="row",
+    )
+
+
+def _parse_dropout_records(
+    df: pl.DataFrame, headers: pl.DataFrame
+) -> tuple[pl.DataFrame, pl.DataFrame]:
+    """Split melted cells into `_DROP_OUT_COLUMNS` records and invalid rows.
+
+    `headers` is the `_parse_headers` lookup for the melted `raw_col` values.
+    A row is invalid when its header yields no grade or sex, its school id is
+    blank, or its count is NaN. Counts are truncated to integers.
+    """
+
+    count = pl.col("num_dropouts")
+    parsed = df.join(headers, on="raw_col", how="left", maintain_order="left")
+    parsed = parsed.with_columns(
+        _school_id_expr(),
+        pl.when(count.is_not_nan()).then(count).cast(pl.Int64, strict=False),
+    )
+    valid = parsed.select(
+        (
+            (pl.col("grade").str.len_chars() > 0)
+            & (pl.col("sex").str.len_chars() > 0)
+            & pl.col("school_id").is_not_null()
+            & pl.col("num_dropouts").is_not_null()
+        ).fill_null(False)
+    ).to_series()
+
+    records = parsed.filter(valid).select(
+        pl.col(name).cast(dtype) if name in parsed.columns else pl.lit(None, dtype)
+        for name, dtype in _DROP_OUT_COLUMNS.items()
+    )
+    invalid = df.filter(~valid)
     return records, invalid
 
 
@@ -380,13 +232,64 @@ def _parser_for_schema(
         raise ValueError(f"No parser for dropout schema {schema}") from exc
 
 
-def consolidate_dropouts(folder: Path) -> tuple[pl.DataFrame, dict[str, object]]:
-    ingested_at = datetime.now(timezone.utc)
-    records: list[dict[str, object | None]] = []
-    invalid_rows: list[dict[str, object | None]] = []
+def _ingest_dropout_file(
+    job: tuple[Path, DropoutSheetConfig, datetime, int],
+) -> tuple[int, pl.DataFrame, int, pl.DataFrame]:
+    """Read, melt, and parse one workbook `batch_rows` sheet rows at a time.
+
+    Each batch is read from the sheet's grid snapshot on its own, so neither
+    the raw sheet nor its long-format cells are held whole. Returns the
+    melted cell count, the valid records, the invalid row count, and the
+    first `INVALID_SAMPLE_ROWS` invalid rows.
+    """
+
+    path, cfg, ingested_at, batch_rows = job
+    parser = _parser_for_schema(cfg["schema"])
+    headers: pl.DataFrame | None = None
+
     melted_rows = 0
-    processed_files = 0
+    records: list[pl.DataFrame] = []
+    invalid_rows = 0
+    samples: list[pl.DataFrame] = []
+    for batch in _iter_dropout_batches(path, cfg, batch_rows):
+        if headers is None:
+            value_cols = [
+                col
+                for col in batch.columns
+                if col not in (cfg["school_id_col"], "__source_row")
+            ]
+            headers = _parse_headers(
+                pl.Series("raw_col", value_cols, dtype=pl.Utf8), parser
+            )
+        melted = _melt_dropout(
+            batch,
+            school_id_col=cfg["school_id_col"],
+            school_year=cfg["year"],
+            source_file=path.name,
+            ingested_at=ingested_at,
+        )
+        melted_rows += melted.height
+        valid, rejected = _parse_dropout_records(melted, headers)
+        records.append(valid)
+        invalid_rows += rejected.height
+        samples.append(rejected.head(INVALID_SAMPLE_ROWS))
+    sample = pl.concat(samples).head(INVALID_SAMPLE_ROWS)
+    return melted_rows, pl.concat(records), invalid_rows, sample
+
+
+def consolidate_dropouts(
+    folder: Path, workers: int = 1, batch_rows: int = DROPOUT_BATCH_ROWS
+) -> tuple[pl.DataFrame, dict[str, object]]:
+    """Ingest every `DROP_OUT_CONFIGS` workbook in `folder`.
+
+    Workbooks are parsed on `workers` processes and combined in config
+    order, so the result does not depend on `workers`. Each sheet is read,
+    melted, and parsed `batch_rows` rows at a time, so neither a whole raw
+    sheet nor its long-format cells are held at once.
+    """
+    ingested_at = datetime.now(timezone.utc)
 
+    jobs: list[tuple[Path, DropoutSheetConfig, datetime, int]] = []
     for cfg in DROP_OUT_CONFIGS:
         year = cfg.get("year")
         if not year:
@@ -394,26 +297,16 @@ def consolidate_dropouts(folder: Path) -> tuple[pl.DataFrame, dict[str, object]]
         path = folder / f"{year}-dropouts.xlsx"
         if not path.exists():
             raise FileNotFoundError(f"Dropout file missing: {path}")
-        df_raw = _read_dropout_df(path, cfg)
-        parser = _parser_for_schema(cfg["schema"])
-        melted = _melt_dropout(
-            df_raw,
-            school_id_col=cfg["school_id_col"],
-            school_year=year,
-            source_file=path.name,
-            ingested_at=ingested_at,
-        )
-        melted_rows += melted.height
-        processed_files += 1
-
-        parsed, invalid = _parse_dropout_records(melted, parser)
-        records.extend(parsed)
-        invalid_rows.extend(invalid)
+        jobs.append((path, cfg, ingested_at, batch_rows))
+    processed_files = len(jobs)
 
-    if records:
-        df = pl.DataFrame(records, schema=_DROP_OUT_COLUMNS)
-    else:
-        df = pl.DataFrame(schema=_DROP_OUT_COLUMNS)
+    results = map_in_processes(_ingest_dropout_file, jobs, workers)
+    melted_rows = sum(result[0] for result in results)
+    df = pl.concat(
+        [pl.DataFrame(schema=_DROP_OUT_COLUMNS), *(result[1] for result in results)]
+    )
+    invalid_rows = sum(result[2] for result in results)
+    samples = [result[3] for result in results]
 
     before = df.height
     df = df.unique(
@@ -425,14 +318,14 @@ def consolidate_dropouts(folder: Path) -> tuple[pl.DataFrame, dict[str, object]]
         "dropouts_files": processed_files,
         "dropouts_rows_melted": melted_rows,
         "dropouts_valid_rows": df.height,
-        "dropouts_invalid_rows": len(invalid_rows),
+        "dropouts_invalid_rows": invalid_rows,
         "dropouts_duplicates_removed": duplicates_removed,
     }
 
     if invalid_rows:
-        sample = invalid_rows[:3]
+        sample = pl.concat(samples).head(INVALID_SAMPLE_ROWS).to_dicts()
         console.log(
-            f"[yellow]Dropped {len(invalid_rows)} invalid dropout rows; sample:[/yellow] {sample}"
+            f"[yellow]Dropped {invalid_rows} invalid dropout rows; sample:[/yellow] {sample}"
         )
 
     console.log(
@@ -535,7 +428,7 @@ class DropoutsExtractor(BaseExtractor):
         if not dropout_dir.exists():
             raise FileNotFoundError(f"Dropout directory {dropout_dir} does not exist")
 
-        df, metrics = consolidate_dropouts(dropout_dir)
+        df, metrics = consolidate_dropouts(dropout_dir, workers=context.workers)
         if df.height == 0:
             raise ValueError("Dropout extraction produced no rows")
 
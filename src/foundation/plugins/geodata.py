@@ -1,26 +1,199 @@
+import datetime as dt
+import re
 from pathlib import Path
 
 import polars as pl
 
 from ..common import console
 from ..plugin import BaseExtractor, ExtractionContext, ExtractionResult
+from ..schema import SCHEMAS
+from ..snapshots import scan_csv_snapshot
+from ..spatial import haversine_km_expr
+
+COORDINATE_COLS = ["longitude", "latitude"]
+# Columns kept on the school-year fact; names and address text live elsewhere
+GEO_COLS = [col.name for col in SCHEMAS["geo"].columns]
+# Release date in source file names, e.g. 2025-12-20-geo-k12-deped.csv
+FILE_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# Generous box around the Philippine archipelago
+PH_BOUNDS = {"min_lon": 116.0, "max_lon": 127.0, "min_lat": 4.0, "max_lat": 21.5}
+# Level → (PSGC id column, smallest radius in km before a point is flagged)
+AREA_CHECKS = {
+    "muni": ("psgc_muni_id", 10.0),
+    "provhuc": ("psgc_provhuc_id", 40.0),
+}
+# Flag beyond this many median school distances from the area centre
+AREA_SPREAD = 4.0
+# Areas with fewer located schools are not checked
+AREA_MIN_SCHOOLS = 5
+COORDINATE_FLAGS = [
+    "coord_outside_ph",
+    *[f"coord_outside_{lvl}" for lvl in AREA_CHECKS],
+]
 
 
 def set_coordinates(geo_file: Path, meta_df: pl.DataFrame) -> pl.DataFrame:
     """Add longitude and latitude values from `geo_file`."""
     console.log(f"[cyan]Attaching coordinates from {geo_file=}...[/cyan]")
-    geo_df = pl.read_csv(geo_file)
-    geo_df = geo_df.select(["id", "longitude", "latitude"]).rename({"id": "school_id"})
+    geo_df = (
+        scan_csv_snapshot(geo_file)
+        .select(pl.col("id").alias("school_id"), "longitude", "latitude")
+        .collect()
+    )
     school_geo_df_long_lat = meta_df.join(geo_df, on="school_id", how="left")
     return school_geo_df_long_lat
 
 
+def source_file_date(path: Path) -> dt.date | None:
+    """Release date in the file name (`2025-12-20-geo.csv`), None if absent.
+
+    The name travels with the data, unlike the modification time, which
+    changes on every checkout or copy.
+    """
+    match = FILE_DATE.search(path.name)
+    return dt.date.fromisoformat(match.group()) if match else None
+
+
+def read_school_coordinates(
+    geo_file: Path, school_ids: pl.Series | None = None
+) -> pl.DataFrame:
+    """Read one coordinate pair per school from `geo_file`.
+
+    Rows without both coordinates are skipped, and the first row wins when a
+    school repeats. Each row records where the coordinates came from:
+    `source_file` (the file name) and `source_date` (`source_file_date`).
+
+    Args:
+        geo_file (Path): CSV with `id` (school_id), `longitude`, `latitude`.
+        school_ids (pl.Series | None): If given, keep only these schools and
+            cast `school_id` to their dtype.
+
+    Returns:
+        pl.DataFrame: `school_id`, `longitude`, `latitude`, `source_file`,
+            `source_date`.
+    """
+    console.log(f"[cyan]Reading school coordinates from {geo_file=}...[/cyan]")
+    released = source_file_date(geo_file)
+    coords = (
+        scan_csv_snapshot(geo_file)
+        .select(pl.col("id").alias("school_id"), *COORDINATE_COLS)
+        .drop_nulls(COORDINATE_COLS)
+        .unique(subset="school_id", keep="first", maintain_order=True)
+        .with_columns(
+            pl.col(COORDINATE_COLS).cast(pl.Float64),
+            source_file=pl.lit(geo_file.name),
+            source_date=pl.lit(released, dtype=pl.Date),
+        )
+        .collect()
+    )
+    if school_ids is not None:
+        coords = coords.with_columns(pl.col("school_id").cast(school_ids.dtype)).join(
+            school_ids.unique().to_frame("school_id"), on="school_id", how="semi"
+        )
+    return coords
+
+
+def flag_coordinates(geo_df: pl.DataFrame, coordinates: pl.DataFrame) -> pl.DataFrame:
+    """Flag school-year rows whose coordinates look wrong for their PSGC area.
+
+    The centre of each municipality and province is the median longitude and
+    latitude of its located schools, and its spread is their median distance
+    to that centre. Both are robust to the few bad points being looked for. A
+    row is flagged when its school lies farther from the centre than
+    `AREA_SPREAD` spreads, and never within the level's minimum radius
+    (`AREA_CHECKS`). Points outside `PH_BOUNDS` are flagged separately and do
+    not count toward any centre.
+
+    Args:
+        geo_df (pl.DataFrame): School-year rows with `school_id` and the
+            `AREA_CHECKS` id columns.
+        coordinates (pl.DataFrame): `school_id`, `longitude`, `latitude`.
+
+    Returns:
+        pl.DataFrame: `geo_df` plus the boolean `COORDINATE_FLAGS` columns;
+            null where the school has no coordinates, no id at that level, or
+            an area with fewer than `AREA_MIN_SCHOOLS` located schools.
+    """
+    lon, lat = pl.col("longitude"), pl.col("latitude")
+    located = geo_df.join(
+        coordinates.select("school_id", *COORDINATE_COLS),
+        on="school_id",
+        how="left",
+        maintain_order="left",
+    ).with_columns(
+        coord_outside_ph=~(
+            lon.is_between(PH_BOUNDS["min_lon"], PH_BOUNDS["max_lon"])
+            & lat.is_between(PH_BOUNDS["min_lat"], PH_BOUNDS["max_lat"])
+        )
+    )
+    in_ph = located.filter(~pl.col("coord_outside_ph"))
+
+    for level, (col, min_km) in AREA_CHECKS.items():
+        members = in_ph.filter(pl.col(col).is_not_null()).unique(
+            subset=[col, "school_id"]
+        )
+        centres = members.group_by(col).agg(
+            centre_lon=lon.median(), centre_lat=lat.median(), schools=pl.len()
+        )
+        to_centre = haversine_km_expr(
+            lon, lat, pl.col("centre_lon"), pl.col("centre_lat")
+        )
+        spreads = (
+            members.join(centres, on=col)
+            .group_by(col)
+            .agg(spread_km=to_centre.median())
+        )
+        areas = centres.join(spreads, on=col).filter(
+            pl.col("schools") >= AREA_MIN_SCHOOLS
+        )
+        radius = pl.max_horizontal(pl.lit(min_km), AREA_SPREAD * pl.col("spread_km"))
+        located = (
+            located.join(areas, on=col, how="left", maintain_order="left")
+            .with_columns((to_centre > radius).alias(f"coord_outside_{level}"))
+            .drop(areas.columns[1:])
+        )
+
+    return located.drop(COORDINATE_COLS)
+
+
+class GeoCoordinatesExtractor(BaseExtractor):
+    """Read `GEO_FILE` once for every consumer of school coordinates."""
+
+    name = "geo_coordinates"
+    depends_on = ["school_year_meta"]
+    outputs = ["geo_coordinates"]
+
+    def extract(
+        self,
+        context: ExtractionContext,
+        dependencies: dict[str, pl.DataFrame],
+    ) -> ExtractionResult:
+        geo_file = context.paths.geo_file
+        if not geo_file.exists():
+            raise FileNotFoundError(f"Coordinate file {geo_file} does not exist")
+        coordinates = read_school_coordinates(
+            geo_file=geo_file, school_ids=dependencies["school_year_meta"]["school_id"]
+        )
+        return ExtractionResult(tables={"geo_coordinates": coordinates})
+
+
+def latest_school_names(meta_df: pl.DataFrame) -> pl.DataFrame:
+    """One row per school with its name from the latest year that has one."""
+    return (
+        meta_df.select("school_id", "school_year", "school_name")
+        .drop_nulls()
+        .sort("school_id", "school_year")
+        .unique(subset="school_id", keep="last", maintain_order=True)
+    )
+
+
 class GeoExtractor(BaseExtractor):
-    """Attach longitude/latitude metadata to the canonical address rows."""
+    """Split the canonical address rows into a slim geo fact and dimensions."""
 
     name = "geo"
-    depends_on = ["meta_with_hash", "address"]
-    outputs = ["geo"]
+    depends_on = ["meta_with_hash", "address", "geo_coordinates"]
+    outputs = ["geo", "school_coordinates", "school_names"]
     schema_name = "geo"
 
     def extract(
@@ -28,11 +201,12 @@ class GeoExtractor(BaseExtractor):
         context: ExtractionContext,
         dependencies: dict[str, pl.DataFrame],
     ) -> ExtractionResult:
-        geo_df = set_coordinates(
-            geo_file=context.paths.geo_file,
-            meta_df=dependencies["meta_with_hash"],
+        geo_df = dependencies["meta_with_hash"].with_columns(
+            pl.col("_addr_hash").cast(pl.Int64)
+        )
+        coordinates = dependencies["geo_coordinates"].join(
+            geo_df.select("school_id").unique(), on="school_id", how="semi"
         )
-        geo_df = geo_df.with_columns(pl.col("_addr_hash").cast(pl.Int64))
 
         address_df = dependencies["address"]
         geo_df = geo_df.join(
@@ -40,5 +214,20 @@ class GeoExtractor(BaseExtractor):
             on=["school_id", "school_year", "_addr_hash"],
             how="left",
         )
+        geo_df = flag_coordinates(geo_df=geo_df, coordinates=coordinates).select(
+            GEO_COLS
+        )
 
-        return ExtractionResult(tables={"geo": geo_df})
+        flagged = {
+            f"geo_{flag}_schools": geo_df.filter(pl.col(flag))["school_id"].n_unique()
+            for flag in COORDINATE_FLAGS
+        }
+        console.log(f"[cyan]Coordinate checks:[/cyan] {flagged}")
+        return ExtractionResult(
+            tables={
+                "geo": geo_df,
+                "school_coordinates": coordinates,
+                "school_names": latest_school_names(dependencies["meta_with_hash"]),
+            },
+            metrics=flagged,
+        )
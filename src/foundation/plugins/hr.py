@@ -7,8 +7,9 @@ from pathlib import Path
 from typing import TypedDict
 
 import polars as pl
-from openpyxl import load_workbook
 
+from ..common import map_in_processes
+from ..loaders.excel import ExcelWorkbook, SheetSpec
 from ..plugin import BaseExtractor, ExtractionContext, ExtractionResult
 
 
@@ -39,37 +40,6 @@ YEAR_SHEET_CONFIGS: dict[str, dict[str, SheetConfig]] = {
 }
 
 
-def _excel_column_index(value: str) -> int:
-    """Convert Excel column letters to a zero-based index."""
-
-    value = value.strip().upper()
-    index = 0
-    for char in value:
-        if not char.isalpha():
-            raise ValueError(f"Invalid Excel column reference: {value}")
-        index = index * 26 + (ord(char) - ord("A") + 1)
-    return index - 1
-
-
-def _parse_usecols(usecols: str | None) -> list[int] | None:
-    if not usecols:
-        return None
-
-    indexes: set[int] = set()
-    for part in usecols.split(","):
-        part = part.strip()
-        if not part:
-            continue
-        if ":" in part:
-            start, end = [p.strip() for p in part.split(":")]
-            indexes.update(
-                range(_excel_column_index(start), _excel_column_index(end) + 1)
-            )
-        else:
-            indexes.add(_excel_column_index(part))
-    return sorted(indexes)
-
-
 def _normalize_school_id(df: pl.DataFrame) -> pl.DataFrame:
     """Create a canonical ``school_id`` column based on LIS/BEIS IDs."""
 
@@ -126,46 +96,13 @@ def _melt_teacher_counts(df: pl.DataFrame, level: str) -> pl.DataFrame:
     return df_long
 
 
-def _read_sheet(workbook: Path, cfg: SheetConfig, level: str) -> pl.DataFrame:
-    """Use openpyxl to extract the exact header row and columns."""
-
-    start_row = cfg["header"] or 0
-    column_indexes = _parse_usecols(cfg["usecols"])
-
-    wb = load_workbook(workbook, data_only=True, read_only=True)
-    try:
-        ws = wb[cfg["sheet_name"]]
-    except KeyError as exc:
-        raise ValueError(f"Sheet {cfg['sheet_name']} is missing") from exc
+def _read_sheet(workbook: ExcelWorkbook, cfg: SheetConfig, level: str) -> pl.DataFrame:
+    """Read the configured header row and columns of one sheet."""
 
-    rows = list(ws.iter_rows(values_only=True))
-    if start_row >= len(rows):
-        raise ValueError(
-            f"Header index {start_row} is beyond sheet height {len(rows)} for {cfg['sheet_name']}"
-        )
-
-    header_row = rows[start_row]
-    selected_indexes = column_indexes or list(range(len(header_row)))
-
-    header = []
-    for idx in selected_indexes:
-        value = header_row[idx] if idx < len(header_row) else None
-        header.append(
-            str(value).strip() if value not in (None, "") else f"column_{idx}"
-        )
-
-    data_rows = rows[start_row + 1 :]
-    values: list[list[object | None]] = []
-    for row in data_rows:
-        values.append(
-            [
-                None if idx >= len(row) else (None if row[idx] == "#N/A" else row[idx])
-                for idx in selected_indexes
-            ]
-        )
-
-    df = pl.DataFrame(values, schema=header, orient="row")
-    df = df.with_columns([pl.col(col).cast(pl.Utf8) for col in header])
+    spec = SheetSpec(
+        sheet_name=cfg["sheet_name"], usecols=cfg["usecols"], header=cfg["header"] or 0
+    )
+    df = workbook.read_sheet(spec)
     df = _normalize_school_id(df)
     return _melt_teacher_counts(df, level)
 
@@ -173,11 +110,12 @@ def _read_sheet(workbook: Path, cfg: SheetConfig, level: str) -> pl.DataFrame:
 def _load_teacher_sheets(
     workbook: Path, sheet_configs: dict[str, SheetConfig]
 ) -> pl.DataFrame:
-    """Read the configured sheets and combine them into a single DataFrame."""
+    """Read the configured sheets of one workbook and combine them."""
 
+    excel = ExcelWorkbook(workbook)
     frames: list[pl.DataFrame] = []
     for level, cfg in sheet_configs.items():
-        frames.append(_read_sheet(workbook, cfg, level))
+        frames.append(_read_sheet(excel, cfg, level))
 
     if not frames:
         return pl.DataFrame(schema={"school_year": pl.Utf8})
@@ -226,7 +164,7 @@ class TeachersExtractor(BaseExtractor):
         if not files:
             raise FileNotFoundError(f"No teacher Excel files found in {hr_dir}")
 
-        frames = [_read_teacher_file(file) for file in files]
+        frames = map_in_processes(_read_teacher_file, files, context.workers)
         combined = pl.concat(frames, how="vertical")
         if combined.is_empty():
             raise ValueError("Teacher load produced no rows")
@@ -1,5 +1,15 @@
 """Matching utilities for PSGC enrichment plugins."""
 
-from .pipeline import match_psgc_schools
+from .cache import MatchCache
+from .index import PsgcIndex, load_psgc_index
+from .pipeline import match_psgc_schools, match_psgc_schools_with_stats
+from .stats import summarize_matches
 
-__all__ = ["match_psgc_schools"]
+__all__ = [
+    "MatchCache",
+    "PsgcIndex",
+    "load_psgc_index",
+    "match_psgc_schools",
+    "match_psgc_schools_with_stats",
+    "summarize_matches",
+]
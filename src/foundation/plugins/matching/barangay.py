@@ -1,6 +1,19 @@
 import polars as pl
 
-from ...common import FIXES, console, convert_trailing_roman, normalize_geo_name
+from ...common import FIXES, console
+from ...transforms.geo_names import (
+    barangay_name_expr,
+    token_sort_expr,
+    trigram_similarity_expr,
+    trigrams_expr,
+)
+from .index import PsgcIndex, as_psgc_index
+
+# Minimum trigram similarity for a fuzzy barangay match to be accepted
+FUZZY_BRGY_THRESHOLD = 0.5
+
+# How each barangay id was found ("exact", "correction", "fuzzy") and how sure
+BRGY_MATCH_SCHEMA = {"brgy_match_method": pl.Utf8, "brgy_match_confidence": pl.Float64}
 
 
 def fix_barangay_enye_value(barangay):
@@ -9,68 +22,124 @@ def fix_barangay_enye_value(barangay):
     return barangay.replace("Ã‘", "Ñ")
 
 
-def apply_barangay_corrections(meta: pl.DataFrame, psgc: pl.DataFrame) -> pl.DataFrame:
+def compile_barangay_corrections(
+    rules: list[dict], barangays: pl.DataFrame
+) -> pl.DataFrame:
     """
-    Apply barangay name corrections based on CORRECTIONS,
-    then look up the correct PSGC barangay code from psgc_df.
+    Compile `barangay_corrections` rules into one lookup frame keyed by
+    (`psgc_muni_id`, `old_upper`) with the corrected name and its PSGC id.
+
+    Rules keep their sequential meaning: the first rule for a key wins, and when
+    its new name has no PSGC barangay, a later rule whose `old` is that new name
+    (same municipality) continues the correction.
+
+    >>> barangays = pl.DataFrame(
+    ...     {"id": ["0100100101"], "mun_prefix": ["0100100"], "name_upper": ["LIBTONG"]}
+    ... )
+    >>> rules = [
+    ...     {"psgc_muni_id": "0100100100", "old": "LIBTONG I", "new": "Libtong"},
+    ...     {"psgc_muni_id": "0100100100", "old": "LIBTUNG", "new": "Libtung"},
+    ... ]
+    >>> compile_barangay_corrections(rules, barangays).rows()
+    [('0100100100', 'LIBTONG I', 'Libtong', '0100100101'), ('0100100100', 'LIBTUNG', 'Libtung', None)]
     """
+    prefixes = {rule["psgc_muni_id"][:7] for rule in rules}
+    lookup: dict[tuple[str, str], str] = {}
+    for brgy_id, prefix, name_upper in (
+        barangays.filter(pl.col("mun_prefix").is_in(list(prefixes)))
+        .select("id", "mun_prefix", "name_upper")
+        .iter_rows()
+    ):
+        lookup.setdefault((prefix, name_upper), brgy_id)
 
-    # Make a copy to avoid modifying original df unexpectedly
-    df = meta.clone()
+    first_rule: dict[tuple[str, str], int] = {}
+    for pos, rule in enumerate(rules):
+        first_rule.setdefault((rule["psgc_muni_id"], rule["old"].upper()), pos)
+
+    def next_rule(muni_code: str, name: str, after: int) -> int | None:
+        return next(
+            (
+                pos
+                for pos in range(after + 1, len(rules))
+                if rules[pos]["psgc_muni_id"] == muni_code
+                and rules[pos]["old"].upper() == name.upper()
+            ),
+            None,
+        )
+
+    compiled = []
+    for (muni_code, old_upper), pos in first_rule.items():
+        new_name = rules[pos]["new"]
+        brgy_id = lookup.get((muni_code[:7], new_name.upper()))
+        while brgy_id is None:
+            follow = next_rule(muni_code, new_name, pos)
+            if follow is None:
+                break
+            pos, new_name = follow, rules[follow]["new"]
+            brgy_id = lookup.get((muni_code[:7], new_name.upper()))
+        compiled.append((muni_code, old_upper, new_name, brgy_id))
+
+    return pl.DataFrame(
+        compiled,
+        schema={
+            "psgc_muni_id": pl.Utf8,
+            "old_upper": pl.Utf8,
+            "new_name": pl.Utf8,
+            "corrected_brgy_id": pl.Utf8,
+        },
+        orient="row",
+    )
 
-    rules = FIXES["barangay_corrections"]
 
-    # Ensure psgc_brgy_id column exists
+def apply_barangay_corrections(
+    meta: pl.DataFrame, psgc: PsgcIndex | pl.DataFrame
+) -> pl.DataFrame:
+    """
+    Apply barangay name corrections based on CORRECTIONS,
+    then look up the correct PSGC barangay code from the PSGC index.
+
+    The rules are compiled once (`compile_barangay_corrections`) and applied to
+    still-unmatched rows in a single join.
+    """
+    df = meta
     if "psgc_brgy_id" not in df.columns:
         df = df.with_columns(psgc_brgy_id=pl.lit(None, dtype=pl.Utf8))
+    df = _ensure_match_cols(df)
 
-    for rule in rules:
-        muni_code = rule["psgc_muni_id"]
-        old_name = rule["old"]
-        new_name = rule["new"]
+    corrections = compile_barangay_corrections(
+        FIXES["barangay_corrections"], as_psgc_index(psgc).barangays
+    )
 
-        # Compute first 7 digits of the municipality ID
-        muni_prefix = muni_code[:7]
+    # Only rows without a barangay id are eligible for a correction
+    old_upper = pl.when(pl.col("psgc_brgy_id").is_null()).then(
+        pl.col("barangay").str.to_uppercase()
+    )
+    df = df.with_columns(
+        __muni_key=pl.col("psgc_muni_id").cast(pl.Utf8), __old_upper=old_upper
+    ).join(
+        corrections,
+        left_on=["__muni_key", "__old_upper"],
+        right_on=["psgc_muni_id", "old_upper"],
+        how="left",
+        maintain_order="left",
+    )
 
-        # Filter rows that need correction
-        mask = (
-            (pl.col("psgc_brgy_id").is_null())
-            & (pl.col("psgc_muni_id") == muni_code)
-            & (pl.col("barangay").str.to_uppercase() == old_name.upper())
-        )
+    resolved = pl.col("corrected_brgy_id").is_not_null()
+    return df.with_columns(
+        barangay=pl.coalesce("new_name", "barangay"),
+        psgc_brgy_id=pl.coalesce("psgc_brgy_id", "corrected_brgy_id"),
+        brgy_match_method=pl.when(resolved)
+        .then(pl.lit("correction"))
+        .otherwise(pl.col("brgy_match_method")),
+        brgy_match_confidence=pl.when(resolved)
+        .then(pl.lit(1.0))
+        .otherwise(pl.col("brgy_match_confidence")),
+    ).drop("__muni_key", "__old_upper", "new_name", "corrected_brgy_id")
 
-        # Check if any rows match
-        matching = df.filter(mask)
-        if matching.height > 0:
-            # Apply the updated barangay name
-            df = df.with_columns(
-                pl.when(mask)
-                .then(pl.lit(new_name))
-                .otherwise(pl.col("barangay"))
-                .alias("barangay")
-            )
-
-            # --- PSGC lookup ---
-            matched = psgc.filter(
-                (pl.col("id").str.starts_with(muni_prefix))
-                & (pl.col("geo") == "Bgy")
-                & (pl.col("name").str.to_uppercase() == new_name.upper())
-            )
-
-            if matched.height > 0:
-                # Assign the PSGC barangay ID
-                matched_id = matched.row(0)[matched.columns.index("id")]
-                df = df.with_columns(
-                    pl.when(mask)
-                    .then(pl.lit(matched_id))
-                    .otherwise(pl.col("psgc_brgy_id"))
-                    .alias("psgc_brgy_id")
-                )
-
-    return df
-
-
-def attach_psgc_brgy_id(meta: pl.DataFrame, psgc: pl.DataFrame) -> pl.DataFrame:
+
+def attach_psgc_brgy_id(
+    meta: pl.DataFrame, psgc: PsgcIndex | pl.DataFrame
+) -> pl.DataFrame:
     """
     Attach PSGC barangay-level codes to schools.
     Requires that psgc_muni_id is already assigned by attach_psgc_muni_id().
@@ -82,29 +151,14 @@ def attach_psgc_brgy_id(meta: pl.DataFrame, psgc: pl.DataFrame) -> pl.DataFrame:
     df = meta.clone()
 
     # ---------------------------------------------------------
-    # 1. Prepare barangay-level PSGC (geo == 'Bgy')
+    # 1. Barangay-level PSGC (geo == 'Bgy'), prebuilt in the index
     # ---------------------------------------------------------
-    psgc_bgy = psgc.filter(pl.col("geo") == "Bgy").with_columns(
-        normalized_name=pl.col("name").map_elements(
-            lambda x: convert_trailing_roman(normalize_geo_name(x)),
-            return_dtype=pl.Utf8,
-        ),
-        mun_prefix=pl.col("id").cast(pl.Utf8).str.slice(0, 7),
-    )
+    psgc_bgy = as_psgc_index(psgc).barangays.rename({"normalized": "normalized_name"})
 
     # ---------------------------------------------------------
     # 2. Normalize school barangay names
     # ---------------------------------------------------------
-    df = df.with_columns(
-        normalized_brgy=pl.col("barangay").map_elements(
-            lambda x: convert_trailing_roman(
-                normalize_geo_name(fix_barangay_enye_value(x))
-            )
-            if x is not None
-            else None,
-            return_dtype=pl.Utf8,
-        )
-    )
+    df = df.with_columns(normalized_brgy=barangay_name_expr(pl.col("barangay")))
 
     # ---------------------------------------------------------
     # 3. Extract municipality prefix from assigned psgc_muni_id
@@ -126,7 +180,14 @@ def attach_psgc_brgy_id(meta: pl.DataFrame, psgc: pl.DataFrame) -> pl.DataFrame:
     # ---------------------------------------------------------
     # 5. Assign PSGC barangay code
     # ---------------------------------------------------------
-    merged = merged.rename({"id": "psgc_brgy_id"})
+    merged = merged.rename({"id": "psgc_brgy_id"}).with_columns(
+        brgy_match_method=pl.when(pl.col("psgc_brgy_id").is_not_null()).then(
+            pl.lit("exact")
+        ),
+        brgy_match_confidence=pl.when(pl.col("psgc_brgy_id").is_not_null()).then(
+            pl.lit(1.0)
+        ),
+    )
 
     # ---------------------------------------------------------
     # 6. Cleanup temporary columns
@@ -142,3 +203,97 @@ def attach_psgc_brgy_id(meta: pl.DataFrame, psgc: pl.DataFrame) -> pl.DataFrame:
     )
 
     return merged
+
+
+def _ensure_match_cols(df: pl.DataFrame) -> pl.DataFrame:
+    """Add empty `BRGY_MATCH_COLS` when an earlier stage has not set them."""
+    return df.with_columns(
+        pl.lit(None, dtype=dtype).alias(col)
+        for col, dtype in BRGY_MATCH_SCHEMA.items()
+        if col not in df.columns
+    )
+
+
+def attach_fuzzy_brgy_id(
+    meta: pl.DataFrame,
+    psgc: PsgcIndex | pl.DataFrame,
+    threshold: float = FUZZY_BRGY_THRESHOLD,
+) -> pl.DataFrame:
+    """
+    Fill barangays still unmatched after the exact join and manual corrections
+    with the most similar PSGC barangay in the same municipality.
+
+    Candidates are blocked by the 7-digit prefix of `psgc_muni_id`, so each
+    unmatched row is compared only with the barangays of its own municipality.
+    Names are token-sorted and scored by trigram Jaccard similarity. The best
+    candidate is accepted when it scores at least `threshold` and strictly
+    beats the runner-up; ties are left unmatched rather than guessed.
+
+    Accepted rows get `brgy_match_method = "fuzzy"` and the similarity score as
+    `brgy_match_confidence`.
+    """
+    df = _ensure_match_cols(meta).with_row_index("__brgy_row")
+    barangays = as_psgc_index(psgc).barangays
+
+    unmatched = (
+        df.filter(
+            pl.col("psgc_brgy_id").is_null() & pl.col("psgc_muni_id").is_not_null()
+        )
+        .select(
+            "__brgy_row",
+            mun_prefix=pl.col("psgc_muni_id").cast(pl.Utf8).str.slice(0, 7),
+            name=barangay_name_expr(pl.col("barangay")),
+        )
+        .filter(pl.col("name").str.len_chars() > 0)
+    )
+    if unmatched.is_empty():
+        return df.drop("__brgy_row")
+
+    # Score each distinct (municipality, name) once against its own block
+    queries = unmatched.select("mun_prefix", "name").unique(maintain_order=True)
+    candidates = (
+        barangays.join(queries, on="mun_prefix", how="semi")
+        .select(
+            "mun_prefix",
+            candidate_id="id",
+            candidate_grams=trigrams_expr(token_sort_expr(pl.col("normalized"))),
+        )
+        .with_row_index("__psgc_order")
+    )
+    scored = (
+        queries.with_columns(grams=trigrams_expr(token_sort_expr(pl.col("name"))))
+        .join(candidates, on="mun_prefix", how="inner")
+        .with_columns(
+            score=trigram_similarity_expr(pl.col("grams"), pl.col("candidate_grams"))
+        )
+        .sort(["score", "__psgc_order"], descending=[True, False])
+    )
+    best = scored.group_by(["mun_prefix", "name"], maintain_order=True).agg(
+        fuzzy_id=pl.col("candidate_id").first(),
+        fuzzy_score=pl.col("score").first(),
+        runner_up=pl.col("score").slice(1, 1).first().fill_null(0.0),
+    )
+    accepted = best.filter(
+        (pl.col("fuzzy_score") >= threshold)
+        & (pl.col("fuzzy_score") > pl.col("runner_up"))
+    ).select("mun_prefix", "name", "fuzzy_id", "fuzzy_score")
+
+    updates = unmatched.join(accepted, on=["mun_prefix", "name"], how="inner").select(
+        "__brgy_row", "fuzzy_id", "fuzzy_score"
+    )
+    console.log(
+        f"[cyan]Fuzzy-matched {updates.height} of {unmatched.height} "
+        "unmatched barangays[/cyan]"
+    )
+
+    return (
+        df.join(updates, on="__brgy_row", how="left", maintain_order="left")
+        .with_columns(
+            psgc_brgy_id=pl.coalesce("psgc_brgy_id", "fuzzy_id"),
+            brgy_match_method=pl.when(pl.col("fuzzy_id").is_not_null())
+            .then(pl.lit("fuzzy"))
+            .otherwise(pl.col("brgy_match_method")),
+            brgy_match_confidence=pl.coalesce("fuzzy_score", "brgy_match_confidence"),
+        )
+        .drop("__brgy_row", "fuzzy_id", "fuzzy_score")
+    )
@@ -0,0 +1,107 @@
+"""Persisted location → PSGC match results reused across builds."""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import polars as pl
+
+from ...common import console
+from .barangay import BRGY_MATCH_SCHEMA
+
+LOCATION_COLS = ["region", "province", "municipality", "barangay"]
+PSGC_ID_COLS = ["psgc_region_id", "psgc_provhuc_id", "psgc_muni_id", "psgc_brgy_id"]
+MATCHED_PREFIX = "matched_"
+# Parquet key-value metadata entry holding the cache stamp
+STAMP_KEY = "match_cache_stamp"
+
+# Key tuple as it enters matching, then the (possibly overridden) names and ids
+# it resolved to, and the PSGC release it was matched against. A key whose
+# region could not be mapped keeps null outputs so that it is not re-matched on
+# the next build.
+CACHE_SCHEMA = {
+    **{col: pl.Utf8 for col in LOCATION_COLS},
+    **{f"{MATCHED_PREFIX}{col}": pl.Utf8 for col in LOCATION_COLS},
+    **{col: pl.Utf8 for col in PSGC_ID_COLS},
+    **BRGY_MATCH_SCHEMA,
+    "psgc_release": pl.Utf8,
+}
+
+
+@dataclass(frozen=True)
+class MatchCache:
+    """Location match results for one PSGC release, fixes, regions, and matcher.
+
+    Attributes:
+        path: Parquet file holding the cached rows. Its metadata records the
+            hashes the rows were produced with, so both change together.
+        psgc_release: SHA-256 of the PSGC workbook (`PsgcIndex.release`).
+        fixes_hash: SHA-256 of `data/fixes.yml`.
+        regions_hash: SHA-256 of the region names file (`data/regions.yml`).
+        version: Matcher version; bump it when matching rules change.
+    """
+
+    path: Path
+    psgc_release: str
+    fixes_hash: str
+    regions_hash: str
+    version: str
+
+    def _stamp(self) -> dict[str, str]:
+        stamp = asdict(self)
+        del stamp["path"]
+        return stamp
+
+    def _read_stamp(self) -> dict[str, str] | None:
+        if not self.path.exists():
+            return None
+        stamp = pl.read_parquet_metadata(self.path).get(STAMP_KEY)
+        return None if stamp is None else json.loads(stamp)
+
+    def _read_rows(self) -> pl.DataFrame:
+        return pl.read_parquet(self.path).select(list(CACHE_SCHEMA))
+
+    def load(self) -> pl.DataFrame:
+        """Return cached rows, or an empty frame when missing or stale.
+
+        A cache written for another PSGC release (but the same fixes, regions,
+        and matcher) is kept on disk for `load_previous_release`; any other
+        mismatch discards it.
+        """
+        empty = pl.DataFrame(schema=CACHE_SCHEMA)
+        stamp = self._read_stamp()
+        if stamp is None:
+            return empty
+        if stamp == self._stamp():
+            return self._read_rows()
+
+        if {**stamp, "psgc_release": self.psgc_release} != self._stamp():
+            console.log(
+                "[yellow]PSGC match cache is stale (fixes, regions, or matcher "
+                "changed); discarding it[/yellow]"
+            )
+            self.path.unlink(missing_ok=True)
+        return empty
+
+    def load_previous_release(self) -> tuple[str, pl.DataFrame] | None:
+        """Return `(release, rows)` when the cache differs only by PSGC release."""
+        stamp = self._read_stamp()
+        if stamp is None or stamp["psgc_release"] == self.psgc_release:
+            return None
+        if {**stamp, "psgc_release": self.psgc_release} != self._stamp():
+            return None
+        return stamp["psgc_release"], self._read_rows()
+
+    def save(self, rows: pl.DataFrame) -> None:
+        """Atomically replace the cached rows together with their stamp."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        staging = self.path.with_name(f"{self.path.name}.tmp")
+        rows.select(list(CACHE_SCHEMA)).write_parquet(
+            staging, metadata={STAMP_KEY: json.dumps(self._stamp())}
+        )
+        os.replace(staging, self.path)
+        # Stamps used to live in a JSON sidecar
+        self.path.with_suffix(".json").unlink(missing_ok=True)
@@ -0,0 +1,178 @@
+"""Coordinate-based PSGC imputation for schools the name matcher cannot place."""
+
+from __future__ import annotations
+
+import polars as pl
+
+from ...spatial import QUERY_ID, SpatialIndex
+from .cache import PSGC_ID_COLS
+
+# `brgy_match_method` of imputed rows: barangay only, or municipality too
+COORDINATE_METHOD = "coordinates"
+COORDINATE_MUNI_METHOD = "coordinates_muni"
+COORDINATE_NEIGHBOURS = 5
+COORDINATE_MAX_KM = 2.0
+DISTANCE_COL = "brgy_match_distance_km"
+
+# Levels a target already knows; neighbours must agree with every known one
+_KNOWN_COLS = ["psgc_region_id", "psgc_provhuc_id", "psgc_muni_id"]
+_IMPUTED = "__imputed_"
+
+
+def impute_psgc_from_coordinates(
+    meta: pl.DataFrame,
+    coordinates: pl.DataFrame,
+    k: int = COORDINATE_NEIGHBOURS,
+    max_distance_km: float = COORDINATE_MAX_KM,
+) -> pl.DataFrame:
+    """
+    Vote barangay (and, if missing, municipality) codes from nearby schools.
+
+    Donors are schools with a name-matched `psgc_brgy_id`, one row per school.
+    Every distinct unmatched location (school and known PSGC ids) with
+    coordinates is a query. All queries go through one `SpatialIndex` radius
+    search, keeping the `k` nearest donors within `max_distance_km` that agree
+    with the ids the row already has. The municipality with the most votes
+    wins, then the barangay with the most votes inside it; ties go to the
+    nearer donor. Missing province and municipality ids are taken from the
+    winning barangay.
+
+    Args:
+        meta (pl.DataFrame): Matched school-year rows with `school_id`,
+            `PSGC_ID_COLS`, `brgy_match_method`, and `brgy_match_confidence`.
+        coordinates (pl.DataFrame): `school_id`, `longitude`, `latitude`.
+        k (int): Neighbours that vote for each school.
+        max_distance_km (float): Ignore donors farther than this.
+
+    Returns:
+        pl.DataFrame: `meta` with imputed ids filled in and
+            `brgy_match_distance_km` (distance to the nearest donor that voted
+            for the chosen barangay; null for rows not imputed). Imputed rows
+            get `brgy_match_method` `COORDINATE_METHOD`, or
+            `COORDINATE_MUNI_METHOD` when the municipality was imputed as well,
+            and the winning vote share as `brgy_match_confidence`.
+
+    >>> meta = pl.DataFrame(
+    ...     {
+    ...         "school_id": ["a", "b", "c"],
+    ...         "psgc_region_id": ["01"] * 3,
+    ...         "psgc_provhuc_id": ["0128"] * 3,
+    ...         "psgc_muni_id": ["0128001", "0128001", None],
+    ...         "psgc_brgy_id": ["0128001001", "0128001001", None],
+    ...         "brgy_match_method": ["exact", "exact", None],
+    ...         "brgy_match_confidence": [1.0, 1.0, None],
+    ...     }
+    ... )
+    >>> coordinates = pl.DataFrame(
+    ...     {
+    ...         "school_id": ["a", "b", "c"],
+    ...         "longitude": [120.60, 120.61, 120.605],
+    ...         "latitude": [18.10, 18.10, 18.10],
+    ...     }
+    ... )
+    >>> impute_psgc_from_coordinates(meta, coordinates).row(2)[3:]  # doctest: +ELLIPSIS
+    ('0128001', '0128001001', 'coordinates_muni', 1.0, 0.52...)
+    """
+    located = coordinates.select("school_id", "longitude", "latitude")
+    imputed_methods = [COORDINATE_METHOD, COORDINATE_MUNI_METHOD]
+    donors = (
+        meta.filter(
+            pl.col("psgc_brgy_id").is_not_null(),
+            ~pl.col("brgy_match_method").is_in(imputed_methods).fill_null(False),
+        )
+        .select("school_id", *PSGC_ID_COLS)
+        .unique(subset="school_id", keep="last", maintain_order=True)
+        .join(located, on="school_id", how="inner")
+        .drop("school_id")
+    )
+    targets = (
+        meta.filter(pl.col("psgc_brgy_id").is_null())
+        .select("school_id", *_KNOWN_COLS)
+        .unique(maintain_order=True)
+        .join(located, on="school_id", how="inner")
+        .with_row_index(QUERY_ID)
+    )
+    if donors.is_empty() or targets.is_empty():
+        return meta.with_columns(pl.lit(None, dtype=pl.Float64).alias(DISTANCE_COL))
+
+    known = {col: f"{col}_target" for col in _KNOWN_COLS}
+    hits = (
+        SpatialIndex.build(donors)
+        .within_radius(
+            targets.select(QUERY_ID, "longitude", "latitude"), max_distance_km
+        )
+        .join(
+            targets.select(QUERY_ID, *_KNOWN_COLS).rename(known),
+            on=QUERY_ID,
+            how="left",
+        )
+        .filter(
+            *[
+                pl.col(target).is_null() | (pl.col(target) == pl.col(col))
+                for col, target in known.items()
+            ]
+        )
+        # Already sorted by distance within each query
+        .filter(pl.int_range(pl.len()).over(QUERY_ID) < k)
+    )
+
+    muni = _top_vote(hits, [QUERY_ID, "psgc_muni_id"])
+    brgy = _top_vote(
+        hits.join(muni.select(QUERY_ID, "psgc_muni_id"), on=[QUERY_ID, "psgc_muni_id"]),
+        [QUERY_ID, *PSGC_ID_COLS],
+    )
+    neighbours = hits.group_by(QUERY_ID).agg(neighbours=pl.len())
+    imputed = (
+        targets.select(QUERY_ID, "school_id", *_KNOWN_COLS)
+        .join(
+            brgy.rename({col: f"{_IMPUTED}{col}" for col in PSGC_ID_COLS}),
+            on=QUERY_ID,
+            how="inner",
+        )
+        .join(neighbours, on=QUERY_ID, how="left")
+        .select(
+            "school_id",
+            *_KNOWN_COLS,
+            pl.lit(None, dtype=pl.Utf8).alias("psgc_brgy_id"),
+            *[pl.col(f"{_IMPUTED}{col}") for col in PSGC_ID_COLS],
+            pl.when(pl.col("psgc_muni_id").is_null())
+            .then(pl.lit(COORDINATE_MUNI_METHOD))
+            .otherwise(pl.lit(COORDINATE_METHOD))
+            .alias(f"{_IMPUTED}brgy_match_method"),
+            (pl.col("votes") / pl.col("neighbours")).alias(
+                f"{_IMPUTED}brgy_match_confidence"
+            ),
+            pl.col("distance_km").alias(DISTANCE_COL),
+        )
+    )
+
+    joined = meta.join(
+        imputed,
+        on=["school_id", *PSGC_ID_COLS],
+        how="left",
+        nulls_equal=True,
+        maintain_order="left",
+    )
+    was_imputed = pl.col(f"{_IMPUTED}psgc_brgy_id").is_not_null()
+    replaced = [*PSGC_ID_COLS, "brgy_match_method", "brgy_match_confidence"]
+    return joined.with_columns(
+        pl.when(was_imputed)
+        .then(pl.col(f"{_IMPUTED}{col}"))
+        .otherwise(pl.col(col))
+        .alias(col)
+        for col in replaced
+    ).drop(f"{_IMPUTED}{col}" for col in replaced)
+
+
+def _top_vote(hits: pl.DataFrame, keys: list[str]) -> pl.DataFrame:
+    """The value of `keys` with the most hits per query, nearest on ties."""
+    return (
+        hits.group_by(keys)
+        .agg(votes=pl.len(), distance_km=pl.col("distance_km").min())
+        .sort(
+            [QUERY_ID, "votes", "distance_km"],
+            descending=[False, True, False],
+            maintain_order=True,
+        )
+        .unique(subset=QUERY_ID, keep="first", maintain_order=True)
+    )
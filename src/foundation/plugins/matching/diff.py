@@ -0,0 +1,201 @@
+"""Differences between two PSGC releases and the match results they affect."""
+
+from __future__ import annotations
+
+import polars as pl
+
+from ...transforms.geo_names import barangay_name_expr, normalize_geo_name_expr
+from ..psgc import attach_psgc_parents
+from .cache import LOCATION_COLS, MATCHED_PREFIX, PSGC_ID_COLS
+
+CHANGE_SCHEMA = {
+    "change": pl.Utf8,
+    "geo": pl.Utf8,
+    "old_id": pl.Utf8,
+    "new_id": pl.Utf8,
+    "old_name": pl.Utf8,
+    "new_name": pl.Utf8,
+}
+
+# Changes that make a previously matched id unreliable
+OLD_ID_CHANGES = ["removed", "renamed", "recoded", "reclassified"]
+
+
+def _prepare(psgc: pl.DataFrame) -> pl.DataFrame:
+    """Normalize names and attach the normalized name of each row's parent."""
+    rows = attach_psgc_parents(
+        psgc.select(
+            id=pl.col("id").cast(pl.Utf8), name=pl.col("name"), geo=pl.col("geo")
+        )
+    ).with_columns(normalized=normalize_geo_name_expr(pl.col("name")))
+    parents = rows.select(parent_id="id", parent_normalized="normalized")
+    return rows.join(parents, on="parent_id", how="left", maintain_order="left")
+
+
+def diff_psgc(old: pl.DataFrame, new: pl.DataFrame) -> pl.DataFrame:
+    """
+    Compare two PSGC tables (`id`, `name`, `geo`) and list what changed.
+
+    Change kinds:
+        * `renamed`: same id, different name.
+        * `reclassified`: same id, different `geo` (e.g. Mun → City).
+        * `recoded`: an id that disappeared and an id that appeared with the same
+          `geo`, normalized name, and normalized parent name, paired one-to-one.
+          Leftovers are then paired on `geo` and name alone (for units whose
+          parent was re-coded too), again only when unambiguous.
+        * `removed` / `added`: ids only present in one release.
+
+    Returns:
+        pl.DataFrame: One row per change with `CHANGE_SCHEMA` columns.
+
+    >>> old = pl.DataFrame(
+    ...     {
+    ...         "id": ["0600000000", "0604500000", "0604501000"],
+    ...         "name": ["Region VI", "Negros Occidental", "Bago"],
+    ...         "geo": ["Reg", "Prov", "Mun"],
+    ...     }
+    ... )
+    >>> new = pl.DataFrame(
+    ...     {
+    ...         "id": ["0600000000", "1804500000", "1804501000"],
+    ...         "name": ["Region VI", "Negros Occidental", "City of Bago"],
+    ...         "geo": ["Reg", "Prov", "City"],
+    ...     }
+    ... )
+    >>> diff_psgc(old, new).select("change", "old_id", "new_id").rows()
+    [('recoded', '0604500000', '1804500000'), ('removed', '0604501000', None), ('added', None, '1804501000')]
+    """
+    old_rows, new_rows = _prepare(old), _prepare(new)
+
+    both = old_rows.join(new_rows, on="id", how="inner", suffix="_new")
+    renamed = both.filter(pl.col("name") != pl.col("name_new")).select(
+        change=pl.lit("renamed"),
+        geo=pl.col("geo_new"),
+        old_id="id",
+        new_id="id",
+        old_name="name",
+        new_name="name_new",
+    )
+    reclassified = both.filter(pl.col("geo").ne_missing(pl.col("geo_new"))).select(
+        change=pl.lit("reclassified"),
+        geo=pl.col("geo_new"),
+        old_id="id",
+        new_id="id",
+        old_name="name",
+        new_name="name_new",
+    )
+
+    gone = old_rows.join(new_rows, on="id", how="anti")
+    fresh = new_rows.join(old_rows, on="id", how="anti")
+
+    # Pair disappeared/appeared ids only when the pairing is unambiguous
+    recoded = pl.DataFrame(schema=CHANGE_SCHEMA)
+    for identity in (["geo", "normalized", "parent_normalized"], ["geo", "normalized"]):
+        pending_gone = gone.filter(~pl.col("id").is_in(recoded["old_id"].implode()))
+        pending_fresh = fresh.filter(~pl.col("id").is_in(recoded["new_id"].implode()))
+        pairs = (
+            pending_gone.filter(pl.len().over(identity) == 1)
+            .join(
+                pending_fresh.filter(pl.len().over(identity) == 1),
+                on=identity,
+                how="inner",
+                nulls_equal=True,
+                suffix="_new",
+            )
+            .select(
+                change=pl.lit("recoded"),
+                geo="geo",
+                old_id="id",
+                new_id="id_new",
+                old_name="name",
+                new_name="name_new",
+            )
+        )
+        recoded = pl.concat([recoded, pairs.cast(CHANGE_SCHEMA)])
+
+    removed = gone.filter(~pl.col("id").is_in(recoded["old_id"].implode())).select(
+        change=pl.lit("removed"),
+        geo="geo",
+        old_id="id",
+        new_id=pl.lit(None, dtype=pl.Utf8),
+        old_name="name",
+        new_name=pl.lit(None, dtype=pl.Utf8),
+    )
+    added = fresh.filter(~pl.col("id").is_in(recoded["new_id"].implode())).select(
+        change=pl.lit("added"),
+        geo="geo",
+        old_id=pl.lit(None, dtype=pl.Utf8),
+        new_id="id",
+        old_name=pl.lit(None, dtype=pl.Utf8),
+        new_name="name",
+    )
+
+    return pl.concat(
+        [
+            frame.cast(CHANGE_SCHEMA)
+            for frame in (renamed, reclassified, recoded, removed, added)
+        ]
+    )
+
+
+def touched_by_diff(rows: pl.DataFrame, changes: pl.DataFrame) -> pl.Series:
+    """
+    Mark the cached match rows that a PSGC diff may affect.
+
+    A row is touched when:
+        * any of its matched PSGC ids was removed, renamed, re-coded, or
+          reclassified;
+        * any of its location names (as given or as matched) normalizes to an
+          old or new name in the diff, so a new candidate could now match;
+        * its barangay is unmatched or fuzzy-matched and a barangay in its
+          municipality changed; or
+        * its region was unresolved and a region entry changed.
+
+    Args:
+        rows (pl.DataFrame): `MatchCache` rows.
+        changes (pl.DataFrame): Output of `diff_psgc`.
+
+    Returns:
+        pl.Series: Boolean mask aligned with `rows`.
+    """
+    old_ids = changes.filter(pl.col("change").is_in(OLD_ID_CHANGES))["old_id"]
+
+    names = pl.concat(
+        [changes.select(name="old_name"), changes.select(name="new_name")]
+    ).drop_nulls()
+    candidates = (
+        names.select(normalize_geo_name_expr(pl.col("name")))
+        .vstack(names.select(barangay_name_expr(pl.col("name"))))
+        .to_series()
+        .unique()
+    )
+
+    changed_brgys = changes.filter(pl.col("geo") == "Bgy")
+    brgy_munis = (
+        pl.concat([changed_brgys["old_id"], changed_brgys["new_id"]])
+        .drop_nulls()
+        .str.slice(0, 7)
+        .unique()
+    )
+    region_changed = changes.filter(pl.col("geo") == "Reg").height > 0
+
+    by_id = pl.any_horizontal(
+        pl.col(col).is_in(old_ids.implode()).fill_null(False) for col in PSGC_ID_COLS
+    )
+    # Normalize each distinct raw name once, then test rows by raw value
+    name_cols = LOCATION_COLS + [f"{MATCHED_PREFIX}{col}" for col in LOCATION_COLS]
+    raw_names = pl.concat([rows.select(name=pl.col(col)) for col in name_cols]).unique()
+    hit_names = raw_names.filter(
+        normalize_geo_name_expr(pl.col("name")).is_in(candidates.implode())
+        | barangay_name_expr(pl.col("name")).is_in(candidates.implode())
+    )["name"]
+    by_name = pl.any_horizontal(
+        pl.col(col).is_in(hit_names.implode()).fill_null(False) for col in name_cols
+    )
+    by_block = (
+        (pl.col("psgc_brgy_id").is_null() | (pl.col("brgy_match_method") == "fuzzy"))
+        & pl.col("psgc_muni_id").str.slice(0, 7).is_in(brgy_munis.implode())
+    ).fill_null(False)
+    by_region = pl.col("psgc_region_id").is_null() & pl.lit(region_changed)
+
+    return rows.select(touched=by_id | by_name | by_block | by_region)["touched"]
@@ -0,0 +1,194 @@
+"""Prebuilt PSGC lookup frames shared by every matching step."""
+
+from __future__ import annotations
+
+import os
+import shutil
+from dataclasses import dataclass, fields
+from pathlib import Path
+
+import polars as pl
+
+from ...common import console, file_sha256
+from ...transforms.geo_names import (
+    normalize_geo_name_expr,
+    normalize_region_name_expr,
+    trailing_roman_expr,
+)
+from ..psgc import CITYMUN_GEOS, attach_psgc_parents
+
+# Bump when the persisted frames or their derivation (names, parent ids) change
+PSGC_INDEX_FORMAT = 2
+
+
+@dataclass(frozen=True)
+class PsgcIndex:
+    """Lookup-ready PSGC frames for one PSGC release.
+
+    Every frame keeps the row order of the source workbook so that "first match"
+    semantics stay deterministic. Names are normalized once here so that the
+    matchers only ever join against prepared keys.
+
+    Attributes:
+        release: SHA-256 of the PSGC workbook the index was built from, or
+            `None` when built ad hoc from an in-memory frame.
+        entries: Every PSGC row with `normalized_name`, the 2/5/7-digit
+            prefixes, `is_huc`, and the parent ids from `attach_psgc_parents`
+            (`region_id`, `provhuc_id`, `muni_id`).
+        regions: `Reg` rows keyed by region-normalized `normalized`.
+        provinces: `Prov` rows keyed by (`region_prefix`, `normalized`).
+        hucs: Highly urbanized cities keyed by (`region_prefix`, `normalized`).
+        submuns: `SubMun` rows keyed by (`region_prefix`, `normalized`).
+        municipalities: `SubMun`/`City`/`Mun` rows keyed by
+            (`prov_prefix`, `normalized`).
+        barangays: `Bgy` rows keyed by (`mun_prefix`, `normalized`) where
+            `normalized` also converts trailing roman numerals.
+    """
+
+    release: str | None
+    entries: pl.DataFrame
+    regions: pl.DataFrame
+    provinces: pl.DataFrame
+    hucs: pl.DataFrame
+    submuns: pl.DataFrame
+    municipalities: pl.DataFrame
+    barangays: pl.DataFrame
+
+    @classmethod
+    def frame_names(cls) -> list[str]:
+        return [f.name for f in fields(cls) if f.name != "release"]
+
+    @classmethod
+    def from_psgc(cls, psgc: pl.DataFrame, release: str | None = None) -> PsgcIndex:
+        """Build the index from the `psgc` table produced by `set_psgc`."""
+        entries = _prepare_entries(psgc)
+        keyed = ["id", "normalized", "region_prefix"]
+        named = entries.rename({"normalized_name": "normalized"})
+
+        regions = entries.filter(pl.col("geo") == "Reg").select(
+            "id", normalized=normalize_region_name_expr(pl.col("name"))
+        )
+        provinces = named.filter(pl.col("geo").str.to_lowercase() == "prov").select(
+            keyed
+        )
+        hucs = named.filter(pl.col("is_huc")).select(keyed)
+        submuns = named.filter(pl.col("geo") == "SubMun").select(keyed)
+        municipalities = named.filter(pl.col("geo").is_in(CITYMUN_GEOS)).select(
+            keyed + ["geo", "prov_prefix", "mun_prefix"]
+        )
+        barangays = entries.filter(pl.col("geo") == "Bgy").select(
+            "id",
+            "name",
+            "cc",
+            "geo",
+            "mun_prefix",
+            name_upper=pl.col("name").str.to_uppercase(),
+            normalized=trailing_roman_expr(pl.col("normalized_name")),
+        )
+
+        return cls(
+            release=release,
+            entries=entries,
+            regions=regions,
+            provinces=provinces,
+            hucs=hucs,
+            submuns=submuns,
+            municipalities=municipalities,
+            barangays=barangays,
+        )
+
+    def save(self, directory: Path) -> None:
+        """Persist every frame as Parquet under `directory` (atomically)."""
+        staging = directory.with_name(f"{directory.name}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        for name in self.frame_names():
+            getattr(self, name).write_parquet(staging / f"{name}.parquet")
+        (staging / "RELEASE").write_text(self.release or "")
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(staging, directory)
+
+    @classmethod
+    def load(cls, directory: Path) -> PsgcIndex:
+        """Read an index previously written by `save`."""
+        frames = {
+            name: pl.read_parquet(directory / f"{name}.parquet")
+            for name in cls.frame_names()
+        }
+        release = (directory / "RELEASE").read_text() or None
+        return cls(release=release, **frames)
+
+
+def _prepare_entries(psgc: pl.DataFrame) -> pl.DataFrame:
+    """Normalize names once and derive prefixes, HUC flags, and parent ids."""
+    entries = psgc.select(
+        id=pl.col("id").cast(pl.Utf8),
+        name=pl.col("name"),
+        geo=pl.col("geo"),
+        cc=(
+            pl.col("cc").cast(pl.Utf8)
+            if "cc" in psgc.columns
+            else pl.lit(None, dtype=pl.Utf8)
+        ),
+        city_class=(
+            pl.col("city_class").cast(pl.Utf8)
+            if "city_class" in psgc.columns
+            else pl.lit(None, dtype=pl.Utf8)
+        ),
+    ).with_columns(
+        normalized_name=normalize_geo_name_expr(pl.col("name")),
+        region_prefix=pl.col("id").str.slice(0, 2),
+        prov_prefix=pl.col("id").str.slice(0, 5),
+        mun_prefix=pl.col("id").str.slice(0, 7),
+        is_huc=pl.col("city_class")
+        .str.to_lowercase()
+        .str.contains("huc")
+        .fill_null(False),
+    )
+
+    return (
+        attach_psgc_parents(entries).rename({"prov_id": "provhuc_id"}).drop("parent_id")
+    )
+
+
+def as_psgc_index(psgc: PsgcIndex | pl.DataFrame) -> PsgcIndex:
+    """Return `psgc` unchanged if already indexed, else build an ad hoc index."""
+    if isinstance(psgc, PsgcIndex):
+        return psgc
+    return PsgcIndex.from_psgc(psgc)
+
+
+def psgc_index_dir(cache_dir: Path, release: str) -> Path:
+    """Directory holding the persisted index for one PSGC release.
+
+    Indexes saved under an older `PSGC_INDEX_FORMAT` are never reused.
+    """
+    return cache_dir / "psgc_index" / f"v{PSGC_INDEX_FORMAT}" / release
+
+
+def load_psgc_index(psgc_file: Path, psgc: pl.DataFrame, cache_dir: Path) -> PsgcIndex:
+    """Load the persisted index for `psgc_file`, building it on first use.
+
+    The index lives under
+    `<cache_dir>/psgc_index/v<PSGC_INDEX_FORMAT>/<sha256 of workbook>/`, so a
+    new PSGC release or index format produces a fresh index while older
+    releases stay reusable.
+
+    Args:
+        psgc_file (Path): PSGC workbook; its hash keys the index.
+        psgc (pl.DataFrame): The already-loaded `psgc` table for that workbook.
+        cache_dir (Path): Root directory for persisted build artifacts.
+
+    Returns:
+        PsgcIndex: Lookup frames ready for the matchers.
+    """
+    release = file_sha256(psgc_file)
+    directory = psgc_index_dir(cache_dir, release)
+    if (directory / "RELEASE").exists():
+        console.log(f"[cyan]Loading PSGC index[/cyan] {release[:12]}")
+        return PsgcIndex.load(directory)
+
+    console.log(f"[cyan]Building PSGC index[/cyan] {release[:12]}")
+    index = PsgcIndex.from_psgc(psgc, release=release)
+    index.save(directory)
+    return index
@@ -1,17 +1,226 @@
 import polars as pl
 
+from ...common import FIXES_PATH, console, file_sha256
 from ...plugin import BaseExtractor, ExtractionContext, ExtractionResult
 from ...transforms.fixes import fill_missing_psgc
 from ...transforms.normalize import get_divisions
 from ...transforms.reorder import reorganize_school_geo_df
-from .barangay import apply_barangay_corrections, attach_psgc_brgy_id
+from .barangay import (
+    BRGY_MATCH_SCHEMA,
+    apply_barangay_corrections,
+    attach_fuzzy_brgy_id,
+    attach_psgc_brgy_id,
+)
+from .cache import (
+    CACHE_SCHEMA,
+    LOCATION_COLS,
+    MATCHED_PREFIX,
+    PSGC_ID_COLS,
+    MatchCache,
+)
+from .coordinates import (
+    COORDINATE_METHOD,
+    COORDINATE_MUNI_METHOD,
+    DISTANCE_COL,
+    impute_psgc_from_coordinates,
+)
+from .diff import diff_psgc, touched_by_diff
+from .index import PsgcIndex, as_psgc_index, load_psgc_index, psgc_index_dir
 from .municipality import attach_psgc_muni_id
 from .province import attach_psgc_provhuc_codes
 from .region import attach_psgc_region_codes
+from .stats import match_metrics, summarize_matches, timed
+
+LOCATION_KEY = "__location_id"
+SOURCE_REGION = "__source_region"
+
+
+def match_psgc_locations(
+    index: PsgcIndex,
+    locations: pl.DataFrame,
+    region_names: pl.DataFrame | None = None,
+    timings: dict[str, float] | None = None,
+) -> pl.DataFrame:
+    """Run region → province/HUC → municipality → barangay matching.
+
+    Every step here depends only on `LOCATION_COLS`, so `locations` may be a
+    frame of distinct location tuples rather than one row per school-year.
+
+    Args:
+        index (PsgcIndex): Lookup frames for the PSGC release.
+        locations (pl.DataFrame): Frame holding at least `LOCATION_COLS`.
+        region_names (pl.DataFrame | None): The `region_names` table, used as
+            extra region label aliases.
+        timings (dict[str, float] | None): If given, receives the seconds spent
+            in each step, keyed by stage name.
+
+    Returns:
+        pl.DataFrame: `locations` with PSGC ids attached, rows with unmapped
+            regions removed, overrides/corrections applied to the names, and
+            `brgy_match_method` / `brgy_match_confidence` recording how each
+            barangay id was found (exact join, manual correction, or fuzzy).
+    """
+    # PSGC region matching
+    with timed(timings, "region"):
+        reg_df = attach_psgc_region_codes(
+            meta=locations, psgc=index, region_names=region_names
+        )
+
+    # PSGC province / HUC / SubMun matching
+    with timed(timings, "provhuc"):
+        prov_df = attach_psgc_provhuc_codes(meta=reg_df, psgc=index)
+
+    # PSGC municipality matching
+    with timed(timings, "muni"):
+        muni_df = attach_psgc_muni_id(meta=prov_df, psgc=index)
+
+    # PSGC barangay matching
+    with timed(timings, "brgy"):
+        brgy_df = attach_psgc_brgy_id(meta=muni_df, psgc=index)
+
+    # Manual corrections
+    with timed(timings, "corrections"):
+        corrected_df = apply_barangay_corrections(meta=brgy_df, psgc=index)
+
+    # Fuzzy fallback for barangays still unmatched
+    with timed(timings, "fuzzy"):
+        return attach_fuzzy_brgy_id(meta=corrected_df, psgc=index)
+
+
+def _match_new_locations(
+    index: PsgcIndex,
+    locations: pl.DataFrame,
+    region_names: pl.DataFrame | None = None,
+    timings: dict[str, float] | None = None,
+) -> pl.DataFrame:
+    """Match `locations` and shape the result as `MatchCache` rows.
+
+    Tuples dropped during matching are kept with null outputs so that a later
+    build recognises them as already seen.
+    """
+    matched = match_psgc_locations(
+        index=index, locations=locations, region_names=region_names, timings=timings
+    )
+    matched = matched.with_columns(
+        province=pl.col("province").str.to_titlecase()
+    ).select(
+        LOCATION_KEY,
+        *[pl.col(col).alias(f"{MATCHED_PREFIX}{col}") for col in LOCATION_COLS],
+        *[pl.col(col).cast(pl.Utf8) for col in PSGC_ID_COLS],
+        *BRGY_MATCH_SCHEMA,
+    )
+    return (
+        locations.join(matched, on=LOCATION_KEY, how="left", maintain_order="left")
+        .drop(LOCATION_KEY)
+        .with_columns(psgc_release=pl.lit(index.release, dtype=pl.Utf8))
+    )
+
+
+def _carry_over_previous_release(cache: MatchCache, index: PsgcIndex) -> pl.DataFrame:
+    """Keep cached rows from the previous PSGC release that its diff leaves alone.
+
+    The previous release's `PsgcIndex` is looked up next to the cache file
+    (both live under `CACHE_DIR`). Without it nothing can be carried over.
+    """
+    empty = pl.DataFrame(schema=CACHE_SCHEMA)
+    previous = cache.load_previous_release()
+    if previous is None:
+        return empty
+
+    release, rows = previous
+    directory = psgc_index_dir(cache.path.parent, release)
+    if not (directory / "RELEASE").exists():
+        console.log(
+            f"[yellow]No PSGC index for previous release {release[:12]}; "
+            "re-matching every location[/yellow]"
+        )
+        return empty
+
+    changes = diff_psgc(PsgcIndex.load(directory).entries, index.entries)
+    kept = rows.filter(~touched_by_diff(rows, changes))
+    console.log(
+        f"[cyan]PSGC release changed[/cyan] {release[:12]} → "
+        f"{(index.release or '')[:12]}: {changes.height} changes, "
+        f"{rows.height - kept.height} of {rows.height} cached locations to re-match"
+    )
+    return kept
+
+
+def match_psgc_locations_cached(
+    index: PsgcIndex,
+    locations: pl.DataFrame,
+    cache: MatchCache | None = None,
+    region_names: pl.DataFrame | None = None,
+    timings: dict[str, float] | None = None,
+) -> pl.DataFrame:
+    """Match distinct location tuples, reusing results persisted in `cache`.
+
+    Known tuples are looked up with a single join; only tuples absent from the
+    cache go through `match_psgc_locations`, and their results are appended to
+    the cache for the next build. When the PSGC release changed, cached rows
+    untouched by the release diff (`diff_psgc`) are carried over and only the
+    touched ones are re-matched.
+
+    Args:
+        index (PsgcIndex): Lookup frames for the PSGC release.
+        locations (pl.DataFrame): Distinct `LOCATION_COLS` tuples keyed by
+            `LOCATION_KEY`.
+        cache (MatchCache | None): Persisted results; `None` matches everything.
+        region_names (pl.DataFrame | None): Extra region label aliases.
+        timings (dict[str, float] | None): Receives per-stage seconds, with
+            cache reads and writes under `cache`.
+
+    Returns:
+        pl.DataFrame: `LOCATION_KEY`, the matched `LOCATION_COLS`, the PSGC
+            ids, the barangay match method/confidence, and `psgc_release` for
+            every tuple that survived matching.
+    """
+    with timed(timings, "cache"):
+        known = cache.load() if cache else pl.DataFrame(schema=CACHE_SCHEMA)
+        carried = False
+        if cache and known.is_empty():
+            known = _carry_over_previous_release(cache, index)
+            carried = not known.is_empty()
+
+        new = locations.join(known, on=LOCATION_COLS, how="anti", nulls_equal=True)
+    console.log(
+        f"[cyan]PSGC match cache:[/cyan] {locations.height - new.height} hits, "
+        f"{new.height} misses"
+    )
+    if new.height:
+        known = pl.concat(
+            [known, _match_new_locations(index, new, region_names, timings)]
+        )
+    if cache and (new.height or carried):
+        with timed(timings, "cache"):
+            cache.save(known)
+
+    return (
+        locations.select(LOCATION_KEY, *LOCATION_COLS)
+        .join(
+            known,
+            on=LOCATION_COLS,
+            how="inner",
+            nulls_equal=True,
+            maintain_order="left",
+        )
+        .filter(pl.col("psgc_region_id").is_not_null())
+        .select(
+            LOCATION_KEY,
+            *[pl.col(f"{MATCHED_PREFIX}{col}").alias(col) for col in LOCATION_COLS],
+            *PSGC_ID_COLS,
+            *BRGY_MATCH_SCHEMA,
+            "psgc_release",
+        )
+    )
 
 
 def match_psgc_schools(
-    psgc_df: pl.DataFrame, school_location_df: pl.DataFrame
+    psgc_df: PsgcIndex | pl.DataFrame,
+    school_location_df: pl.DataFrame,
+    cache: MatchCache | None = None,
+    region_names: pl.DataFrame | None = None,
+    coordinates: pl.DataFrame | None = None,
 ) -> pl.DataFrame:
     """
     Attach complete PSGC geographic codes (region, province/HUC, municipality,
@@ -22,11 +231,14 @@ def match_psgc_schools(
     using the official PSGC dataset.
 
     Workflow:
-        1. Load and normalize PSGC reference data.
-        2. Attach PSGC region codes to each school.
-        3. Attach PSGC province/HUC/SubMunicipality codes.
-        4. Attach PSGC municipality/city codes.
-        5. Attach PSGC barangay codes.
+        1. Resolve the prebuilt `PsgcIndex` (built on the fly for a raw frame).
+        2. Reduce the school-year rows to distinct location tuples.
+        3. Attach PSGC region, province/HUC/SubMunicipality, municipality/city,
+           and barangay codes to each tuple not already in `cache`
+           (`match_psgc_locations_cached`).
+        4. Join the matched ids back to every school-year row.
+        5. Vote the barangay of schools still unplaced from nearby matched
+           schools, if `coordinates` are given (`impute_psgc_from_coordinates`).
         6. Return a unified geocoded DataFrame.
 
     The function applies all relevant PSGC logic:
@@ -40,10 +252,10 @@ def match_psgc_schools(
         * Municipality and barangay normalization rules
 
     Args:
-        psgc_df (pl.DataFrame):
-            A DataFrame based on the PSGC Excel source file (e.g. "data/2025-10-13-psgc.xlsx").
-            The file must contain the PSGC master sheet with columns such as:
-            `id`, `name`, `geo`, `city_class`, `income_class`, etc.
+        psgc_df (PsgcIndex | pl.DataFrame):
+            The `PsgcIndex` for the PSGC release, or a DataFrame based on the PSGC
+            Excel source file (e.g. "data/2025-10-13-psgc.xlsx") with columns such
+            as `id`, `name`, `geo`, `city_class`, from which an index is built.
 
         school_location_df (pl.DataFrame):
             A DataFrame containing cleaned school location metadata.
@@ -56,6 +268,19 @@ def match_psgc_schools(
                 - school_name
             Any additional metadata columns are preserved.
 
+        cache (MatchCache | None):
+            Match results persisted by earlier builds. Only tuples missing
+            from it are matched, and the cache is updated with them.
+
+        region_names (pl.DataFrame | None):
+            The `region_names` table (regions.yml); its labels extend the
+            region alias table built from `PSGC_REGION_MAP`.
+
+        coordinates (pl.DataFrame | None):
+            One `longitude`/`latitude` pair per `school_id`. Schools left
+            without a barangay by the name matcher take the ids most common
+            among their nearest matched neighbours.
+
     Returns:
         pl.DataFrame:
             A DataFrame identical to `school_location_df` but enriched with:
@@ -67,59 +292,179 @@ def match_psgc_schools(
 
             These fields represent the official PSGC geographic codes at all
             levels of hierarchy (region → province/HUC → municipality → barangay).
+            `brgy_match_method` ("exact", "correction", "fuzzy", "sga",
+            "coordinates", "coordinates_muni") and `brgy_match_confidence`
+            describe how `psgc_brgy_id` was assigned,
+            `brgy_match_distance_km` is the distance to the nearest voting
+            neighbour for coordinate matches, and
+            `psgc_release` is the SHA-256 of the PSGC workbook each row was
+            matched against (null for an ad hoc index).
     """
-    # PSGC region matching
-    reg_df = attach_psgc_region_codes(meta=school_location_df, psgc=psgc_df)
+    matched, _, _ = match_psgc_schools_with_stats(
+        psgc_df=psgc_df,
+        school_location_df=school_location_df,
+        cache=cache,
+        region_names=region_names,
+        coordinates=coordinates,
+    )
+    return matched
 
-    # PSGC province / HUC / SubMun matching
-    prov_df = attach_psgc_provhuc_codes(meta=reg_df, psgc=psgc_df)
 
-    # PSGC municipality matching
-    muni_df = attach_psgc_muni_id(meta=prov_df, psgc=psgc_df)
+def match_psgc_schools_with_stats(
+    psgc_df: PsgcIndex | pl.DataFrame,
+    school_location_df: pl.DataFrame,
+    cache: MatchCache | None = None,
+    region_names: pl.DataFrame | None = None,
+    coordinates: pl.DataFrame | None = None,
+) -> tuple[pl.DataFrame, pl.DataFrame, dict[str, object]]:
+    """
+    `match_psgc_schools`, plus a match-quality report and metrics.
 
-    # PSGC barangay matching
-    brgy_df = attach_psgc_brgy_id(meta=muni_df, psgc=psgc_df)
+    Returns:
+        tuple[pl.DataFrame, pl.DataFrame, dict[str, object]]: The geocoded
+            frame, the `match_stats` table (`summarize_matches`: matched,
+            unmatched, and dropped school-year rows per school year, source
+            region label, and level), and metrics with the totals per level
+            and the seconds spent in each stage.
+    """
+    timings: dict[str, float] = {}
+    index = as_psgc_index(psgc_df)
 
-    # Manual corrections
-    manually_corrected_df = apply_barangay_corrections(meta=brgy_df, psgc=psgc_df)
+    # The same location repeats for every school year, so match each once
+    locations = (
+        school_location_df.select(LOCATION_COLS)
+        .unique(maintain_order=True)
+        .with_row_index(LOCATION_KEY)
+    )
+    console.log(
+        f"[cyan]Matching {locations.height} distinct locations "
+        f"for {school_location_df.height} school-year rows...[/cyan]"
+    )
+    matched = match_psgc_locations_cached(
+        index=index,
+        locations=locations,
+        cache=cache,
+        region_names=region_names,
+        timings=timings,
+    )
 
-    df = fill_missing_psgc(meta_df=manually_corrected_df, psgc_df=psgc_df)
+    # Matched tuples always carry a region id, so a null one marks a dropped row
+    with timed(timings, "join_back"):
+        joined = (
+            school_location_df.with_columns(pl.col("region").alias(SOURCE_REGION))
+            .join(
+                locations,
+                on=LOCATION_COLS,
+                how="left",
+                nulls_equal=True,
+                maintain_order="left",
+            )
+            .drop(LOCATION_COLS)
+            .join(matched, on=LOCATION_KEY, how="left", maintain_order="left")
+            .drop(LOCATION_KEY)
+        )
+        dropped = pl.col("psgc_region_id").is_null()
+        df = joined.filter(~dropped)
 
-    df = df.with_columns(
-        province=pl.col("province").map_elements(
-            lambda x: x.title() if x else x, return_dtype=pl.Utf8
+    # Keyed by school_id (not location), so it runs on the school-year rows
+    with timed(timings, "fill_missing"):
+        df = fill_missing_psgc(meta_df=df, psgc_df=index.barangays)
+        filled = (
+            pl.col("brgy_match_method").is_null() & pl.col("psgc_brgy_id").is_not_null()
+        )
+        df = df.with_columns(
+            brgy_match_method=pl.when(filled)
+            .then(pl.lit("sga"))
+            .otherwise(pl.col("brgy_match_method")),
+            brgy_match_confidence=pl.when(filled)
+            .then(pl.lit(1.0))
+            .otherwise(pl.col("brgy_match_confidence")),
         )
-    )
 
-    division_lookup = get_divisions(df)
+    with timed(timings, "coordinates"):
+        if coordinates is None:
+            df = df.with_columns(pl.lit(None, dtype=pl.Float64).alias(DISTANCE_COL))
+        else:
+            df = impute_psgc_from_coordinates(meta=df, coordinates=coordinates)
 
-    df = df.join(
-        division_lookup.select(["psgc_region_id", "division", "division_id"]),
-        on=["psgc_region_id", "division"],
-        how="left",
-    )
+    with timed(timings, "stats"):
+        stats_cols = [
+            pl.col("school_year"),
+            pl.col(SOURCE_REGION).alias("region"),
+            *PSGC_ID_COLS,
+        ]
+        stats = summarize_matches(
+            pl.concat(
+                [
+                    df.select(*stats_cols, dropped=pl.lit(False)),
+                    joined.filter(dropped).select(*stats_cols, dropped=pl.lit(True)),
+                ]
+            )
+        )
+        df = df.drop(SOURCE_REGION)
 
-    # Reordered
-    reordered_df = reorganize_school_geo_df(df=df)
+    with timed(timings, "divisions"):
+        division_lookup = get_divisions(df)
 
-    return reordered_df
+        df = df.join(
+            division_lookup.select(["psgc_region_id", "division", "division_id"]),
+            on=["psgc_region_id", "division"],
+            how="left",
+        )
+
+        # Reordered
+        reordered_df = reorganize_school_geo_df(df=df)
+
+    metrics = match_metrics(stats, timings)
+    method = pl.col("brgy_match_method")
+    metrics["meta_psgc_brgy_imputed"] = df.filter(
+        method.is_in([COORDINATE_METHOD, COORDINATE_MUNI_METHOD])
+    ).height
+    metrics["meta_psgc_muni_imputed"] = df.filter(
+        method == COORDINATE_MUNI_METHOD
+    ).height
+    console.log(
+        f"[cyan]PSGC match stats:[/cyan] {metrics['meta_psgc_input_rows']} rows, "
+        f"{metrics['meta_psgc_dropped_rows']} dropped, "
+        f"{metrics['meta_psgc_brgy_unmatched']} without barangay"
+    )
+    return reordered_df, stats, metrics
 
 
 class PsgcMatchingExtractor(BaseExtractor):
     """Expose the PSGC matching flow as a plugin."""
 
     name = "meta_psgc"
-    depends_on = ["psgc", "school_year_meta"]
-    outputs = ["meta_psgc"]
+    version = "0.3.0"
+    depends_on = ["psgc", "school_year_meta", "region_names", "geo_coordinates"]
+    outputs = ["meta_psgc", "match_stats"]
 
     def extract(
         self,
         context: ExtractionContext,
         dependencies: dict[str, pl.DataFrame],
     ) -> ExtractionResult:
-        del context
-        matched = match_psgc_schools(
-            psgc_df=dependencies["psgc"],
+        index = load_psgc_index(
+            psgc_file=context.paths.psgc_file,
+            psgc=dependencies["psgc"],
+            cache_dir=context.paths.cache_dir,
+        )
+        cache = None
+        if index.release:
+            cache = MatchCache(
+                path=context.paths.cache_dir / "psgc_matches.parquet",
+                psgc_release=index.release,
+                fixes_hash=file_sha256(FIXES_PATH),
+                regions_hash=file_sha256(context.paths.region_names_file),
+                version=self.version,
+            )
+        matched, stats, metrics = match_psgc_schools_with_stats(
+            psgc_df=index,
             school_location_df=dependencies["school_year_meta"],
+            cache=cache,
+            region_names=dependencies["region_names"],
+            coordinates=dependencies["geo_coordinates"],
+        )
+        return ExtractionResult(
+            tables={"meta_psgc": matched, "match_stats": stats}, metrics=metrics
         )
-        return ExtractionResult(tables={"meta_psgc": matched})
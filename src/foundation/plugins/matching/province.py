@@ -1,147 +1,16 @@
 import polars as pl
 
-from ...common import console, normalize_geo_name
-
-
-def prepare_psgc(psgc: pl.DataFrame) -> pl.DataFrame:
-    """Normalize PSGC and extract prefixes."""
-    df = psgc.with_columns(
-        id=pl.col("id").cast(pl.Utf8),
-        normalized_name=pl.col("name").map_elements(
-            normalize_geo_name, return_dtype=pl.Utf8
-        ),
-        region_prefix=pl.col("id").cast(pl.Utf8).str.slice(0, 2),
-        prov_prefix=pl.col("id").cast(pl.Utf8).str.slice(0, 5),
-        mun_prefix=pl.col("id").cast(pl.Utf8).str.slice(0, 7),
-    )
-    return df
-
-
-def build_region_maps(psgc_prepped: pl.DataFrame) -> dict:
-    """
-    Build HUC, SubMun, Province, Municipality maps per region_prefix.
-    Returns { region_prefix: { huc, submun, prov, mun } }
-    """
-
-    region_maps = {}
-
-    for region_prefix, grp in psgc_prepped.group_by("region_prefix"):
-        region_prefix = region_prefix[0]
-        # HUC rows
-        if "city_class" in grp.columns:
-            is_huc = grp.filter(
-                pl.col("city_class")
-                .cast(pl.Utf8)
-                .str.to_lowercase()
-                .str.contains("huc")
-            )
-            huc_df = is_huc.select(["normalized_name", "id"]).rename(
-                {"normalized_name": "normalized", "id": "huc_id"}
-            )
-        else:
-            huc_df = pl.DataFrame(schema={"normalized": pl.Utf8, "huc_id": pl.Utf8})
-
-        # SubMun rows
-        submun_df = (
-            grp.filter(pl.col("geo") == "SubMun")
-            .select(["normalized_name", "id"])
-            .rename({"normalized_name": "normalized", "id": "submun_id"})
-        )
-
-        # Province rows
-        prov_df = (
-            grp.filter(pl.col("geo").str.to_lowercase() == "prov")
-            .select(["normalized_name", "id"])
-            .rename({"normalized_name": "normalized", "id": "prov_id"})
-        )
-
-        # Municipality rows
-        mun_df = (
-            grp.filter(pl.col("geo").is_in(["City", "Mun"]))
-            .select(["normalized_name", "id"])
-            .rename({"normalized_name": "normalized", "id": "mun_id"})
-        )
-
-        region_maps[region_prefix] = {
-            "huc": huc_df,
-            "submun": submun_df,
-            "prov": prov_df,
-            "mun": mun_df,
-        }
-
-    return region_maps
-
-
-def build_global_lookups(
-    region_maps: dict,
-) -> tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame, pl.DataFrame]:
-    """
-    Combine all region-maps into global lookup tables for merging.
-    Returns: huc_lookup, submun_lookup, prov_lookup, mun_lookup
-    """
-
-    huc_parts, submun_parts, prov_parts, mun_parts = [], [], [], []
-
-    for rp, maps in region_maps.items():
-        for key, target_list, idcol in [
-            ("huc", huc_parts, "huc_id"),
-            ("submun", submun_parts, "submun_id"),
-            ("prov", prov_parts, "prov_id"),
-            ("mun", mun_parts, "mun_id"),
-        ]:
-            df = maps[key]
-            if df.height == 0:
-                continue
-            temp = df.with_columns(region_prefix=pl.lit(str(rp)))
-            target_list.append(temp)
-
-    # concat global tables
-    huc_lookup = (
-        pl.concat(huc_parts)
-        if huc_parts
-        else pl.DataFrame(
-            schema={"normalized": pl.Utf8, "huc_id": pl.Utf8, "region_prefix": pl.Utf8}
-        )
-    )
-    submun_lookup = (
-        pl.concat(submun_parts)
-        if submun_parts
-        else pl.DataFrame(
-            schema={
-                "normalized": pl.Utf8,
-                "submun_id": pl.Utf8,
-                "region_prefix": pl.Utf8,
-            }
-        )
-    )
-    prov_lookup = (
-        pl.concat(prov_parts)
-        if prov_parts
-        else pl.DataFrame(
-            schema={"normalized": pl.Utf8, "prov_id": pl.Utf8, "region_prefix": pl.Utf8}
-        )
-    )
-    mun_lookup = (
-        pl.concat(mun_parts)
-        if mun_parts
-        else pl.DataFrame(
-            schema={"normalized": pl.Utf8, "mun_id": pl.Utf8, "region_prefix": pl.Utf8}
-        )
-    )
-
-    return huc_lookup, submun_lookup, prov_lookup, mun_lookup
+from ...common import console
+from ...transforms.geo_names import normalize_geo_name_expr
+from .index import PsgcIndex, as_psgc_index
 
 
 def normalize_meta_for_provhuc(meta: pl.DataFrame) -> pl.DataFrame:
     """Normalize province & municipality for prov/huc matching."""
     meta = meta.with_columns(
         region_prefix=pl.col("psgc_region_id").cast(pl.Utf8).str.slice(0, 2),
-        normalized_province=pl.col("province").map_elements(
-            normalize_geo_name, return_dtype=pl.Utf8
-        ),
-        normalized_municipality=pl.col("municipality").map_elements(
-            normalize_geo_name, return_dtype=pl.Utf8
-        ),
+        normalized_province=normalize_geo_name_expr(pl.col("province")),
+        normalized_municipality=normalize_geo_name_expr(pl.col("municipality")),
     )
     return meta
 
@@ -211,7 +80,9 @@ def merge_and_resolve_provhuc(
     return meta
 
 
-def attach_psgc_provhuc_codes(meta: pl.DataFrame, psgc: pl.DataFrame) -> pl.DataFrame:
+def attach_psgc_provhuc_codes(
+    meta: pl.DataFrame, psgc: PsgcIndex | pl.DataFrame
+) -> pl.DataFrame:
     """
     Full optimized, region-aware, priority-respecting PSGC Prov/HUC mapping
     with post-processing overrides for:
@@ -228,27 +99,25 @@ def attach_psgc_provhuc_codes(meta: pl.DataFrame, psgc: pl.DataFrame) -> pl.Data
     meta = normalize_meta_for_provhuc(meta)
 
     # -------------------------------------------
-    # Step 2 — Preprocess PSGC
+    # Step 2 — Region-keyed lookup tables from the PSGC index
     # -------------------------------------------
-    psgc_prep = prepare_psgc(psgc)
-
-    # Step 3 — Build region maps
-    region_maps = build_region_maps(psgc_prep)
-
-    # Step 4 — Build global lookup tables
-    huc_lookup, submun_lookup, prov_lookup, mun_lookup = build_global_lookups(
-        region_maps
-    )
+    index = as_psgc_index(psgc)
+    huc_lookup = index.hucs.rename({"id": "huc_id"})
+    submun_lookup = index.submuns.rename({"id": "submun_id"})
+    prov_lookup = index.provinces.rename({"id": "prov_id"})
+    mun_lookup = index.municipalities.filter(
+        pl.col("geo").is_in(["City", "Mun"])
+    ).select("normalized", "region_prefix", mun_id=pl.col("id"))
 
     # -------------------------------------------
-    # Step 5 — PSGC matching (normal behavior)
+    # Step 3 — PSGC matching (normal behavior)
     # -------------------------------------------
     meta = merge_and_resolve_provhuc(
         meta, huc_lookup, submun_lookup, prov_lookup, mun_lookup
     )
 
     # ===========================================
-    # Step 6 — APPLY SPECIAL OVERRIDES (AFTER MAPPING)
+    # Step 4 — APPLY SPECIAL OVERRIDES (AFTER MAPPING)
     # ===========================================
 
     # ----------------------
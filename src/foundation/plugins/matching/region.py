@@ -1,68 +1,136 @@
 import polars as pl
 
-from ...common import PSGC_REGION_MAP, console, normalize_region_name
+from ...common import PSGC_REGION_MAP, console
+from ...transforms.geo_names import normalize_region_name_expr
+from .index import PsgcIndex, as_psgc_index
 
+# `region_names` columns usable as aliases. `roman` is left out: regions.yml
+# numbers NCR/CAR/NIR/BARMM with non-PSGC numerals (e.g. NCR as "IV").
+REGION_NAME_ALIAS_COLS = ["location", "common", "num", "other"]
 
-def map_psgc_region(region_name: str, psgc_map: dict) -> str | None:
-    norm = normalize_region_name(region_name)
-    alias = PSGC_REGION_MAP.get(norm, norm)  # use alias if exists
-    if alias is None:
-        return None  # intentionally ignored (e.g., PSO)
-    return psgc_map.get(alias)
 
+def build_region_aliases(
+    psgc: PsgcIndex | pl.DataFrame, region_names: pl.DataFrame | None = None
+) -> pl.DataFrame:
+    """
+    Build the normalized region label → PSGC region id alias table.
+
+    Sources, first match wins:
+        1. `PSGC_REGION_MAP` (fixes.yml); a null target marks a label that is
+           intentionally excluded (e.g. PSO, ARMM).
+        2. The normalized names of the PSGC `Reg` rows themselves.
+        3. `region_names` (regions.yml) labels in `REGION_NAME_ALIAS_COLS`.
 
-def attach_psgc_region_codes(meta: pl.DataFrame, psgc: pl.DataFrame) -> pl.DataFrame:
+    Returns:
+        pl.DataFrame: `alias`, `psgc_region_id` (null when unresolvable), and
+            `excluded` (True for intentional exclusions).
+    """
+    regions = as_psgc_index(psgc).regions
+
+    fixes = pl.DataFrame(
+        {
+            "alias": list(PSGC_REGION_MAP.keys()),
+            "target": list(PSGC_REGION_MAP.values()),
+        },
+        schema={"alias": pl.Utf8, "target": pl.Utf8},
+    )
+    from_fixes = fixes.join(
+        regions, left_on="target", right_on="normalized", how="left"
+    ).select(
+        "alias",
+        psgc_region_id=pl.col("id"),
+        excluded=pl.col("target").is_null(),
+    )
+    from_psgc = regions.select(
+        alias=pl.col("normalized"), psgc_region_id=pl.col("id"), excluded=pl.lit(False)
+    )
+
+    sources = [from_fixes, from_psgc]
+    if region_names is not None:
+        label_cols = [c for c in REGION_NAME_ALIAS_COLS if c in region_names.columns]
+        sources.append(
+            region_names.unpivot(
+                index="psgc_region_id", on=label_cols, value_name="label"
+            )
+            .select(
+                alias=normalize_region_name_expr(pl.col("label").cast(pl.Utf8)),
+                psgc_region_id=pl.col("psgc_region_id").cast(pl.Utf8),
+                excluded=pl.lit(False),
+            )
+            .filter(pl.col("alias").str.len_chars() > 0)
+        )
+
+    return pl.concat(sources).unique(subset="alias", keep="first", maintain_order=True)
+
+
+def attach_psgc_region_codes(
+    meta: pl.DataFrame,
+    psgc: PsgcIndex | pl.DataFrame,
+    region_names: pl.DataFrame | None = None,
+) -> pl.DataFrame:
     """
     Attach PSGC region codes to a school metadata DataFrame.
     Only PSGC entries where geo == 'Reg' are allowed as region matches.
+
+    The distinct region labels are normalized once and resolved against
+    `build_region_aliases`; the result is attached with a single join. Labels
+    that resolve to nothing (and are not intentionally excluded) are reported.
     """
 
     console.log("[cyan]Attaching PSGC region codes...[/cyan]")
 
-    # ---------------------------------------------------------
-    # 1. Filter PSGC to REGION rows only
-    # ---------------------------------------------------------
-    psgc_regions = psgc.filter(pl.col("geo") == "Reg")
+    aliases = build_region_aliases(psgc, region_names)
 
     # ---------------------------------------------------------
-    # 2. Normalize PSGC region names
+    # 1. Resolve each distinct region label once
     # ---------------------------------------------------------
-    psgc_regions = psgc_regions.with_columns(
-        normalized=pl.col("name").map_elements(
-            normalize_region_name, return_dtype=pl.Utf8
+    labels = (
+        meta.group_by("region", maintain_order=True)
+        .len("rows")
+        .with_columns(normalized_region=normalize_region_name_expr(pl.col("region")))
+        .join(
+            aliases,
+            left_on="normalized_region",
+            right_on="alias",
+            how="left",
+            maintain_order="left",
         )
     )
 
-    # Build lookup: normalized PSGC region name → PSGC ID
-    psgc_map = dict(
-        zip(psgc_regions["normalized"].to_list(), psgc_regions["id"].to_list())
+    unresolved = labels.filter(
+        pl.col("psgc_region_id").is_null() & ~pl.col("excluded").fill_null(False)
     )
-
-    # ---------------------------------------------------------
-    # 3. Normalize school metadata region names
-    # ---------------------------------------------------------
-    meta = meta.with_columns(
-        normalized_region=pl.col("region").map_elements(
-            normalize_region_name, return_dtype=pl.Utf8
+    if unresolved.height:
+        listed = ", ".join(
+            f"{label!r} ({rows})"
+            for label, rows in unresolved.select("region", "rows").iter_rows()
+        )
+        console.log(
+            f"[yellow]Unresolved region labels (rows dropped):[/yellow] {listed}"
         )
-    )
 
     # ---------------------------------------------------------
-    # 4. Map school → PSGC region ID (using alias table)
+    # 2. Attach psgc_region_id in one join
     # ---------------------------------------------------------
-    meta = meta.with_columns(
-        psgc_region_id=pl.col("normalized_region").map_elements(
-            lambda r: map_psgc_region(r, psgc_map), return_dtype=pl.Utf8
-        )
+    meta = meta.join(
+        labels.select("region", "normalized_region", "psgc_region_id"),
+        on="region",
+        how="left",
+        nulls_equal=True,
+        maintain_order="left",
     )
 
     # Remove schools with unmapped region (e.g., PSO or ARMM if intentionally excluded)
     meta = meta.filter(pl.col("psgc_region_id").is_not_null())
 
     # ---------------------------------------------------------
-    # 5. Reorder columns for clarity
+    # 3. Reorder columns for clarity
     # ---------------------------------------------------------
-    priority = ["region", "psgc_region_id", "school_id", "school_name"]
+    priority = [
+        c
+        for c in ["region", "psgc_region_id", "school_id", "school_name"]
+        if c in meta.columns
+    ]
     remaining = [c for c in meta.columns if c not in priority]
 
     return meta.select(priority + remaining)
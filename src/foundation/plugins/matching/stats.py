@@ -0,0 +1,123 @@
+"""Match-quality counts and stage timings for the PSGC matching flow."""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import polars as pl
+
+# Hierarchy level → id column whose presence counts as matched
+MATCH_LEVELS = {
+    "region": "psgc_region_id",
+    "provhuc": "psgc_provhuc_id",
+    "muni": "psgc_muni_id",
+    "brgy": "psgc_brgy_id",
+}
+
+STATS_KEYS = ["school_year", "region"]
+
+MATCH_STATS_SCHEMA = {
+    "school_year": pl.Utf8,
+    "region": pl.Utf8,
+    "level": pl.Utf8,
+    "total": pl.Int64,
+    "matched": pl.Int64,
+    "unmatched": pl.Int64,
+    "dropped": pl.Int64,
+}
+
+
+@contextmanager
+def timed(timings: dict[str, float] | None, stage: str) -> Iterator[None]:
+    """Add the wall time of the enclosed block to `timings[stage]`, if given."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+
+def summarize_matches(rows: pl.DataFrame) -> pl.DataFrame:
+    """
+    Count matched, unmatched, and dropped school-year rows per level.
+
+    `rows` holds one row per input school-year with `STATS_KEYS`, the
+    `MATCH_LEVELS` id columns, and a boolean `dropped` marking rows that do
+    not reach `meta_psgc`. Every count comes from a single `group_by` over
+    the null masks. One `select` per level then renames that level's counts
+    to `matched`/`unmatched`, and the per-level frames are concatenated.
+
+    Returns:
+        pl.DataFrame: `MATCH_STATS_SCHEMA` rows, sorted by the keys and level.
+
+    >>> rows = pl.DataFrame(
+    ...     {
+    ...         "school_year": ["2023-2024"] * 3,
+    ...         "region": ["Region I"] * 3,
+    ...         "psgc_region_id": ["0100000000", "0100000000", None],
+    ...         "psgc_provhuc_id": ["0102800000", "0102800000", None],
+    ...         "psgc_muni_id": ["0102801000", "0102801000", None],
+    ...         "psgc_brgy_id": ["0102801001", None, None],
+    ...         "dropped": [False, False, True],
+    ...     }
+    ... )
+    >>> summarize_matches(rows).filter(level="brgy").select(
+    ...     "total", "matched", "unmatched", "dropped"
+    ... ).row(0)
+    (3, 1, 1, 1)
+    """
+    kept = ~pl.col("dropped")
+    counts = rows.group_by(STATS_KEYS).agg(
+        total=pl.len(),
+        dropped=pl.col("dropped").sum(),
+        **{
+            f"{level}_matched": (kept & pl.col(col).is_not_null()).sum()
+            for level, col in MATCH_LEVELS.items()
+        },
+        **{
+            f"{level}_unmatched": (kept & pl.col(col).is_null()).sum()
+            for level, col in MATCH_LEVELS.items()
+        },
+    )
+    per_level = [
+        counts.select(
+            *STATS_KEYS,
+            level=pl.lit(level),
+            total="total",
+            matched=f"{level}_matched",
+            unmatched=f"{level}_unmatched",
+            dropped="dropped",
+        )
+        for level in MATCH_LEVELS
+    ]
+    level_order = pl.Enum(list(MATCH_LEVELS))
+    return (
+        pl.concat(per_level)
+        .cast(MATCH_STATS_SCHEMA)
+        .sort(*STATS_KEYS, pl.col("level").cast(level_order), nulls_last=True)
+    )
+
+
+def match_metrics(stats: pl.DataFrame, timings: dict[str, float]) -> dict[str, object]:
+    """Flatten `summarize_matches` output and stage timings into metrics."""
+    metrics: dict[str, object] = {
+        "meta_psgc_input_rows": 0,
+        "meta_psgc_dropped_rows": 0,
+    }
+    for level in MATCH_LEVELS:
+        metrics[f"meta_psgc_{level}_matched"] = 0
+        metrics[f"meta_psgc_{level}_unmatched"] = 0
+    totals = stats.group_by("level").agg(
+        pl.col("total", "matched", "unmatched", "dropped").sum()
+    )
+    for row in totals.iter_rows(named=True):
+        metrics["meta_psgc_input_rows"] = row["total"]
+        metrics["meta_psgc_dropped_rows"] = row["dropped"]
+        metrics[f"meta_psgc_{row['level']}_matched"] = row["matched"]
+        metrics[f"meta_psgc_{row['level']}_unmatched"] = row["unmatched"]
+    for stage, seconds in timings.items():
+        metrics[f"meta_psgc_seconds_{stage}"] = round(seconds, 3)
+    return metrics
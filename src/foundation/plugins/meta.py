@@ -5,6 +5,7 @@ import polars as pl
 
 from ..common import console
 from ..plugin import BaseExtractor, ExtractionContext, ExtractionResult
+from ..snapshots import scan_csv_snapshot
 from ..transforms.location import clean_meta_location_names
 from ..transforms.school_name import clean_school_name
 
@@ -189,7 +190,7 @@ def melt_enrollment_csv(path: Path) -> pl.DataFrame:
     school_year = extract_school_year(path.name)
     console.log(f"[green]Processing file:[/green] {path.name}")
 
-    df = pl.read_csv(path)
+    df = scan_csv_snapshot(path).collect()
 
     # Add school_year column
     df = df.with_columns(pl.lit(school_year).alias("school_year"))
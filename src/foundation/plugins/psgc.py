@@ -3,17 +3,17 @@ from pathlib import Path
 import polars as pl
 
 from ..plugin import BaseExtractor, ExtractionContext, ExtractionResult
+from ..snapshots import scan_excel_snapshot
+
+PSGC_SHEET = "PSGC"
 
 
 def set_psgc(f: Path) -> pl.DataFrame:
     """Load and clean PSGC Excel data using Polars."""
     print(f"Initializing PSGC data from {f=}")
 
-    # Read Excel file using Polars (uses calamine backend)
-    df = pl.read_excel(
-        source=f,
-        sheet_name="PSGC",
-    )
+    # Parsed with calamine once, then read from the workbook's Parquet snapshot
+    df = scan_excel_snapshot(f, sheet_name=PSGC_SHEET).collect()
 
     # Select and rename columns (A:I,K = 0-8 and 10)
     columns = df.columns
@@ -75,11 +75,99 @@ def set_psgc(f: Path) -> pl.DataFrame:
     return df
 
 
+CITYMUN_GEOS = ["SubMun", "City", "Mun"]
+PARENT_COLS = ["muni_id", "prov_id", "region_id"]
+
+
+def attach_psgc_parents(df: pl.DataFrame) -> pl.DataFrame:
+    """Derive explicit ancestor ids from the PSGC code structure.
+
+    Each column holds the row's ancestor *or itself* at that level, so a rollup
+    "per province" can group by `prov_id` directly:
+
+    - `region_id`: the 2-digit region (`RR00000000`).
+    - `prov_id`: the province-level unit, i.e. the `RRPPP00000` row when it
+      exists: a province, a HUC, an NCR city, or a non-province container such
+      as City of Isabela or the BARMM Special Geographic Area. Units without one
+      (Pateros) are their own province-level unit, matching the HUC → SubMun →
+      Pateros → Prov precedence of the matchers.
+    - `muni_id`: the `RRPPPMM000` City/Mun/SubMun row, when it exists.
+    - `parent_id`: the nearest existing ancestor, excluding the row itself.
+
+    >>> df = pl.DataFrame(
+    ...     {
+    ...         "id": ["1300000000", "1381701000", "1381701001", "1380600000", "1380601000"],
+    ...         "geo": ["Reg", "Mun", "Bgy", "City", "SubMun"],
+    ...     }
+    ... )
+    >>> attach_psgc_parents(df).select("id", "prov_id", "muni_id", "parent_id").rows()
+    [('1300000000', None, None, None), ('1381701000', '1381701000', '1381701000', '1300000000'), ('1381701001', '1381701000', '1381701000', '1381701000'), ('1380600000', '1380600000', '1380600000', '1300000000'), ('1380601000', '1380600000', '1380601000', '1380600000')]
+    """
+    ids = df["id"].implode()
+    citymun_ids = df.filter(pl.col("geo").is_in(CITYMUN_GEOS))["id"].implode()
+    region = pl.col("id").str.slice(0, 2) + "00000000"
+    prov = pl.col("id").str.slice(0, 5) + "00000"
+    muni = pl.col("id").str.slice(0, 7) + "000"
+
+    df = df.with_columns(
+        region_id=region,
+        muni_id=pl.when(muni.is_in(citymun_ids)).then(muni),
+    ).with_columns(
+        prov_id=pl.when(pl.col("id") == pl.col("region_id"))
+        .then(None)
+        .when(prov.is_in(ids))
+        .then(prov)
+        .otherwise(pl.col("muni_id")),
+    )
+
+    # Nearest ancestor other than the row itself
+    ancestors = [
+        pl.when(pl.col(col) != pl.col("id")).then(pl.col(col)) for col in PARENT_COLS
+    ]
+    return df.with_columns(parent_id=pl.coalesce(ancestors)).select(
+        *[c for c in df.columns if c not in PARENT_COLS],
+        "region_id",
+        "prov_id",
+        "muni_id",
+        "parent_id",
+    )
+
+
+def build_psgc_closure(df: pl.DataFrame) -> pl.DataFrame:
+    """Ancestor/descendant pairs (including each row with itself at depth 0).
+
+    Expects the parent columns from `attach_psgc_parents`. `depth` counts the
+    distinct levels between the two ids, e.g. barangay → region is 3.
+
+    >>> psgc = attach_psgc_parents(
+    ...     pl.DataFrame(
+    ...         {
+    ...             "id": ["0100000000", "0102800000", "0102801000", "0102801001"],
+    ...             "geo": ["Reg", "Prov", "Mun", "Bgy"],
+    ...         }
+    ...     )
+    ... )
+    >>> build_psgc_closure(psgc).filter(pl.col("descendant_id") == "0102801001").rows()
+    [('0102801001', '0102801001', 0), ('0102801000', '0102801001', 1), ('0102800000', '0102801001', 2), ('0100000000', '0102801001', 3)]
+    """
+    return (
+        df.select(
+            descendant_id="id",
+            ancestor_id=pl.concat_list(["id", *PARENT_COLS])
+            .list.drop_nulls()
+            .list.unique(maintain_order=True),
+        )
+        .with_columns(depth=pl.int_ranges(pl.col("ancestor_id").list.len()))
+        .explode(["ancestor_id", "depth"])
+        .select("ancestor_id", "descendant_id", pl.col("depth").cast(pl.Int64))
+    )
+
+
 class PsgcExtractor(BaseExtractor):
     """PSGC loader that conforms to the extractor interface."""
 
     name = "psgc"
-    outputs = ["psgc"]
+    outputs = ["psgc", "psgc_closure"]
     schema_name = "psgc"
 
     def extract(
@@ -88,5 +176,7 @@ class PsgcExtractor(BaseExtractor):
         dependencies: dict[str, pl.DataFrame],
     ) -> ExtractionResult:
         del dependencies
-        df = set_psgc(f=context.paths.psgc_file)
-        return ExtractionResult(tables={"psgc": df})
+        df = attach_psgc_parents(set_psgc(f=context.paths.psgc_file))
+        return ExtractionResult(
+            tables={"psgc": df, "psgc_closure": build_psgc_closure(df)}
+        )
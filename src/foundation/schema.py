@@ -59,6 +59,20 @@ PSGC_SCHEMA = TableSchema(
         ColumnDef("urban_rural", pl.Utf8),
         ColumnDef("2024_pop", pl.Utf8),
         ColumnDef("status", pl.Utf8),
+        ColumnDef("region_id", pl.Utf8),
+        ColumnDef("prov_id", pl.Utf8),
+        ColumnDef("muni_id", pl.Utf8),
+        ColumnDef("parent_id", pl.Utf8),
+    ],
+)
+
+PSGC_CLOSURE_SCHEMA = TableSchema(
+    name="psgc_closure",
+    primary_key=["ancestor_id", "descendant_id"],
+    columns=[
+        ColumnDef("ancestor_id", pl.Utf8, nullable=False),
+        ColumnDef("descendant_id", pl.Utf8, nullable=False),
+        ColumnDef("depth", pl.Int64, nullable=False),
     ],
 )
 
@@ -123,12 +137,43 @@ META_PSGC_SCHEMA = TableSchema(
         ColumnDef("province", pl.Utf8),
         ColumnDef("municipality", pl.Utf8),
         ColumnDef("barangay", pl.Utf8),
+        ColumnDef("brgy_match_method", pl.Utf8),
+        ColumnDef("brgy_match_confidence", pl.Float64),
+        ColumnDef("brgy_match_distance_km", pl.Float64),
+        ColumnDef("psgc_release", pl.Utf8),
+    ],
+)
+
+MATCH_STATS_SCHEMA = TableSchema(
+    name="match_stats",
+    primary_key=["school_year", "region", "level"],
+    columns=[
+        ColumnDef("school_year", pl.Utf8, nullable=False),
+        ColumnDef("region", pl.Utf8),
+        ColumnDef("level", pl.Utf8, nullable=False),
+        ColumnDef("total", pl.Int64, nullable=False),
+        ColumnDef("matched", pl.Int64, nullable=False),
+        ColumnDef("unmatched", pl.Int64, nullable=False),
+        ColumnDef("dropped", pl.Int64, nullable=False),
+    ],
+)
+
+ADDRESSES_SCHEMA = TableSchema(
+    name="addresses",
+    primary_key=["address_id"],
+    columns=[
+        ColumnDef("address_id", pl.Int64, nullable=False),
+        ColumnDef("psgc_region_id", pl.Utf8),
+        ColumnDef("psgc_provhuc_id", pl.Utf8),
+        ColumnDef("psgc_muni_id", pl.Utf8),
+        ColumnDef("psgc_brgy_id", pl.Utf8),
+        ColumnDef("_addr_hash", pl.Int64, nullable=False),
     ],
 )
 
 ADDRESS_SCHEMA = TableSchema(
     name="address",
-    primary_key=["address_id"],
+    primary_key=["school_id", "school_year"],
     columns=[
         ColumnDef("school_id", pl.Utf8, nullable=False),
         ColumnDef("school_year", pl.Utf8, nullable=False),
@@ -145,12 +190,49 @@ GEO_SCHEMA = TableSchema(
         ColumnDef("school_year", pl.Utf8, nullable=False),
         ColumnDef("_addr_hash", pl.Int64),
         ColumnDef("address_id", pl.Int64),
-        ColumnDef("longitude", pl.Float64),
-        ColumnDef("latitude", pl.Float64),
         ColumnDef("psgc_region_id", pl.Utf8),
         ColumnDef("psgc_provhuc_id", pl.Utf8),
         ColumnDef("psgc_muni_id", pl.Utf8),
         ColumnDef("psgc_brgy_id", pl.Utf8),
+        ColumnDef("coord_outside_ph", pl.Boolean),
+        ColumnDef("coord_outside_muni", pl.Boolean),
+        ColumnDef("coord_outside_provhuc", pl.Boolean),
+    ],
+)
+
+SCHOOL_COORDINATES_SCHEMA = TableSchema(
+    name="school_coordinates",
+    primary_key=["school_id"],
+    columns=[
+        ColumnDef("school_id", pl.Utf8, nullable=False),
+        ColumnDef("longitude", pl.Float64, nullable=False),
+        ColumnDef("latitude", pl.Float64, nullable=False),
+        ColumnDef("source_file", pl.Utf8, nullable=False),
+        ColumnDef("source_date", pl.Date, nullable=True),
+    ],
+)
+
+SCHOOL_NAMES_SCHEMA = TableSchema(
+    name="school_names",
+    primary_key=["school_id"],
+    columns=[
+        ColumnDef("school_id", pl.Utf8, nullable=False),
+        ColumnDef("school_year", pl.Utf8, nullable=False),
+        ColumnDef("school_name", pl.Utf8, nullable=False),
+    ],
+)
+
+SCHOOL_ACCESS_SCHEMA = TableSchema(
+    name="school_access",
+    primary_key=["school_id", "school_year"],
+    columns=[
+        ColumnDef("school_id", pl.Utf8, nullable=False),
+        ColumnDef("school_year", pl.Utf8, nullable=False),
+        ColumnDef("nearest_jhs_km", pl.Float64),
+        ColumnDef("nearest_shs_km", pl.Float64),
+        ColumnDef("schools_within_2km", pl.Int64),
+        ColumnDef("schools_within_5km", pl.Int64),
+        ColumnDef("schools_within_10km", pl.Int64),
     ],
 )
 
@@ -204,12 +286,18 @@ DROPOUTS_SCHEMA = TableSchema(
 
 SCHEMAS = {
     "psgc": PSGC_SCHEMA,
+    "psgc_closure": PSGC_CLOSURE_SCHEMA,
     "enrollment": ENROLLMENT_SCHEMA,
     "school_year_meta": SCHOOL_YEAR_META_SCHEMA,
     "school_levels": SCHOOL_LEVEL_SCHEMA,
     "meta_psgc": META_PSGC_SCHEMA,
+    "match_stats": MATCH_STATS_SCHEMA,
     "address": ADDRESS_SCHEMA,
+    "addresses": ADDRESSES_SCHEMA,
     "geo": GEO_SCHEMA,
+    "school_coordinates": SCHOOL_COORDINATES_SCHEMA,
+    "school_names": SCHOOL_NAMES_SCHEMA,
+    "school_access": SCHOOL_ACCESS_SCHEMA,
     "region_names": REGION_NAMES_SCHEMA,
     "teachers": TEACHERS_SCHEMA,
     "dropouts": DROPOUTS_SCHEMA,
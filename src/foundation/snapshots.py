@@ -0,0 +1,152 @@
+"""Parquet snapshots of the raw source files.
+
+Every build reads the same immutable inputs: the yearly enrollment CSVs, the
+geo CSV, the PSGC workbook, and the HR and dropout workbooks. A snapshot
+converts a source to Parquet once, under
+`<CACHE_DIR>/snapshots/v{SNAPSHOTS_FORMAT}/<sha256 of the file>/`. Readers
+then scan the Parquet file, so projections and slices are pushed down. A
+rebuild with unchanged sources never runs the CSV or Excel parsers. An edited
+file has a new hash and gets a new snapshot, and older snapshots stay until
+the cache is cleared.
+
+A source holds one Parquet file per part: `csv` for a CSV file,
+`table:<sheet>` for a typed worksheet, and for `ExcelWorkbook` the
+`sheets` list and a raw cell `grid:<sheet>` per worksheet.
+
+Examples:
+    >>> snapshot_part_name("grid:ES DB")
+    'grid%3AES%20DB.parquet'
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable
+from urllib.parse import quote
+
+import polars as pl
+
+from .common import file_sha256, resolve_cache_dir
+
+SNAPSHOTS_FORMAT = 1
+CSV_PART = "csv"
+
+# Digests of files already hashed by this process, by path, size and mtime
+_DIGESTS: dict[tuple[str, int, int], str] = {}
+
+
+@dataclass(frozen=True)
+class SnapshotReport:
+    converted: int
+    reused: int
+
+
+def snapshots_dir(cache_dir: Path) -> Path:
+    """Snapshot root for the current `SNAPSHOTS_FORMAT` under `cache_dir`."""
+    return cache_dir / "snapshots" / f"v{SNAPSHOTS_FORMAT}"
+
+
+def snapshot_part_name(part: str) -> str:
+    """File name of a part; sheet names are percent-encoded."""
+    return f"{quote(part, safe='')}.parquet"
+
+
+def source_digest(path: Path) -> str:
+    """`file_sha256` of `path`, hashed once per size and modification time."""
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    if key not in _DIGESTS:
+        _DIGESTS[key] = file_sha256(path)
+    return _DIGESTS[key]
+
+
+@dataclass(frozen=True)
+class SnapshotStore:
+    """Parquet parts of source files, keyed by the SHA-256 of each file."""
+
+    root: Path
+
+    @classmethod
+    def default(cls) -> SnapshotStore:
+        """The store under the configured `CACHE_DIR`."""
+        return cls(snapshots_dir(resolve_cache_dir()))
+
+    def part_path(self, source: Path, part: str) -> Path:
+        return self.root / source_digest(source) / snapshot_part_name(part)
+
+    def ensure(
+        self, source: Path, part: str, convert: Callable[[Path], pl.DataFrame]
+    ) -> bool:
+        """Write the `part` snapshot of `source` unless it already exists.
+
+        The file is written under a temporary name and renamed, so processes
+        converting the same part at once never leave a partial file.
+
+        Args:
+            source (Path): Source file; its hash keys the snapshot.
+            part (str): Part of the source, such as `CSV_PART`.
+            convert (Callable[[Path], pl.DataFrame]): Parses `source` into
+                the part's frame; only called when the part is missing.
+
+        Returns:
+            bool: True if the part was converted, False if it was reused.
+        """
+        target = self.part_path(source, part)
+        if target.exists():
+            return False
+        df = convert(source)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        df.write_parquet(tmp)
+        os.replace(tmp, target)
+        return True
+
+    def scan(
+        self, source: Path, part: str, convert: Callable[[Path], pl.DataFrame]
+    ) -> pl.LazyFrame:
+        """Scan the `part` snapshot of `source`, converting it on first use."""
+        self.ensure(source, part, convert)
+        return pl.scan_parquet(self.part_path(source, part))
+
+
+def ensure_csv_snapshot(path: Path, store: SnapshotStore | None = None) -> bool:
+    """Convert a CSV file, typed as `pl.read_csv` infers it, unless done before."""
+    return (store or SnapshotStore.default()).ensure(path, CSV_PART, pl.read_csv)
+
+
+def scan_csv_snapshot(path: Path, store: SnapshotStore | None = None) -> pl.LazyFrame:
+    """Scan the snapshot of a CSV file (see `ensure_csv_snapshot`)."""
+    store = store or SnapshotStore.default()
+    ensure_csv_snapshot(path, store)
+    return pl.scan_parquet(store.part_path(path, CSV_PART))
+
+
+def ensure_excel_snapshot(
+    path: Path, sheet_name: str, store: SnapshotStore | None = None
+) -> bool:
+    """Convert a worksheet, typed as `pl.read_excel` infers it, unless done before.
+
+    The first row of the sheet holds the column names. The raw cell grids read
+    by `SheetSpec` are separate parts (see `ExcelWorkbook.scan_grid`).
+    """
+    return (store or SnapshotStore.default()).ensure(
+        path,
+        excel_table_part(sheet_name),
+        partial(pl.read_excel, sheet_name=sheet_name),
+    )
+
+
+def scan_excel_snapshot(
+    path: Path, sheet_name: str, store: SnapshotStore | None = None
+) -> pl.LazyFrame:
+    """Scan the snapshot of a worksheet (see `ensure_excel_snapshot`)."""
+    store = store or SnapshotStore.default()
+    ensure_excel_snapshot(path, sheet_name, store)
+    return pl.scan_parquet(store.part_path(path, excel_table_part(sheet_name)))
+
+
+def excel_table_part(sheet_name: str) -> str:
+    return f"table:{sheet_name}"
@@ -0,0 +1,302 @@
+"""Grid index over school coordinates for radius, bounding-box, and kNN queries.
+
+Points are bucketed into square cells of `cell_deg` degrees. A query expands
+into the cells its search area overlaps, joins against the points in those
+cells, and keeps exact matches by great-circle distance. Every query method
+takes a frame of many queries at once and returns a Polars frame.
+
+Query frames carry a `query_id` column plus the columns each method needs;
+results repeat `query_id` next to the matching point columns. Longitudes are
+assumed not to wrap around the antimeridian (true for the Philippines).
+
+Examples:
+    >>> points = pl.DataFrame(
+    ...     {
+    ...         "school_id": ["a", "b", "c"],
+    ...         "longitude": [121.00, 121.03, 121.50],
+    ...         "latitude": [14.60, 14.60, 14.60],
+    ...     }
+    ... )
+    >>> index = SpatialIndex.build(points)
+    >>> queries = pl.DataFrame({"query_id": [1], "longitude": [121.0], "latitude": [14.6]})
+    >>> index.within_radius(queries, radius_km=5)["school_id"].to_list()
+    ['a', 'b']
+    >>> index.nearest(queries, k=3)["school_id"].to_list()
+    ['a', 'b', 'c']
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+import polars as pl
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+DEFAULT_CELL_DEG = 0.05
+COORDINATE_COLS = ["longitude", "latitude"]
+QUERY_ID = "query_id"
+
+_CELL_COLS = ["cell_x", "cell_y"]
+# Cosine floor so that longitude spans stay finite near the poles
+_MIN_COS = math.cos(math.radians(89.0))
+
+
+def haversine_km_expr(
+    lon1: pl.Expr, lat1: pl.Expr, lon2: pl.Expr, lat2: pl.Expr
+) -> pl.Expr:
+    """Great-circle distance in kilometres between two coordinate pairs.
+
+    >>> pl.select(
+    ...     haversine_km_expr(pl.lit(121.0), pl.lit(14.0), pl.lit(121.0), pl.lit(15.0))
+    ... ).item()  # doctest: +ELLIPSIS
+    111.19...
+    """
+    dlat = (lat2 - lat1).radians()
+    dlon = (lon2 - lon1).radians()
+    a = (dlat / 2).sin() ** 2 + lat1.radians().cos() * lat2.radians().cos() * (
+        dlon / 2
+    ).sin() ** 2
+    return 2 * EARTH_RADIUS_KM * a.sqrt().arcsin()
+
+
+def spatial_index_dir(db_file: Path) -> Path:
+    """Directory holding the persisted index next to the database file."""
+    return db_file.with_name(f"{db_file.stem}.spatial")
+
+
+@dataclass(frozen=True)
+class SpatialIndex:
+    """Points bucketed into a regular longitude/latitude grid.
+
+    Attributes:
+        points: One row per point with `longitude`, `latitude`, any extra
+            attribute columns, and the integer `cell_x` / `cell_y`, sorted by
+            cell.
+        cell_deg: Cell size in degrees.
+    """
+
+    points: pl.DataFrame
+    cell_deg: float = DEFAULT_CELL_DEG
+
+    @classmethod
+    def build(
+        cls, points: pl.DataFrame, cell_deg: float = DEFAULT_CELL_DEG
+    ) -> SpatialIndex:
+        """Index every row of `points` that has both coordinates.
+
+        Args:
+            points (pl.DataFrame): `longitude`, `latitude`, and any attribute
+                columns to return with matches (e.g. `school_id`).
+            cell_deg (float): Grid cell size; about 5.5 km at the default.
+        """
+        located = points.drop_nulls(COORDINATE_COLS).with_columns(
+            pl.col(COORDINATE_COLS).cast(pl.Float64)
+        )
+        return cls(
+            points=located.with_columns(
+                _cell_expr("longitude", cell_deg).alias("cell_x"),
+                _cell_expr("latitude", cell_deg).alias("cell_y"),
+            ).sort(_CELL_COLS),
+            cell_deg=cell_deg,
+        )
+
+    def where(self, predicate: pl.Expr) -> SpatialIndex:
+        """Keep only the points matching `predicate` (e.g. `pl.col("offers_shs")`)."""
+        return SpatialIndex(
+            points=self.points.filter(predicate), cell_deg=self.cell_deg
+        )
+
+    def save(self, directory: Path) -> None:
+        """Persist the index under `directory` (atomically)."""
+        staging = directory.with_name(f"{directory.name}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        self.points.write_parquet(staging / "points.parquet")
+        (staging / "index.json").write_text(json.dumps({"cell_deg": self.cell_deg}))
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(staging, directory)
+
+    @classmethod
+    def load(cls, directory: Path) -> SpatialIndex:
+        """Read an index previously written by `save`."""
+        meta = json.loads((directory / "index.json").read_text())
+        return cls(
+            points=pl.read_parquet(directory / "points.parquet"),
+            cell_deg=meta["cell_deg"],
+        )
+
+    def within_bbox(self, boxes: pl.DataFrame) -> pl.DataFrame:
+        """Points inside each box.
+
+        Args:
+            boxes (pl.DataFrame): `query_id`, `min_lon`, `min_lat`, `max_lon`,
+                `max_lat`.
+
+        Returns:
+            pl.DataFrame: `query_id` and the matching point columns.
+        """
+        candidates = self._candidates(
+            boxes.select(QUERY_ID, "min_lon", "min_lat", "max_lon", "max_lat")
+        )
+        return candidates.filter(
+            pl.col("longitude").is_between("min_lon", "max_lon"),
+            pl.col("latitude").is_between("min_lat", "max_lat"),
+        ).select(QUERY_ID, *self._point_cols())
+
+    def within_radius(self, queries: pl.DataFrame, radius_km: float) -> pl.DataFrame:
+        """Points within `radius_km` of each query point.
+
+        Args:
+            queries (pl.DataFrame): `query_id`, `longitude`, `latitude`.
+            radius_km (float): Search radius in kilometres.
+
+        Returns:
+            pl.DataFrame: `query_id`, the matching point columns, and
+                `distance_km`, nearest first within each query.
+        """
+        return self._within(queries, pl.lit(float(radius_km)))
+
+    def nearest(
+        self, queries: pl.DataFrame, k: int = 1, max_radius_km: float | None = None
+    ) -> pl.DataFrame:
+        """The `k` nearest points to each query point.
+
+        The search radius starts at one cell and doubles for the queries that
+        have fewer than `k` points within it. Points inside a radius are found
+        exhaustively, so the result is exact. Queries still short after the
+        radius spans the whole index are compared with every point.
+
+        Args:
+            queries (pl.DataFrame): `query_id`, `longitude`, `latitude`.
+            k (int): Neighbours per query.
+            max_radius_km (float | None): Ignore points farther than this.
+
+        Returns:
+            pl.DataFrame: `query_id`, the point columns, `distance_km`, and
+                `rank` (1 = nearest).
+        """
+        pending = queries.select(QUERY_ID, *COORDINATE_COLS)
+        found: list[pl.DataFrame] = []
+        radius = self.cell_deg * KM_PER_DEGREE
+        limit = max_radius_km if max_radius_km is not None else math.inf
+        extent = self._extent_km()
+
+        while pending.height and radius < extent and radius < limit:
+            hits = self._within(pending, pl.lit(radius))
+            done = hits.group_by(QUERY_ID).len().filter(pl.col("len") >= k)
+            found.append(hits.join(done, on=QUERY_ID, how="semi"))
+            pending = pending.join(done, on=QUERY_ID, how="anti")
+            radius *= 2
+
+        if pending.height and limit < extent:
+            found.append(self._within(pending, pl.lit(float(limit))))
+        elif pending.height:
+            everything = pending.rename(
+                {col: f"{col}_query" for col in COORDINATE_COLS}
+            ).join(self.points, how="cross")
+            found.append(self._distances(everything))
+
+        columns = [QUERY_ID, *self._point_cols(), "distance_km"]
+        ranked = pl.concat([frame.select(columns) for frame in found]).sort(
+            QUERY_ID, "distance_km"
+        )
+        return ranked.with_columns(
+            rank=pl.int_range(1, pl.len() + 1).over(QUERY_ID)
+        ).filter(pl.col("rank") <= k)
+
+    def _point_cols(self) -> list[str]:
+        return [col for col in self.points.columns if col not in _CELL_COLS]
+
+    def _extent_km(self) -> float:
+        """Upper bound on the distance between any two indexed points."""
+        if self.points.is_empty():
+            return 0.0
+        bounds = self.points.select(
+            lon=pl.col("longitude").max() - pl.col("longitude").min(),
+            lat=pl.col("latitude").max() - pl.col("latitude").min(),
+        ).row(0)
+        return math.hypot(*bounds) * KM_PER_DEGREE + 2 * self.cell_deg * KM_PER_DEGREE
+
+    def _within(self, queries: pl.DataFrame, radius_km: pl.Expr) -> pl.DataFrame:
+        """Points within `radius_km` (an expression over `queries`) of each query."""
+        lat_span = radius_km / KM_PER_DEGREE
+        cos_lat = (
+            (pl.col("latitude").abs() + lat_span)
+            .clip(upper_bound=89.0)
+            .radians()
+            .cos()
+            .clip(lower_bound=_MIN_COS)
+        )
+        lon_span = lat_span / cos_lat
+        boxes = queries.select(
+            QUERY_ID,
+            *COORDINATE_COLS,
+            radius_km=radius_km,
+            min_lon=pl.col("longitude") - lon_span,
+            max_lon=pl.col("longitude") + lon_span,
+            min_lat=pl.col("latitude") - lat_span,
+            max_lat=pl.col("latitude") + lat_span,
+        )
+        candidates = self._candidates(boxes)
+        return (
+            self._distances(candidates)
+            .filter(pl.col("distance_km") <= pl.col("radius_km"))
+            .select(QUERY_ID, *self._point_cols(), "distance_km")
+            .sort(QUERY_ID, "distance_km", maintain_order=True)
+        )
+
+    def _candidates(self, boxes: pl.DataFrame) -> pl.DataFrame:
+        """Join each box with the points of every cell it overlaps.
+
+        Cell ranges are clipped to the occupied extent of the grid. Query
+        coordinate columns, if any, are suffixed with `_query`.
+        """
+        boxes = boxes.rename(
+            {col: f"{col}_query" for col in COORDINATE_COLS if col in boxes.columns}
+        )
+        if self.points.is_empty():
+            return boxes.join(self.points, how="cross")
+
+        lo_x, hi_x, lo_y, hi_y = self.points.select(
+            lo_x=pl.col("cell_x").min(),
+            hi_x=pl.col("cell_x").max(),
+            lo_y=pl.col("cell_y").min(),
+            hi_y=pl.col("cell_y").max(),
+        ).row(0)
+        cells = (
+            boxes.with_columns(
+                cell_x=pl.int_ranges(
+                    _cell_expr("min_lon", self.cell_deg).clip(lo_x, hi_x + 1),
+                    (_cell_expr("max_lon", self.cell_deg) + 1).clip(lo_x, hi_x + 1),
+                ),
+                cell_y=pl.int_ranges(
+                    _cell_expr("min_lat", self.cell_deg).clip(lo_y, hi_y + 1),
+                    (_cell_expr("max_lat", self.cell_deg) + 1).clip(lo_y, hi_y + 1),
+                ),
+            )
+            .explode("cell_x")
+            .explode("cell_y")
+            .drop_nulls(_CELL_COLS)
+        )
+        return cells.join(self.points, on=_CELL_COLS, how="inner")
+
+    @staticmethod
+    def _distances(frame: pl.DataFrame) -> pl.DataFrame:
+        return frame.with_columns(
+            distance_km=haversine_km_expr(
+                pl.col("longitude_query"),
+                pl.col("latitude_query"),
+                pl.col("longitude"),
+                pl.col("latitude"),
+            )
+        )
+
+
+def _cell_expr(col: str, cell_deg: float) -> pl.Expr:
+    return (pl.col(col) / cell_deg).floor().cast(pl.Int64)
@@ -0,0 +1,303 @@
+"""Static GeoJSON tiles of school points for map front ends.
+
+Schools are bucketed into Web Mercator `z/x/y` tiles. From `cluster_below`
+upward each school is its own feature. Lower zooms hold one clustered
+aggregate per `CLUSTER_GRID` × `CLUSTER_GRID` cell of a tile. Feature JSON
+is built with Polars string expressions, so Python only writes the files,
+spread over a process pool.
+
+A `manifest.json` in the output directory records a digest of every tile.
+Later exports rewrite only tiles whose content changed, and delete tiles
+that no longer have schools.
+
+Examples:
+    >>> points = pl.DataFrame(
+    ...     {
+    ...         "school_id": ["a"],
+    ...         "name": ["A"],
+    ...         "longitude": [121.0],
+    ...         "latitude": [14.6],
+    ...         "es": [True],
+    ...         "jhs": [False],
+    ...         "shs": [False],
+    ...         "enrollment": [120],
+    ...     }
+    ... )
+    >>> render_tiles(points, TileSettings(min_zoom=12, max_zoom=12))["tile"].to_list()
+    ['12/3424/1880']
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import polars as pl
+from sqlite_utils import Database
+
+TILES_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+# Cluster cells per tile side at clustered zoom levels
+CLUSTER_GRID = 8
+# Web Mercator latitude limit
+MAX_LATITUDE = 85.05112878
+LEVEL_FLAGS = ["es", "jhs", "shs"]
+POINT_COLS = ["school_id", "name", "longitude", "latitude", *LEVEL_FLAGS, "enrollment"]
+
+_FEATURE = (
+    '{"type":"Feature","geometry":{"type":"Point","coordinates":[{},{}]},'
+    '"properties":{}}'
+)
+_COLLECTION = '{"type":"FeatureCollection","features":[{}]}'
+
+
+@dataclass(frozen=True)
+class TileSettings:
+    """Zoom range of an export.
+
+    Attributes:
+        min_zoom: Lowest zoom level written.
+        max_zoom: Highest zoom level written.
+        cluster_below: Zoom levels below this hold clusters, not schools.
+    """
+
+    min_zoom: int = 5
+    max_zoom: int = 12
+    cluster_below: int = 10
+
+
+@dataclass(frozen=True)
+class TileExport:
+    written: int
+    unchanged: int
+    removed: int
+
+
+def tiles_dir(db_file: Path) -> Path:
+    """Default output directory next to the database file."""
+    return db_file.with_name(f"{db_file.stem}.tiles")
+
+
+def load_school_points(db: Database) -> pl.DataFrame:
+    """One row per located school with its latest name, levels, and enrollment.
+
+    Each attribute comes from the latest school year that has it: the name
+    from `school_names`, the offered levels from `school_levels`, and the total
+    `num_students` from `enroll`.
+
+    Returns:
+        pl.DataFrame: `POINT_COLS`.
+    """
+
+    def latest(sql: str, schema: dict[str, pl.DataType]) -> pl.DataFrame:
+        return (
+            pl.DataFrame(list(db.query(sql)), schema=schema, orient="row", strict=False)
+            .sort("school_id", "school_year")
+            .unique(subset="school_id", keep="last")
+            .drop("school_year")
+        )
+
+    school_id = pl.Utf8
+    coordinates = pl.DataFrame(
+        list(db.query("SELECT school_id, longitude, latitude FROM school_coordinates")),
+        schema={
+            "school_id": school_id,
+            "longitude": pl.Float64,
+            "latitude": pl.Float64,
+        },
+        orient="row",
+        strict=False,
+    )
+    names = latest(
+        "SELECT school_id, school_year, school_name FROM school_names",
+        {"school_id": school_id, "school_year": pl.Utf8, "name": pl.Utf8},
+    )
+    levels = latest(
+        f"""SELECT l.school_id, y.school_year,
+            {", ".join(f"MAX(l.level = '{flag}' AND l.offered)" for flag in LEVEL_FLAGS)}
+        FROM school_levels l JOIN school_years y ON y.id = l.school_year_id
+        GROUP BY l.school_id, y.school_year""",
+        {"school_id": school_id, "school_year": pl.Utf8}
+        | {flag: pl.Boolean for flag in LEVEL_FLAGS},
+    )
+    enrollment = latest(
+        """SELECT e.school_id, y.school_year, SUM(e.num_students)
+        FROM enroll e JOIN school_years y ON y.id = e.school_year_id
+        GROUP BY e.school_id, y.school_year""",
+        {"school_id": school_id, "school_year": pl.Utf8, "enrollment": pl.Int64},
+    )
+    return (
+        coordinates.join(names, on="school_id", how="left")
+        .join(levels, on="school_id", how="left")
+        .join(enrollment, on="school_id", how="left")
+        .select(POINT_COLS)
+        .sort("school_id")
+    )
+
+
+def render_tiles(points: pl.DataFrame, settings: TileSettings) -> pl.DataFrame:
+    """GeoJSON FeatureCollection text for every non-empty tile.
+
+    Returns:
+        pl.DataFrame: `tile` (`"z/x/y"`) and `geojson`.
+    """
+    frames = []
+    for zoom in range(settings.min_zoom, settings.max_zoom + 1):
+        placed = points.with_columns(_tile_position(zoom))
+        if zoom < settings.cluster_below:
+            features = _cluster_features(placed)
+        else:
+            features = placed.select(
+                "tile_x",
+                "tile_y",
+                feature=pl.format(
+                    _FEATURE,
+                    pl.col("longitude").round(6),
+                    pl.col("latitude").round(6),
+                    pl.struct(
+                        pl.col("school_id").alias("id"),
+                        "name",
+                        *LEVEL_FLAGS,
+                        "enrollment",
+                    ).struct.json_encode(),
+                ),
+            )
+        frames.append(
+            features.group_by("tile_x", "tile_y", maintain_order=True).agg(
+                tile=pl.format("{}/{}/{}", pl.lit(zoom), "tile_x", "tile_y").first(),
+                geojson=pl.format(_COLLECTION, pl.col("feature").str.join(",")).first(),
+            )
+        )
+    if not frames:
+        return pl.DataFrame(schema={"tile": pl.Utf8, "geojson": pl.Utf8})
+    return pl.concat(frames).select("tile", "geojson")
+
+
+def write_tiles(
+    points: pl.DataFrame,
+    output_dir: Path,
+    settings: TileSettings,
+    workers: int | None = None,
+) -> TileExport:
+    """Render all tiles and write those that changed since the last export.
+
+    A tile is unchanged when its digest matches `manifest.json`. If the
+    manifest was written with other `settings` or `TILES_FORMAT`, every tile
+    is rewritten.
+
+    Args:
+        points (pl.DataFrame): `POINT_COLS` (`load_school_points`).
+        output_dir (Path): Tiles go to `output_dir/z/x/y.geojson`.
+        settings (TileSettings): Zoom range and clustering.
+        workers (int | None): Processes writing files; defaults to the CPU
+            count, and 1 writes in this process.
+    """
+    tiles = render_tiles(points, settings)
+    digests = {
+        tile: hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+        for tile, text in tiles.iter_rows()
+    }
+
+    manifest_file = output_dir / MANIFEST_FILE
+    existing: dict[str, str] = {}
+    previous: dict[str, str] = {}
+    if manifest_file.exists():
+        manifest = json.loads(manifest_file.read_text())
+        existing = manifest["tiles"]
+        if manifest.get("format") == TILES_FORMAT and manifest.get(
+            "settings"
+        ) == asdict(settings):
+            previous = existing
+
+    changed = tiles.filter(
+        pl.Series([previous.get(tile) != digest for tile, digest in digests.items()])
+    )
+    jobs = [
+        (str(output_dir / f"{tile}.geojson"), text)
+        for tile, text in changed.iter_rows()
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 2:
+        _write_tile_batch(jobs)
+    else:
+        batches = [jobs[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_write_tile_batch, batches))
+
+    stale = [tile for tile in existing if tile not in digests]
+    for tile in stale:
+        (output_dir / f"{tile}.geojson").unlink(missing_ok=True)
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tmp = manifest_file.with_name(f"{MANIFEST_FILE}.tmp")
+    tmp.write_text(
+        json.dumps(
+            {"format": TILES_FORMAT, "settings": asdict(settings), "tiles": digests}
+        )
+    )
+    os.replace(tmp, manifest_file)
+    return TileExport(
+        written=len(jobs), unchanged=len(digests) - len(jobs), removed=len(stale)
+    )
+
+
+def _write_tile_batch(jobs: list[tuple[str, str]]) -> None:
+    for path, text in jobs:
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(text)
+
+
+def _tile_position(zoom: int) -> list[pl.Expr]:
+    """Fractional Web Mercator tile coordinates (`pos_x`, `pos_y`) and tile ids."""
+    n = 2**zoom
+    lat = pl.col("latitude").clip(-MAX_LATITUDE, MAX_LATITUDE).radians()
+    pos_x = (pl.col("longitude") + 180) / 360 * n
+    pos_y = (1 - (lat.tan() + 1 / lat.cos()).log() / math.pi) / 2 * n
+    return [
+        pos_x.alias("pos_x"),
+        pos_y.alias("pos_y"),
+        pos_x.floor().cast(pl.Int64).clip(0, n - 1).alias("tile_x"),
+        pos_y.floor().cast(pl.Int64).clip(0, n - 1).alias("tile_y"),
+    ]
+
+
+def _cluster_features(placed: pl.DataFrame) -> pl.DataFrame:
+    """One feature per occupied cluster cell, at the mean school position."""
+    cell = [
+        (pl.col(f"pos_{axis}") * CLUSTER_GRID)
+        .floor()
+        .cast(pl.Int64)
+        .alias(f"cell_{axis}")
+        for axis in ("x", "y")
+    ]
+    return (
+        placed.with_columns(cell)
+        .group_by("tile_x", "tile_y", "cell_x", "cell_y", maintain_order=True)
+        .agg(
+            pl.col("longitude", "latitude").mean(),
+            point_count=pl.len(),
+            **{flag: pl.col(flag).sum() for flag in LEVEL_FLAGS},
+            enrollment=pl.col("enrollment").sum(),
+        )
+        .select(
+            "tile_x",
+            "tile_y",
+            feature=pl.format(
+                _FEATURE,
+                pl.col("longitude").round(6),
+                pl.col("latitude").round(6),
+                pl.struct(
+                    cluster=pl.lit(True),
+                    point_count="point_count",
+                    **{flag: flag for flag in LEVEL_FLAGS},
+                    enrollment="enrollment",
+                ).struct.json_encode(),
+            ),
+        )
+    )
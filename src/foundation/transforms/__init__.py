@@ -1,15 +1,27 @@
 """Transform utilities for foundation pipeline."""
 
 from .fixes import fill_missing_psgc
+from .geo_names import (
+    barangay_name_expr,
+    digits_only_expr,
+    normalize_geo_name_expr,
+    normalize_region_name_expr,
+    trailing_roman_expr,
+)
 from .location import clean_meta_location_names
 from .normalize import get_divisions
 from .reorder import reorganize_school_geo_df
 from .school_name import clean_school_name
 
 __all__ = [
+    "barangay_name_expr",
     "clean_meta_location_names",
     "clean_school_name",
+    "digits_only_expr",
     "fill_missing_psgc",
     "get_divisions",
+    "normalize_geo_name_expr",
+    "normalize_region_name_expr",
     "reorganize_school_geo_df",
+    "trailing_roman_expr",
 ]
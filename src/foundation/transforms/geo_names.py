@@ -0,0 +1,223 @@
+"""Polars expression builders for geographic name normalization.
+
+Each builder mirrors a pure-Python helper used by the PSGC matchers
+(`normalize_geo_name`, `normalize_region_name`, `convert_trailing_roman`,
+`fix_barangay_enye_value`, `_digits_only`) so that school and PSGC names can be
+normalized column-wise instead of row-by-row through `map_elements`.
+
+Null inputs stay null, matching the way `map_elements` skips missing values.
+
+Examples:
+    >>> import polars as pl
+    >>> df = pl.DataFrame({"name": ["Sto. Tomas", "City of Manila", "Poblacion II"]})
+    >>> df.select(
+    ...     trailing_roman_expr(normalize_geo_name_expr(pl.col("name")))
+    ... )["name"].to_list()
+    ['santo tomas', 'manila city', 'poblacion 2']
+"""
+
+from __future__ import annotations
+
+import polars as pl
+
+ROMAN_TO_ARABIC = {
+    "I": "1",
+    "II": "2",
+    "III": "3",
+    "IV": "4",
+    "V": "5",
+    "VI": "6",
+    "VII": "7",
+    "VIII": "8",
+    "IX": "9",
+    "X": "10",
+}
+
+_TRAILING_ROMAN = r"(?i)\b(I|II|III|IV|V|VI|VII|VIII|IX|X)\b\.?$"
+
+
+def _eval(expr: pl.Expr, values: list[str | None]) -> list[str | None]:
+    """Apply ``expr`` (built over ``pl.col("v")``) to ``values`` for doctests."""
+    return (
+        pl.DataFrame({"v": values}, schema={"v": pl.Utf8}).select(expr)["v"].to_list()
+    )
+
+
+def fold_to_ascii(expr: pl.Expr) -> pl.Expr:
+    """NFKD-decompose and drop non-ASCII code points (e.g. accents, ``ñ`` → ``n``).
+
+    >>> _eval(fold_to_ascii(pl.col("v")), ["Parañaque", "Peñablanca", None])
+    ['Paranaque', 'Penablanca', None]
+    """
+    return expr.str.normalize("NFKD").str.replace_all(r"[^\x00-\x7F]", "")
+
+
+def strip_parenthetical(expr: pl.Expr) -> pl.Expr:
+    """Remove every ``(...)`` segment, non-greedily.
+
+    >>> _eval(strip_parenthetical(pl.col("v")), ["Quezon City (2nd District)"])
+    ['Quezon City ']
+    """
+    return expr.str.replace_all(r"\(.*?\)", "")
+
+
+def expand_saint_abbreviations(expr: pl.Expr) -> pl.Expr:
+    """Expand the lowercase ``sto``/``sta`` tokens into ``santo``/``santa``.
+
+    >>> _eval(expand_saint_abbreviations(pl.col("v")), ["sto tomas", "sta rosa"])
+    ['santo tomas', 'santa rosa']
+    """
+    return expr.str.replace_all(r"\bsto\b", "santo").str.replace_all(
+        r"\bsta\b", "santa"
+    )
+
+
+def rewrite_city_of(expr: pl.Expr) -> pl.Expr:
+    """Rewrite lowercase ``city of X`` into ``X city``.
+
+    >>> _eval(rewrite_city_of(pl.col("v")), ["city of naga", "naga city"])
+    ['naga city', 'naga city']
+    """
+    prefix = "city of "
+    return (
+        pl.when(expr.str.starts_with(prefix))
+        .then(
+            pl.concat_str(
+                [expr.str.slice(len(prefix)).str.strip_chars(), pl.lit(" city")]
+            )
+        )
+        .otherwise(expr)
+    )
+
+
+def collapse_whitespace(expr: pl.Expr) -> pl.Expr:
+    """Squeeze whitespace runs into a single space and trim both ends.
+
+    >>> _eval(collapse_whitespace(pl.col("v")), ["  san   jose  "])
+    ['san jose']
+    """
+    return expr.str.replace_all(r"\s+", " ").str.strip_chars()
+
+
+def normalize_geo_name_expr(expr: pl.Expr) -> pl.Expr:
+    """Vectorized counterpart of `foundation.common.normalize_geo_name`.
+
+    >>> _eval(
+    ...     normalize_geo_name_expr(pl.col("v")),
+    ...     ["Sto. Tomas", "City of Manila", "Quezon City (2nd District)", "  ", None],
+    ... )
+    ['santo tomas', 'manila city', 'quezon city', '', None]
+    """
+    expr = fold_to_ascii(expr.str.to_lowercase().str.strip_chars())
+    expr = strip_parenthetical(expr).str.strip_chars()
+    expr = expr.str.replace_all(r"[\.,]", "")
+    expr = rewrite_city_of(expand_saint_abbreviations(expr))
+    return collapse_whitespace(expr)
+
+
+def normalize_region_name_expr(expr: pl.Expr) -> pl.Expr:
+    """Vectorized counterpart of `foundation.common.normalize_region_name`.
+
+    >>> _eval(
+    ...     normalize_region_name_expr(pl.col("v")),
+    ...     ["Region I (Ilocos Region)", "Region IV-A", "NATIONAL CAPITAL REGION"],
+    ... )
+    ['region i', 'region iv a', 'national capital region']
+    """
+    expr = strip_parenthetical(expr.str.to_lowercase().str.strip_chars())
+    expr = expr.str.replace_all(r"[^a-z0-9 ]+", " ")
+    return collapse_whitespace(expr)
+
+
+def trailing_roman_expr(expr: pl.Expr) -> pl.Expr:
+    """Vectorized counterpart of `foundation.common.convert_trailing_roman`.
+
+    >>> _eval(
+    ...     trailing_roman_expr(pl.col("v")),
+    ...     ["District I", "Region II", "Division X.", "poblacion viii", "No roman here"],
+    ... )
+    ['District 1', 'Region 2', 'Division 10', 'poblacion 8', 'No roman here']
+    """
+    arabic = (
+        expr.str.extract(_TRAILING_ROMAN, 1)
+        .str.to_uppercase()
+        .replace_strict(ROMAN_TO_ARABIC, default=None, return_dtype=pl.Utf8)
+    )
+    return (
+        pl.when(arabic.is_not_null())
+        .then(pl.concat_str([expr.str.replace(_TRAILING_ROMAN, ""), arabic]))
+        .otherwise(expr)
+    )
+
+
+def barangay_enye_expr(expr: pl.Expr) -> pl.Expr:
+    """Vectorized counterpart of `fix_barangay_enye_value` (mojibake ``Ã‘`` → ``Ñ``).
+
+    >>> _eval(barangay_enye_expr(pl.col("v")), ["PEÃ‘AFRANCIA", None])
+    ['PEÑAFRANCIA', None]
+    """
+    return expr.str.replace_all("Ã‘", "Ñ", literal=True)
+
+
+def digits_only_expr(expr: pl.Expr) -> pl.Expr:
+    """Vectorized counterpart of `foundation.transforms.normalize._digits_only`.
+
+    >>> _eval(digits_only_expr(pl.col("v")), ["PSGC 0102-800000", "n/a"])
+    ['0102800000', '']
+    """
+    return expr.cast(pl.Utf8).str.replace_all(r"\D", "")
+
+
+def barangay_name_expr(expr: pl.Expr) -> pl.Expr:
+    """Full barangay key: enye repair, geo-name normalization, trailing roman.
+
+    >>> _eval(barangay_name_expr(pl.col("v")), ["STA. CRUZ (POB.) II", None])
+    ['santa cruz 2', None]
+    """
+    return trailing_roman_expr(normalize_geo_name_expr(barangay_enye_expr(expr)))
+
+
+def token_sort_expr(expr: pl.Expr) -> pl.Expr:
+    """Sort whitespace-separated tokens so word order does not affect scoring.
+
+    >>> _eval(token_sort_expr(pl.col("v")), ["tomas santo", "b a c", None])
+    ['santo tomas', 'a b c', None]
+    """
+    return expr.str.split(" ").list.sort().list.join(" ")
+
+
+def trigrams_expr(expr: pl.Expr) -> pl.Expr:
+    """Distinct character trigrams of ``expr`` padded with two leading spaces and
+    one trailing space (the `pg_trgm` convention), as a sorted list.
+
+    >>> _eval(trigrams_expr(pl.col("v")), ["ab"])
+    [['  a', ' ab', 'ab ']]
+    """
+    padded = expr.str.replace(r"^", "  ").str.replace(r"$", " ")
+    chars = padded.str.split("")
+    return (
+        chars.list.eval(
+            pl.concat_str(
+                [pl.element(), pl.element().shift(-1), pl.element().shift(-2)]
+            ).drop_nulls()
+        )
+        .list.unique()
+        .list.sort()
+    )
+
+
+def trigram_similarity_expr(left: pl.Expr, right: pl.Expr) -> pl.Expr:
+    """Jaccard similarity of two trigram lists built by `trigrams_expr`.
+
+    Returns a float in ``[0, 1]``; two empty lists score ``0``.
+
+    >>> pl.DataFrame({"a": ["santa cruz"], "b": ["santa cruz"]}).select(
+    ...     trigram_similarity_expr(
+    ...         trigrams_expr(pl.col("a")), trigrams_expr(pl.col("b"))
+    ...     )
+    ... ).item()
+    1.0
+    """
+    shared = left.list.set_intersection(right).list.len()
+    total = left.list.set_union(right).list.len()
+    return pl.when(total > 0).then(shared / total).otherwise(0.0)
@@ -6,6 +6,8 @@ import re
 
 import polars as pl
 
+from .geo_names import digits_only_expr
+
 
 def _digits_only(s: str) -> str:
     """Return only the digits contained in a string or empty when missing.
@@ -54,12 +56,7 @@ def get_unique_provinces(df: pl.DataFrame, psgc_df: pl.DataFrame) -> pl.DataFram
     """
 
     # --- 1) Clean school dataframe province IDs ---
-    prov_series = (
-        df.select("psgc_provhuc_id")
-        .to_series()
-        .cast(pl.Utf8)
-        .map_elements(_digits_only, return_dtype=pl.Utf8)
-    )
+    prov_series = df.select(digits_only_expr(pl.col("psgc_provhuc_id"))).to_series()
     prov_series = prov_series.filter(prov_series.str.len_chars() > 0).unique()
     prov_df = pl.DataFrame({"raw_provhuc_id": prov_series})
 
@@ -68,14 +65,14 @@ def get_unique_provinces(df: pl.DataFrame, psgc_df: pl.DataFrame) -> pl.DataFram
 
     # --- 2) Prepare PSGC province layer ---
     psgc_prov = psgc_df.filter(pl.col("geo") == "Prov").with_columns(
-        id=pl.col("id").cast(pl.Utf8).map_elements(_digits_only, return_dtype=pl.Utf8)
+        id=digits_only_expr(pl.col("id"))
     )
     psgc_prov = psgc_prov.with_columns(prov_key=pl.col("id").str.slice(0, 5))
     psgc_prov = psgc_prov.select(["prov_key", "id", "name"]).unique(subset=["prov_key"])
 
     # --- 3) Prepare PSGC region layer (for region mapping) ---
     psgc_reg = psgc_df.filter(pl.col("geo") == "Reg").with_columns(
-        id=pl.col("id").cast(pl.Utf8).map_elements(_digits_only, return_dtype=pl.Utf8)
+        id=digits_only_expr(pl.col("id"))
     )
     psgc_reg = psgc_reg.with_columns(
         reg_key=pl.col("id").str.slice(0, 2)  # Regions map via 2-digit code
@@ -7,9 +7,16 @@ import pytest
 import yaml
 from openpyxl import Workbook
 
+from src.foundation.loaders.excel import parse_usecols
 from src.foundation.plugins import dropouts as dropouts_module
 
 
+@pytest.fixture(autouse=True)
+def snapshot_cache(tmp_path, monkeypatch):
+    """Keep source snapshots out of the repository's data/cache."""
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path / "cache"))
+
+
 @pytest.fixture
 def temp_dir():
     """Create a temporary directory for test files."""
@@ -209,7 +216,7 @@ def _row_with_values(
 
 
 def _create_dropout_workbook(directory: Path, cfg: dict):
-    indexes = dropouts_module._parse_usecols(cfg["cols"]) or []
+    indexes = parse_usecols(cfg["cols"]) or []
     if len(indexes) < 2:
         raise ValueError("Need at least two columns (school_id + grade columns)")
 
@@ -325,5 +332,6 @@ def test_env(
     os.environ["PSGC_FILE"] = str(sample_psgc_xlsx)
     os.environ["HR_DIR"] = str(sample_hr_xlsx)
     os.environ["DROPOUT_DIR"] = str(sample_dropouts_dir)
+    os.environ["CACHE_DIR"] = str(temp_dir / "cache")
 
     yield temp_dir
@@ -5,6 +5,8 @@ from pathlib import Path
 
 import pytest
 
+from src.foundation.spatial import SpatialIndex
+
 
 class TestCLI:
     def test_cli_prep_command(self, test_env):
@@ -82,9 +84,143 @@ class TestCLI:
                 "enroll",
                 "geos",
                 "addr",
+                "addresses",
+                "school_coordinates",
+                "school_names",
                 "psgc",  # from build
+                "psgc_closure",
+                "school_coordinates_rtree",
+                "school_access",
+                "match_stats",
             ]
             for table in expected_tables:
                 assert table in tables
+            assert cursor.execute("SELECT COUNT(*) FROM match_stats").fetchone()[0] > 0
+
+            # A viewport around one school finds it through the R*Tree
+            school_id, lon, lat = cursor.execute(
+                "SELECT school_id, longitude, latitude FROM school_coordinates"
+            ).fetchone()
+            viewport = (lon - 0.01, lon + 0.01, lat - 0.01, lat + 0.01)
+            bbox = """WHERE max_lon >= ? AND min_lon <= ?
+                AND max_lat >= ? AND min_lat <= ?"""
+            for view in ("geos_bbox", "enroll_bbox", "school_levels_bbox"):
+                found = cursor.execute(
+                    f"SELECT DISTINCT school_id FROM {view} {bbox}", viewport
+                ).fetchall()
+                assert (school_id,) in found
+            plan = cursor.execute(
+                f"EXPLAIN QUERY PLAN SELECT * FROM enroll_bbox {bbox}", viewport
+            ).fetchall()
+            assert any("VIRTUAL TABLE" in row[-1] for row in plan)
+            located = cursor.execute(
+                "SELECT COUNT(*) FROM school_coordinates"
+            ).fetchone()[0]
+            indexed = cursor.execute(
+                "SELECT COUNT(*) FROM school_coordinates_rtree"
+            ).fetchone()[0]
+            assert indexed == located > 0
+            school_years = cursor.execute(
+                "SELECT COUNT(*) FROM (SELECT DISTINCT school_id, school_year FROM geos)"
+            ).fetchone()[0]
+            access = cursor.execute("SELECT COUNT(*) FROM school_access").fetchone()[0]
+            assert access == school_years
+        finally:
+            conn.close()
+
+        spatial = db_path.parent / f"{db_path.stem}.spatial"
+        assert (spatial / "points.parquet").exists()
+        assert SpatialIndex.load(spatial).points.height == located
+
+    def test_cli_build_runs_again_on_a_built_database(self, test_env):
+        """A second 'cli build' reloads the tables and only changed addresses."""
+        cwd = Path(__file__).parent.parent
+        results = [
+            subprocess.run(
+                [sys.executable, "-m", "src.foundation", command],
+                capture_output=True,
+                text=True,
+                cwd=cwd,
+            )
+            for command in ("prep", "build", "build")
+        ]
+        for result in results:
+            assert result.returncode == 0, result.stderr
+
+        second = " ".join(results[-1].stdout.split())
+        assert "addresses_df.height=0" in second
+        assert "changed.height=0" in second
+
+        import sqlite3
+
+        conn = sqlite3.connect(os.environ["DB_FILE"])
+        try:
+            cursor = conn.cursor()
+            assert cursor.execute("SELECT COUNT(*) FROM addr").fetchone()[0] > 0
+            assert cursor.execute("SELECT COUNT(*) FROM geos_located").fetchone()[0] > 0
+            named = "SELECT COUNT(*) FROM geos_located WHERE school_name IS NOT NULL"
+            assert cursor.execute(named).fetchone()[0] > 0
         finally:
             conn.close()
+
+    def test_cli_migrate_address_hashes_command(self, test_env):
+        """Test that 'cli migrate-address-hashes' seeds the address store."""
+        cwd = Path(__file__).parent.parent
+        for command in ("prep", "build"):
+            setup = subprocess.run(
+                [sys.executable, "-m", "src.foundation", command],
+                capture_output=True,
+                text=True,
+                cwd=cwd,
+            )
+            assert setup.returncode == 0, setup.stderr
+        store = Path(os.environ["CACHE_DIR"]) / "address_dimension.parquet"
+        store.unlink()
+
+        result = subprocess.run(
+            [sys.executable, "-m", "src.foundation", "migrate-address-hashes"],
+            capture_output=True,
+            text=True,
+            cwd=cwd,
+        )
+
+        assert result.returncode == 0
+        assert "Seeded" in result.stdout
+        assert store.exists()
+
+    def test_cli_export_tiles_command(self, test_env):
+        """Test that 'cli export-tiles' writes tiles and skips unchanged ones."""
+        cwd = Path(__file__).parent.parent
+        for command in ("prep", "build"):
+            setup = subprocess.run(
+                [sys.executable, "-m", "src.foundation", command],
+                capture_output=True,
+                text=True,
+                cwd=cwd,
+            )
+            assert setup.returncode == 0, setup.stderr
+        export = [sys.executable, "-m", "src.foundation", "export-tiles", "--workers=1"]
+
+        result = subprocess.run(export, capture_output=True, text=True, cwd=cwd)
+        assert result.returncode == 0, result.stderr
+
+        db_path = Path(os.environ["DB_FILE"])
+        tiles = db_path.parent / f"{db_path.stem}.tiles"
+        assert (tiles / "manifest.json").exists()
+        assert list(tiles.glob("12/*/*.geojson"))
+
+        again = subprocess.run(export, capture_output=True, text=True, cwd=cwd)
+        assert "0 written" in again.stdout
+
+    def test_cli_snapshot_command(self, test_env):
+        """Test that 'cli snapshot' converts sources once and reuses them."""
+        cwd = Path(__file__).parent.parent
+        command = [sys.executable, "-m", "src.foundation", "snapshot"]
+
+        result = subprocess.run(command, capture_output=True, text=True, cwd=cwd)
+        assert result.returncode == 0, result.stderr
+        assert " 0 reused" in result.stdout
+        assert list((Path(os.environ["CACHE_DIR"]) / "snapshots").rglob("*.parquet"))
+
+        again = subprocess.run(command, capture_output=True, text=True, cwd=cwd)
+        assert "0 converted" in again.stdout
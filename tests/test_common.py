@@ -6,6 +6,7 @@ from src.foundation.common import (
     add_to,
     bulk_update,
     convert_trailing_roman,
+    map_in_processes,
     normalize_geo_name,
     normalize_region_name,
     prep_table,
@@ -123,3 +124,9 @@ class TestCommonFunctions:
             # Note: sqlite-utils foreign key checking might not be directly testable here
         finally:
             db.conn.close()
+
+
+def test_map_in_processes_keeps_order():
+    items = [3, 1, 2]
+    assert map_in_processes(abs, items, workers=2) == [3, 1, 2]
+    assert map_in_processes(abs, [], workers=4) == []
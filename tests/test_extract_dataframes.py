@@ -1,14 +1,26 @@
 import polars as pl
 
 from src.foundation.pipeline import ExtractedFrames, extract_dataframes
+from src.foundation.plugins import geodata
+from src.foundation.schema import SCHEMAS
 
 
 class TestDataFrameExtraction:
-    def test_extract_dataframes(self, test_env):
+    def test_extract_dataframes(self, test_env, monkeypatch):
         """Test the main dataframe extraction function."""
+        reads = []
+        read_school_coordinates = geodata.read_school_coordinates
+
+        def counted(*args, **kwargs):
+            reads.append(args)
+            return read_school_coordinates(*args, **kwargs)
+
+        monkeypatch.setattr(geodata, "read_school_coordinates", counted)
 
         # This should work with our test environment
         frames: ExtractedFrames = extract_dataframes()
+        # Matching and the geo fact share one read of GEO_FILE
+        assert len(reads) == 1
         psgc_df = frames.psgc
         enroll_df = frames.enrollment
         geo_df = frames.geo
@@ -39,9 +51,22 @@ class TestDataFrameExtraction:
         assert "sex" in enroll_df.columns
         assert "num_students" in enroll_df.columns
 
-        assert "school_id" in geo_df.columns
-        assert "longitude" in geo_df.columns
-        assert "latitude" in geo_df.columns
+        # The fact keeps ids and flags only; names and coordinates are dimensions
+        assert geo_df.columns == [col.name for col in SCHEMAS["geo"].columns]
+        names_df = frames.school_names
+        assert names_df is not None
+        assert names_df["school_id"].n_unique() == names_df.height
+
+        coords_df = frames.school_coordinates
+        assert coords_df is not None
+        assert coords_df.columns == [
+            "school_id",
+            "longitude",
+            "latitude",
+            "source_file",
+            "source_date",
+        ]
+        assert coords_df["school_id"].n_unique() == coords_df.height
 
         assert "school_year" in levels_df.columns
         assert "school_id" in levels_df.columns
@@ -1,6 +1,13 @@
+import datetime as dt
+
 import polars as pl
 
-from src.foundation.plugins.geodata import set_coordinates
+from src.foundation.plugins.geodata import (
+    flag_coordinates,
+    read_school_coordinates,
+    set_coordinates,
+    source_file_date,
+)
 
 
 class TestGeoDataExtraction:
@@ -30,3 +37,59 @@ class TestGeoDataExtraction:
         school_100004 = result.filter(pl.col("school_id") == 100004).row(0, named=True)
         assert school_100004["longitude"] is None
         assert school_100004["latitude"] is None
+
+    def test_read_school_coordinates(self, sample_geo_csv):
+        """Test reading one coordinate row per known school."""
+        school_ids = pl.Series(["100001", "100002", "100002", "100004"])
+
+        coords = read_school_coordinates(sample_geo_csv, school_ids=school_ids)
+
+        assert coords["school_id"].to_list() == ["100001", "100002"]
+        assert coords.row(0, named=True)["longitude"] == 120.5678
+        assert coords["source_file"].unique().to_list() == ["geo.csv"]
+        assert coords.schema["source_date"] == pl.Date
+        assert coords["source_date"].null_count() == coords.height
+
+    def test_source_date_comes_from_file_name(self, sample_geo_csv):
+        """The release date in the file name survives copies and touches."""
+        dated = sample_geo_csv.rename(
+            sample_geo_csv.with_name("2025-12-20-geo-k12-deped.csv")
+        )
+        dated.touch()
+
+        coords = read_school_coordinates(dated)
+
+        assert source_file_date(dated) == dt.date(2025, 12, 20)
+        assert coords["source_date"].unique().to_list() == [dt.date(2025, 12, 20)]
+
+    def test_flag_coordinates(self):
+        """Test flagging points far from their area or outside the country."""
+        ids = [str(i) for i in range(9)]
+        geo_df = pl.DataFrame(
+            {
+                "school_id": ids,
+                "psgc_provhuc_id": ["0102800000"] * 8 + [None],
+                "psgc_muni_id": ["0102801000"] * 7 + ["0102802000", None],
+            }
+        )
+        coordinates = pl.DataFrame(
+            {
+                "school_id": ids[:-1] + ["missing"],
+                # Six clustered schools, one 50 km east, one in the Pacific
+                "longitude": [120.60, 120.61, 120.62, 120.60, 120.61, 120.62]
+                + [121.07, 140.0, 120.6],
+                "latitude": [18.10] * 3 + [18.11] * 3 + [18.10, 18.10, 18.10],
+            }
+        )
+
+        flags = flag_coordinates(geo_df, coordinates)
+
+        assert flags["coord_outside_ph"].to_list() == [False] * 7 + [True, None]
+        assert (
+            flags["coord_outside_muni"].to_list() == [False] * 6 + [True] + [None] * 2
+        )
+        assert flags["coord_outside_provhuc"].to_list() == [False] * 6 + [
+            True,
+            True,
+            None,
+        ]
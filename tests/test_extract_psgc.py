@@ -1,7 +1,11 @@
 import polars as pl
 import pytest
 
-from src.foundation.plugins.psgc import set_psgc
+from src.foundation.plugins.psgc import (
+    attach_psgc_parents,
+    build_psgc_closure,
+    set_psgc,
+)
 
 
 class TestPSGCExtraction:
@@ -49,3 +53,39 @@ class TestPSGCExtraction:
         result = set_psgc(path)
         province_row = result.filter(pl.col("geo") == "Prov")
         assert province_row["name"][0] == "Old Province"
+
+    def test_parent_ids_and_closure(self):
+        """Parent ids follow the PSGC code structure, including HUC/SubMun units."""
+        psgc = attach_psgc_parents(
+            pl.DataFrame(
+                {
+                    "id": [
+                        "1300000000",
+                        "1380600000",
+                        "1380601000",
+                        "1380601001",
+                        "1400000000",
+                        "1430300000",
+                        "1430300001",
+                    ],
+                    "geo": ["Reg", "City", "SubMun", "Bgy", "Reg", "City", "Bgy"],
+                }
+            )
+        )
+        by_id = {row["id"]: row for row in psgc.to_dicts()}
+
+        assert by_id["1380601001"]["region_id"] == "1300000000"
+        assert by_id["1380601001"]["prov_id"] == "1380600000"
+        assert by_id["1380601001"]["muni_id"] == "1380601000"
+        assert by_id["1380601000"]["parent_id"] == "1380600000"
+        assert by_id["1430300001"]["parent_id"] == "1430300000"
+
+        closure = build_psgc_closure(psgc)
+        under_ncr = closure.filter(pl.col("ancestor_id") == "1300000000")
+        assert sorted(under_ncr["descendant_id"]) == [
+            "1300000000",
+            "1380600000",
+            "1380601000",
+            "1380601001",
+        ]
+        assert closure.select("ancestor_id", "descendant_id").is_unique().all()
@@ -0,0 +1,77 @@
+import polars as pl
+import pytest
+from openpyxl import Workbook
+
+from src.foundation.loaders.excel import (
+    ExcelWorkbook,
+    SheetSpec,
+    first_used_column,
+    parse_usecols,
+)
+
+
+@pytest.fixture
+def offset_workbook(temp_dir):
+    """A sheet whose first used column is C, with merged two-row headers."""
+
+    path = temp_dir / "offset.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "DB"
+    sheet.append([])
+    sheet.append([None, None, "School", "Grade 1", None, "Grade  2"])
+    sheet.append([None, None, None, "Male", "Female", "Male"])
+    sheet.append([None, None, 1001, 3, "#N/A", None])
+    sheet.append([None, None, "1002", 2.0, 5, 7])
+    workbook.save(path)
+    return path
+
+
+class TestExcelLoader:
+    def test_parse_usecols(self):
+        assert parse_usecols("E,K:M") == [4, 10, 11, 12]
+        assert parse_usecols(None) is None
+
+    def test_first_used_column(self, offset_workbook):
+        assert first_used_column(offset_workbook, "DB") == 2
+
+    def test_single_header_row(self, offset_workbook):
+        df = ExcelWorkbook(offset_workbook).read_sheet(
+            SheetSpec(sheet_name="DB", usecols="C:D,H", header=2),
+            source_row="row",
+        )
+
+        assert df.columns == ["column_2", "Male", "column_7", "row"]
+        assert df.schema["Male"] == pl.Utf8
+        assert df["column_2"].to_list() == ["1001", "1002"]
+        assert df["Male"].to_list() == ["3", "2"]
+        assert df["column_7"].to_list() == [None, None]
+        assert df["row"].to_list() == [4, 5]
+
+    def test_merged_header_rows(self, offset_workbook):
+        df = ExcelWorkbook(offset_workbook).read_sheet(
+            SheetSpec(sheet_name="DB", usecols="C:F", header=1, header_rows=2)
+        )
+
+        assert df.columns == [
+            "School",
+            "Grade 1 Male",
+            "Grade 1 Female",
+            "Grade 2 Male",
+        ]
+        assert df.row(0) == ("1001", "3", None, None)
+
+    def test_iter_sheet_batches_match_read_sheet(self, offset_workbook):
+        workbook = ExcelWorkbook(offset_workbook)
+        spec = SheetSpec(sheet_name="DB", usecols="C:F", header=1, header_rows=2)
+
+        batches = list(workbook.iter_sheet(spec, batch_rows=1, source_row="row"))
+
+        assert [batch.height for batch in batches] == [1, 1]
+        assert pl.concat(batches).equals(workbook.read_sheet(spec, source_row="row"))
+        past_end = SheetSpec(sheet_name="DB", header=1, data_start=9)
+        assert [batch.height for batch in workbook.iter_sheet(past_end, 1)] == [0]
+
+    def test_missing_sheet(self, offset_workbook):
+        with pytest.raises(ValueError, match="missing"):
+            ExcelWorkbook(offset_workbook).read_sheet(SheetSpec(sheet_name="Nope"))
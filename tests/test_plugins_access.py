@@ -0,0 +1,43 @@
+import polars as pl
+import pytest
+
+from src.foundation.plugins.access import build_school_access
+
+
+def test_build_school_access_per_school_year():
+    geo_df = pl.DataFrame(
+        {
+            "school_id": ["a", "b", "c", "a", "b", "d"],
+            "school_year": ["2023-2024"] * 3 + ["2024-2025"] * 2 + ["2023-2024"],
+        }
+    )
+    # b is ~1.1 km east of a, c ~5.3 km east; d has no coordinates
+    coordinates = pl.DataFrame(
+        {
+            "school_id": ["a", "b", "c"],
+            "longitude": [121.0, 121.01, 121.05],
+            "latitude": [14.6, 14.6, 14.6],
+        }
+    )
+    levels = pl.DataFrame(
+        {
+            "school_id": ["a", "b", "c", "c", "a", "b"],
+            "school_year": ["2023-2024"] * 4 + ["2024-2025"] * 2,
+            "level": ["es", "jhs", "jhs", "shs", "es", "es"],
+            "offered": [True, False, True, True, True, True],
+        }
+    )
+
+    access = build_school_access(geo_df, coordinates, levels, batch_size=1)
+
+    assert access.select("school_id", "school_year").rows() == geo_df.rows()
+    first = access.row(0, named=True)
+    assert first["nearest_jhs_km"] == pytest.approx(5.38, abs=0.01)
+    assert first["nearest_jhs_km"] == first["nearest_shs_km"]
+    assert (first["schools_within_2km"], first["schools_within_10km"]) == (1, 2)
+    assert access.row(2, named=True)["nearest_shs_km"] == 0.0
+    # Nobody offers JHS in 2024-2025, and c is not there to be counted
+    later = access.filter(school_year="2024-2025")
+    assert later["nearest_jhs_km"].to_list() == [None, None]
+    assert later["schools_within_10km"].to_list() == [1, 1]
+    assert access.row(5, named=True)["schools_within_2km"] is None
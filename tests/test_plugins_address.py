@@ -0,0 +1,131 @@
+import polars as pl
+import pytest
+from sqlite_utils import Database
+
+from src.foundation.__main__ import _load_address_tables
+from src.foundation.plugins.address import (
+    ADDR_KEY_COLS,
+    AddressStore,
+    addr_hash,
+    build_address_dimension,
+    merge_address_keys,
+    with_addr_hash,
+)
+
+
+def _meta():
+    return pl.DataFrame(
+        {
+            "school_id": ["1", "1", "2", "3"],
+            "school_year": ["2023-2024", "2024-2025", "2023-2024", "2023-2024"],
+            "psgc_region_id": ["0100000000", "0100000000", "0100000000", None],
+            "psgc_provhuc_id": ["0102800000", "0102800000", "0102800000", None],
+            "psgc_muni_id": ["0102801000", "0102801000", "0102802000", None],
+            "psgc_brgy_id": ["0102801001", "0102801001", None, None],
+        }
+    )
+
+
+def test_with_addr_hash_matches_reference_and_is_pinned():
+    meta = _meta()
+    hashed = with_addr_hash(meta)["_addr_hash"].to_list()
+
+    assert hashed == [addr_hash(list(row)) for row in meta.select(ADDR_KEY_COLS).rows()]
+    # Pinned so that any change to the scheme is caught
+    assert hashed[0] == 3589677215628597395
+    assert all(0 <= value < 2**63 for value in hashed)
+    assert len(set(hashed)) == 3
+
+
+@pytest.mark.parametrize("bad_id", ["01028O1000", " 0102801000", str(2**64 - 1)])
+def test_ids_that_would_hash_like_null_are_rejected(bad_id):
+    meta = _meta().with_columns(
+        psgc_muni_id=pl.when(pl.col("school_id") == "2")
+        .then(pl.lit(bad_id))
+        .otherwise("psgc_muni_id")
+    )
+
+    with pytest.raises(ValueError, match="psgc_muni_id"):
+        with_addr_hash(meta)
+    with pytest.raises(ValueError, match="not an unsigned 64-bit integer"):
+        addr_hash(["0100000000", "0102800000", bad_id, None])
+
+
+def test_build_address_dimension_keeps_stored_hashes():
+    meta = _meta()
+    stored = (
+        meta.head(1)
+        .select(ADDR_KEY_COLS)
+        .with_columns(_addr_hash=pl.lit(42), address_id=pl.lit(7))
+    )
+
+    dimension = build_address_dimension(meta, stored=stored)
+
+    hashes = dimension.meta_with_hash["_addr_hash"].to_list()
+    assert hashes[:2] == [42, 42]
+    assert hashes[2:] == with_addr_hash(meta.tail(2))["_addr_hash"].to_list()
+    assert dimension.addresses["address_id"].to_list() == [7, 8, 9]
+    assert dimension.address_df.height == 4
+
+
+def test_address_ids_are_stable_across_builds(tmp_path):
+    store = AddressStore(path=tmp_path / "address_dimension.parquet")
+    meta = _meta()
+    first = build_address_dimension(meta)
+    store.save(merge_address_keys(first.addresses, store.load()))
+
+    # Reordered rows plus one new location keep every existing id
+    extra = meta.head(1).with_columns(
+        school_id=pl.lit("4"), psgc_brgy_id=pl.lit("0102801002")
+    )
+    second = build_address_dimension(pl.concat([extra, meta.reverse()]), store.load())
+    ids = second.addresses.select("_addr_hash", "address_id")
+
+    assert (
+        first.addresses.select("_addr_hash", "address_id")
+        .join(ids, on=["_addr_hash", "address_id"], how="anti")
+        .is_empty()
+    )
+    assert ids.filter(
+        ~pl.col("_addr_hash").is_in(first.addresses["_addr_hash"].implode())
+    )["address_id"].to_list() == [4]
+
+
+def test_load_address_tables_writes_only_changes():
+    db = Database(memory=True)
+    dimension = build_address_dimension(_meta())
+    _load_address_tables(db, dimension.addresses, dimension.address_df)
+    assert db["addresses"].count == 3
+    assert db["addr"].count == 4
+
+    moved = dimension.address_df.filter(pl.col("school_id") != "3").with_columns(
+        address_id=pl.when(pl.col("school_id") == "2").then(1).otherwise("address_id")
+    )
+    _load_address_tables(db, dimension.addresses, moved)
+
+    assert db["addresses"].count == 3
+    links = {
+        (r["school_id"], r["school_year"]): r["address_id"] for r in db["addr"].rows
+    }
+    assert links == {
+        ("1", "2023-2024"): 1,
+        ("1", "2024-2025"): 1,
+        ("2", "2023-2024"): 1,
+    }
+
+
+def test_load_address_tables_deletes_stale_links_in_one_statement():
+    db = Database(memory=True)
+    dimension = build_address_dimension(_meta())
+    _load_address_tables(db, dimension.addresses, dimension.address_df)
+    deletes = []
+    db.conn.set_trace_callback(
+        lambda sql: deletes.append(sql) if sql.lstrip().startswith("DELETE") else None
+    )
+
+    kept = dimension.address_df.filter(pl.col("school_id") == "1")
+    _load_address_tables(db, dimension.addresses, kept)
+
+    assert len(deletes) == 1
+    assert {r["school_id"] for r in db["addr"].rows} == {"1"}
+    assert db["addr"].count == 2
@@ -26,3 +26,54 @@ class TestDropoutsPlugin:
         metrics = output.metrics
         assert metrics["dropouts_files"] == 3
         assert metrics["dropouts_invalid_rows"] >= 0
+
+    def test_consolidate_dropouts_workers_and_batches(self, sample_dropouts_dir):
+        from src.foundation.plugins.dropouts import consolidate_dropouts
+
+        serial, serial_metrics = consolidate_dropouts(sample_dropouts_dir)
+        pooled, pooled_metrics = consolidate_dropouts(
+            sample_dropouts_dir, workers=2, batch_rows=1
+        )
+
+        keys = ["school_year", "school_id", "grade", "strand", "sex"]
+        assert (
+            pooled.drop("ingested_at")
+            .sort(keys)
+            .equals(serial.drop("ingested_at").sort(keys))
+        )
+        assert pooled_metrics == serial_metrics
+
+    def test_parse_dropout_records_splits_invalid_rows(self):
+        from datetime import datetime, timezone
+
+        from src.foundation.plugins.dropouts import (
+            _parse_dropout_2024,
+            _parse_dropout_records,
+            _parse_headers,
+        )
+
+        melted = pl.DataFrame(
+            {
+                "school_id": [" 420001.0 ", "420002", "", "420003"],
+                "source_row": [8, 9, 10, 11],
+                "raw_col": [
+                    "dropout_g1_male",
+                    "dropout_k_female",
+                    "dropout_g1_male",
+                    "total",
+                ],
+                "num_dropouts": [2.7, float("nan"), 1.0, 4.0],
+                "school_year": ["2024-2025"] * 4,
+                "source_file": ["2024-2025-dropouts.xlsx"] * 4,
+                "ingested_at": [datetime(2025, 1, 1, tzinfo=timezone.utc)] * 4,
+            }
+        )
+
+        headers = _parse_headers(melted["raw_col"], _parse_dropout_2024)
+        records, invalid = _parse_dropout_records(melted, headers)
+
+        assert records.select("school_id", "grade", "sex", "num_dropouts").rows() == [
+            ("420001", "g1", "m", 2)
+        ]
+        assert records.schema["ingested_at"] == pl.Datetime
+        assert invalid["source_row"].to_list() == [9, 10, 11]
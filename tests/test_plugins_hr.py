@@ -1,4 +1,5 @@
 import polars as pl
+from openpyxl import Workbook
 
 from src.foundation.pipeline import PluginPipeline
 
@@ -16,3 +17,34 @@ class TestHrPlugin:
         assert set(df["level"].to_list()).issuperset({"es", "jhs", "shs"})
         assert "position" in df.columns
         assert "num" in df.columns
+
+    def test_read_teacher_file_selected_columns(self, sample_hr_xlsx):
+        from src.foundation.plugins.hr import _read_teacher_file
+
+        df = _read_teacher_file(sample_hr_xlsx / "2022-2023-teachers.xlsx")
+
+        assert df.schema["school_id"] == pl.Int64
+        assert df.schema["num"] == pl.Int64
+        assert set(df["school_id"].to_list()) == {400001, 400002}
+        # ES reads D:E,S:AD: the two ID columns and teacher_role_1..12
+        es = df.filter(pl.col("level") == "es", pl.col("school_id") == 400001)
+        assert sorted(es["num"].to_list()) == [4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15]
+
+    def test_read_teacher_sheet_with_leading_empty_columns(self, temp_dir):
+        from src.foundation.loaders.excel import first_used_column
+        from src.foundation.plugins.hr import _load_teacher_sheets
+
+        path = temp_dir / "offset.xlsx"
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.title = "ES DB"
+        sheet.append([None, None, "BEIS School ID", "Teacher I", "Teacher II"])
+        sheet.append([None, None, "400001", 3, 4])
+        workbook.save(path)
+        cfg = {"sheet_name": "ES DB", "usecols": "C,E", "header": 0}
+
+        df = _load_teacher_sheets(path, {"es": cfg})
+
+        assert first_used_column(path, "ES DB") == 2
+        assert df["position"].to_list() == ["teacher ii"]
+        assert df["num"].to_list() == [4]
@@ -1,6 +1,26 @@
 import polars as pl
 
-from src.foundation.plugins.matching import match_psgc_schools
+from src.foundation.plugins.matching import (
+    barangay,
+    match_psgc_schools,
+    match_psgc_schools_with_stats,
+)
+from src.foundation.plugins.matching import index as index_module
+from src.foundation.plugins.matching.barangay import (
+    apply_barangay_corrections,
+    attach_fuzzy_brgy_id,
+)
+from src.foundation.plugins.matching.cache import MatchCache
+from src.foundation.plugins.matching.coordinates import impute_psgc_from_coordinates
+from src.foundation.plugins.matching.index import (
+    PsgcIndex,
+    load_psgc_index,
+    psgc_index_dir,
+)
+from src.foundation.plugins.matching.region import (
+    attach_psgc_region_codes,
+    build_region_aliases,
+)
 
 
 def _fake_psgc():
@@ -93,3 +113,316 @@ def test_match_psgc_schools_assigns_psgc_codes():
     assert matched["psgc_provhuc_id"][0] == "0100100000"
     assert matched["psgc_muni_id"][0] == "0100100100"
     assert matched["psgc_brgy_id"][0] == "0100100101"
+
+
+def test_psgc_index_round_trip(tmp_path):
+    psgc = _fake_psgc()
+    workbook = tmp_path / "psgc.xlsx"
+    workbook.write_bytes(b"release-1")
+
+    built = load_psgc_index(workbook, psgc, cache_dir=tmp_path / "cache")
+    assert built.release is not None
+    assert built.barangays["normalized"].to_list() == ["libtong"]
+    bgy = built.entries.filter(pl.col("geo") == "Bgy").row(0, named=True)
+    assert (bgy["region_id"], bgy["provhuc_id"]) == ("0100000000", "0100100000")
+
+    # A second call reuses the persisted index for the same workbook hash.
+    loaded = load_psgc_index(workbook, psgc.head(0), cache_dir=tmp_path / "cache")
+    assert loaded.release == built.release
+    for name in PsgcIndex.frame_names():
+        assert getattr(loaded, name).equals(getattr(built, name))
+
+    # A new release is indexed separately.
+    workbook.write_bytes(b"release-2")
+    refreshed = load_psgc_index(workbook, psgc, cache_dir=tmp_path / "cache")
+    assert refreshed.release != built.release
+
+
+def test_psgc_index_format_bump_rebuilds(tmp_path, monkeypatch):
+    workbook = tmp_path / "psgc.xlsx"
+    workbook.write_bytes(b"release-1")
+    built = load_psgc_index(workbook, _fake_psgc(), cache_dir=tmp_path / "cache")
+
+    monkeypatch.setattr(index_module, "PSGC_INDEX_FORMAT", 999)
+    # An index saved under the old format is not reused, even for this workbook
+    rebuilt = load_psgc_index(workbook, _fake_psgc().head(0), tmp_path / "cache")
+    assert rebuilt.release == built.release
+    assert rebuilt.entries.is_empty()
+
+
+def test_match_psgc_schools_accepts_index():
+    index = PsgcIndex.from_psgc(_fake_psgc())
+    matched = match_psgc_schools(index, _fake_school_meta())
+
+    assert matched["psgc_brgy_id"][0] == "0100100101"
+
+
+def test_match_psgc_schools_matches_each_location_once():
+    first = _fake_school_meta()
+    years = pl.concat(
+        [
+            first,
+            first.with_columns(school_year=pl.lit("2024-2025")),
+            first.with_columns(school_id=pl.lit("1000002"), region=pl.lit("PSO")),
+        ]
+    )
+
+    matched = match_psgc_schools(_fake_psgc(), years)
+
+    # The PSO row is dropped; both school years of the same location match.
+    assert matched["school_year"].to_list() == ["2023-2024", "2024-2025"]
+    assert matched["psgc_brgy_id"].to_list() == ["0100100101", "0100100101"]
+
+
+def test_match_stats_counts_matched_unmatched_and_dropped():
+    first = _fake_school_meta()
+    meta = pl.concat(
+        [
+            first,
+            first.with_columns(school_id=pl.lit("1000002"), barangay=pl.lit("Zzz")),
+            first.with_columns(school_id=pl.lit("1000003"), region=pl.lit("PSO")),
+        ]
+    )
+
+    matched, stats, metrics = match_psgc_schools_with_stats(_fake_psgc(), meta)
+
+    assert matched.height == 2
+    region_i = stats.filter(region="Region I").select("level", "matched", "unmatched")
+    assert region_i.rows() == [
+        ("region", 2, 0),
+        ("provhuc", 2, 0),
+        ("muni", 2, 0),
+        ("brgy", 1, 1),
+    ]
+    assert stats.filter(region="PSO")["dropped"].to_list() == [1, 1, 1, 1]
+    assert metrics["meta_psgc_input_rows"] == 3
+    assert metrics["meta_psgc_dropped_rows"] == 1
+    assert metrics["meta_psgc_brgy_unmatched"] == 1
+    assert {"meta_psgc_seconds_region", "meta_psgc_seconds_fuzzy"} <= set(metrics)
+
+
+def test_match_psgc_schools_imputes_barangay_from_coordinates():
+    first = _fake_school_meta()
+    meta = pl.concat(
+        [
+            first,
+            first.with_columns(school_id=pl.lit("1000002"), barangay=pl.lit("Zzz")),
+            first.with_columns(school_id=pl.lit("1000003"), barangay=pl.lit("Yyy")),
+        ]
+    )
+    coordinates = pl.DataFrame(
+        {
+            "school_id": ["1000001", "1000002", "1000003"],
+            "longitude": [120.60, 120.605, 121.0],
+            "latitude": [18.10, 18.10, 18.10],
+        }
+    )
+
+    matched, stats, metrics = match_psgc_schools_with_stats(
+        _fake_psgc(), meta, coordinates=coordinates
+    )
+
+    assert matched["psgc_brgy_id"].to_list() == ["0100100101", "0100100101", None]
+    assert matched["brgy_match_method"].to_list() == ["exact", "coordinates", None]
+    near = matched.row(1, named=True)
+    assert near["brgy_match_confidence"] == 1.0
+    assert 0.5 < near["brgy_match_distance_km"] < 0.6
+    # Too far from any matched school to be placed
+    assert matched["brgy_match_distance_km"][2] is None
+    assert stats.filter(level="brgy")["matched"].to_list() == [2]
+    assert metrics["meta_psgc_brgy_imputed"] == 1
+    assert metrics["meta_psgc_muni_imputed"] == 0
+
+
+def test_impute_psgc_from_coordinates_votes_within_known_municipality():
+    meta = pl.DataFrame(
+        {
+            "school_id": ["a", "b", "c", "d"],
+            "psgc_region_id": ["01"] * 4,
+            "psgc_provhuc_id": ["0101"] * 4,
+            "psgc_muni_id": ["0101001", "0101002", "0101002", "0101001"],
+            "psgc_brgy_id": ["0101001001", "0101002001", "0101002002", None],
+            "brgy_match_method": ["exact", "exact", "fuzzy", None],
+            "brgy_match_confidence": [1.0, 1.0, 0.6, None],
+        }
+    )
+    coordinates = pl.DataFrame(
+        {
+            "school_id": ["a", "b", "c", "d"],
+            # b and c are nearer but lie in another municipality
+            "longitude": [120.61, 120.601, 120.602, 120.60],
+            "latitude": [18.10] * 4,
+        }
+    )
+
+    imputed = impute_psgc_from_coordinates(meta, coordinates).row(3, named=True)
+
+    assert imputed["psgc_brgy_id"] == "0101001001"
+    assert imputed["brgy_match_method"] == "coordinates"
+    assert imputed["brgy_match_confidence"] == 1.0
+
+
+def test_match_cache_reuses_and_invalidates(tmp_path, monkeypatch):
+    import src.foundation.plugins.matching.pipeline as pipeline
+
+    index = PsgcIndex.from_psgc(_fake_psgc(), release="release-a")
+    meta = pl.concat(
+        [
+            _fake_school_meta(),
+            _fake_school_meta().with_columns(
+                school_id=pl.lit("1000002"), region=pl.lit("PSO")
+            ),
+        ]
+    )
+    cache = MatchCache(
+        tmp_path / "matches.parquet", "release-a", "fixes", "regions", "1"
+    )
+    expected = match_psgc_schools(index, meta)
+
+    first = match_psgc_schools(index, meta, cache=cache)
+    # The dropped PSO tuple is cached too, so nothing is re-matched.
+    assert cache.load().height == 2
+    # The stamp lives in the Parquet metadata, not in a sidecar file.
+    assert not cache.path.with_suffix(".json").exists()
+    rows = pl.read_parquet(cache.path)
+    rows.write_parquet(cache.path)
+    assert cache.load().is_empty()
+    cache.save(rows)
+    assert cache.load().height == 2
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached tuples must not be re-matched")
+
+    monkeypatch.setattr(pipeline, "match_psgc_locations", fail)
+    second = match_psgc_schools(index, meta, cache=cache)
+    assert first.equals(expected)
+    assert second.equals(expected)
+
+    # A new PSGC release keeps the rows on disk for incremental re-matching...
+    newer = MatchCache(cache.path, "release-b", "fixes", "regions", "1")
+    assert newer.load().is_empty()
+    assert newer.load_previous_release()[0] == "release-a"
+    # ...while a fixes change discards them.
+    stale = MatchCache(cache.path, "release-a", "fixes-2", "regions", "1")
+    assert stale.load().is_empty()
+    assert not cache.path.exists()
+
+
+def test_new_psgc_release_rematches_only_touched_locations(tmp_path):
+    pasuquin = (
+        _fake_psgc()
+        .tail(1)
+        .with_columns(id=pl.lit("0100100102"), name=pl.lit("Pasuquin"))
+    )
+    old_psgc = pl.concat([_fake_psgc(), pasuquin])
+    new_psgc = old_psgc.with_columns(
+        name=pl.when(pl.col("id") == "0100100101")
+        .then(pl.lit("Libtong Norte"))
+        .otherwise(pl.col("name"))
+    )
+    old_index = PsgcIndex.from_psgc(old_psgc, release="release-a")
+    new_index = PsgcIndex.from_psgc(new_psgc, release="release-b")
+    old_index.save(psgc_index_dir(tmp_path, "release-a"))
+
+    meta = pl.concat(
+        [
+            _fake_school_meta(),
+            _fake_school_meta().with_columns(
+                school_id=pl.lit("1000002"), barangay=pl.lit("Pasuquin")
+            ),
+        ]
+    )
+    path = tmp_path / "psgc_matches.parquet"
+    match_psgc_schools(
+        old_index, meta, cache=MatchCache(path, "release-a", "f", "r", "1")
+    )
+
+    matched = match_psgc_schools(
+        new_index, meta, cache=MatchCache(path, "release-b", "f", "r", "1")
+    )
+
+    # Libtong was renamed and re-matched; Pasuquin was carried over untouched.
+    releases = dict(zip(matched["barangay"], matched["psgc_release"]))
+    assert releases == {"Libtong": "release-b", "Pasuquin": "release-a"}
+
+
+def test_attach_fuzzy_brgy_id_blocks_by_municipality():
+    extra = _fake_psgc().tail(1)
+    psgc = pl.concat(
+        [
+            _fake_psgc(),
+            # Same name in another municipality must never be a candidate
+            extra.with_columns(id=pl.lit("0100200101")),
+            # Two equally similar candidates are ambiguous
+            extra.with_columns(id=pl.lit("0100100102"), name=pl.lit("San Jose I")),
+            extra.with_columns(id=pl.lit("0100100103"), name=pl.lit("San Jose II")),
+        ]
+    )
+    meta = pl.DataFrame(
+        {
+            "psgc_muni_id": ["0100100100", "0100100100", "0100100100", None],
+            "barangay": ["Brgy. Libtong", "San Jose", "Zamboanga", "Libtong"],
+            "psgc_brgy_id": [None, None, None, None],
+        },
+        schema_overrides={"psgc_brgy_id": pl.Utf8},
+    )
+
+    matched = attach_fuzzy_brgy_id(meta, PsgcIndex.from_psgc(psgc))
+
+    assert matched["psgc_brgy_id"].to_list() == ["0100100101", None, None, None]
+    assert matched["brgy_match_method"].to_list() == ["fuzzy", None, None, None]
+    assert 0.5 <= matched["brgy_match_confidence"][0] < 1.0
+
+
+def test_match_psgc_schools_records_exact_match_method():
+    matched = match_psgc_schools(_fake_psgc(), _fake_school_meta())
+
+    assert matched["brgy_match_method"].to_list() == ["exact"]
+    assert matched["brgy_match_confidence"].to_list() == [1.0]
+
+
+def test_apply_barangay_corrections_renames_and_resolves_ids(monkeypatch):
+    monkeypatch.setitem(
+        barangay.FIXES,
+        "barangay_corrections",
+        [
+            {"psgc_muni_id": "0100100100", "old": "LIBTUNG", "new": "Libtong"},
+            {"psgc_muni_id": "0100100100", "old": "NOWHERE", "new": "Elsewhere"},
+        ],
+    )
+    meta = pl.DataFrame(
+        {
+            "psgc_muni_id": ["0100100100", "0100100100", "0100100100"],
+            "barangay": ["libtung", "Nowhere", "LIBTUNG"],
+            "psgc_brgy_id": [None, None, "0100100199"],
+        },
+        schema_overrides={"psgc_brgy_id": pl.Utf8},
+    )
+
+    corrected = apply_barangay_corrections(meta, _fake_psgc())
+
+    assert corrected["barangay"].to_list() == ["Libtong", "Elsewhere", "LIBTUNG"]
+    assert corrected["psgc_brgy_id"].to_list() == ["0100100101", None, "0100100199"]
+    assert corrected["brgy_match_method"].to_list() == ["correction", None, None]
+
+
+def test_attach_psgc_region_codes_uses_alias_table():
+    region_names = pl.DataFrame(
+        {
+            "psgc_region_id": ["0100000000"],
+            "roman": ["I"],
+            "location": ["Ilocos Region"],
+            "common": ["1"],
+        }
+    )
+    aliases = build_region_aliases(_fake_psgc(), region_names)
+    assert aliases.filter(pl.col("alias") == "pso")["excluded"].to_list() == [True]
+
+    meta = pl.DataFrame(
+        {"region": ["Region I", "ILOCOS REGION", "PSO", "Atlantis", "Region I"]}
+    )
+    matched = attach_psgc_region_codes(meta, _fake_psgc(), region_names)
+
+    # PSO is excluded on purpose and Atlantis is unresolved; both are dropped.
+    assert matched["region"].to_list() == ["Region I", "ILOCOS REGION", "Region I"]
+    assert matched["psgc_region_id"].unique().to_list() == ["0100000000"]
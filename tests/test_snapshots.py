@@ -0,0 +1,54 @@
+import fastexcel
+import polars as pl
+import pytest
+
+from src.foundation.loaders.excel import ExcelWorkbook, SheetSpec
+from src.foundation.pipeline import PluginPipeline, snapshot_sources
+from src.foundation.snapshots import (
+    SnapshotStore,
+    scan_csv_snapshot,
+    scan_excel_snapshot,
+)
+
+
+def test_csv_snapshot_is_keyed_by_file_hash(temp_dir):
+    store = SnapshotStore(temp_dir / "snapshots")
+    path = temp_dir / "geo.csv"
+    path.write_text("id,longitude\n1,121.5\n2,\n")
+
+    assert scan_csv_snapshot(path, store).collect().equals(pl.read_csv(path))
+    assert store.ensure(path, "csv", pl.read_csv) is False
+
+    path.write_text("id,longitude\n3,122.0\n")
+    assert scan_csv_snapshot(path, store).collect()["id"].to_list() == [3]
+    assert len(list(store.root.iterdir())) == 2
+
+
+def test_excel_snapshots_skip_the_workbook_once_converted(
+    temp_dir, sample_psgc_xlsx, sample_hr_xlsx, monkeypatch
+):
+    store = SnapshotStore(temp_dir / "snapshots")
+    hr_file = next(sample_hr_xlsx.glob("*.xlsx"))
+    spec = SheetSpec("ES DB", usecols="D:E,S:T", header=5)
+    psgc = scan_excel_snapshot(sample_psgc_xlsx, "PSGC", store).collect()
+    sheet = ExcelWorkbook(hr_file, store=store).read_sheet(spec, source_row="row")
+
+    def fail(path):
+        raise AssertionError(f"{path} was parsed again")
+
+    monkeypatch.setattr(fastexcel, "read_excel", fail)
+    monkeypatch.setattr(pl, "read_excel", fail)
+    assert scan_excel_snapshot(sample_psgc_xlsx, "PSGC", store).collect().equals(psgc)
+    assert ExcelWorkbook(hr_file, store=store).read_sheet(spec, "row").equals(sheet)
+    with pytest.raises(ValueError, match="beyond the end"):
+        ExcelWorkbook(hr_file, store=store).read_sheet(SheetSpec("ES DB", header=99))
+
+
+def test_snapshot_sources_reuses_unchanged_files(test_env):
+    paths = PluginPipeline().paths
+
+    first = snapshot_sources(paths, workers=2)
+    second = snapshot_sources(paths)
+
+    assert first.converted > 0 and first.reused == 0
+    assert second.converted == 0 and second.reused == first.converted
@@ -0,0 +1,107 @@
+import random
+
+import polars as pl
+
+from src.foundation.spatial import SpatialIndex, haversine_km_expr
+
+
+def _points(n=400, seed=7):
+    rng = random.Random(seed)
+    rows = [
+        (f"s{i}", rng.uniform(120.0, 122.0), rng.uniform(14.0, 16.0), i % 5 == 0)
+        for i in range(n)
+    ]
+    return pl.DataFrame(
+        rows, schema=["school_id", "longitude", "latitude", "offers_shs"], orient="row"
+    )
+
+
+def _queries(points):
+    return points.head(40).select(
+        query_id="school_id", longitude="longitude", latitude="latitude"
+    )
+
+
+def _brute_force(queries, points):
+    return queries.join(
+        points.rename({"longitude": "lon", "latitude": "lat"}), how="cross"
+    ).with_columns(
+        distance_km=haversine_km_expr(
+            pl.col("longitude"), pl.col("latitude"), pl.col("lon"), pl.col("lat")
+        )
+    )
+
+
+def test_within_radius_matches_brute_force():
+    points = _points()
+    queries = _queries(points)
+    index = SpatialIndex.build(points, cell_deg=0.02)
+
+    found = index.within_radius(queries, radius_km=12)
+    expected = _brute_force(queries, points).filter(pl.col("distance_km") <= 12)
+
+    key = ["query_id", "school_id"]
+    assert found.select(key).sort(key).equals(expected.select(key).sort(key))
+    assert found.columns == [
+        "query_id",
+        "school_id",
+        "longitude",
+        "latitude",
+        "offers_shs",
+        "distance_km",
+    ]
+
+
+def test_nearest_matches_brute_force_on_a_subset():
+    points = _points()
+    queries = _queries(points)
+    index = SpatialIndex.build(points, cell_deg=0.02).where(pl.col("offers_shs"))
+
+    found = index.nearest(queries, k=3)
+    expected = (
+        _brute_force(queries, points.filter(pl.col("offers_shs")))
+        .sort("query_id", "distance_km")
+        .group_by("query_id", maintain_order=True)
+        .head(3)
+    )
+
+    assert found["rank"].to_list() == [1, 2, 3] * queries.height
+    assert (
+        found.select("query_id", "school_id")
+        .sort("query_id", "school_id")
+        .equals(expected.select("query_id", "school_id").sort("query_id", "school_id"))
+    )
+
+
+def test_nearest_respects_max_radius_and_bbox_is_inclusive():
+    points = _points()
+    index = SpatialIndex.build(points)
+    far = pl.DataFrame({"query_id": [1], "longitude": [125.0], "latitude": [10.0]})
+
+    assert index.nearest(far, k=1, max_radius_km=50).is_empty()
+    assert index.nearest(far, k=1).height == 1
+
+    box = pl.DataFrame(
+        {
+            "query_id": ["box"],
+            "min_lon": [120.5],
+            "min_lat": [14.5],
+            "max_lon": [121.0],
+            "max_lat": [15.0],
+        }
+    )
+    inside = points.filter(
+        pl.col("longitude").is_between(120.5, 121.0),
+        pl.col("latitude").is_between(14.5, 15.0),
+    )
+    assert index.within_bbox(box)["school_id"].sort().equals(inside["school_id"].sort())
+
+
+def test_spatial_index_round_trip(tmp_path):
+    index = SpatialIndex.build(_points(), cell_deg=0.1)
+    index.save(tmp_path / "db.spatial")
+
+    loaded = SpatialIndex.load(tmp_path / "db.spatial")
+
+    assert loaded.cell_deg == 0.1
+    assert loaded.points.equals(index.points)
@@ -0,0 +1,61 @@
+import json
+
+import polars as pl
+
+from src.foundation.tiles import TileSettings, render_tiles, write_tiles
+
+
+def _points():
+    return pl.DataFrame(
+        {
+            "school_id": ["a", "b", "c"],
+            "name": ["School A", 'School "B"', "School C"],
+            "longitude": [121.000, 121.001, 125.5],
+            "latitude": [14.600, 14.601, 7.1],
+            "es": [True, True, False],
+            "jhs": [False, True, True],
+            "shs": [False, False, True],
+            "enrollment": [120, 300, None],
+        }
+    )
+
+
+def test_render_tiles_clusters_low_zooms():
+    settings = TileSettings(min_zoom=5, max_zoom=14, cluster_below=10)
+    tiles = dict(render_tiles(_points(), settings).iter_rows())
+
+    low = json.loads(tiles["5/26/14"])["features"]
+    assert [f["properties"] for f in low] == [
+        {
+            "cluster": True,
+            "point_count": 2,
+            "es": 2,
+            "jhs": 1,
+            "shs": 0,
+            "enrollment": 420,
+        }
+    ]
+    high = json.loads(tiles["14/13698/7520"])["features"]
+    assert [f["properties"]["id"] for f in high] == ["a", "b"]
+    assert high[1]["properties"]["name"] == 'School "B"'
+    assert high[0]["geometry"]["coordinates"] == [121.0, 14.6]
+    assert len([tile for tile in tiles if tile.startswith("14/")]) == 2
+
+
+def test_write_tiles_rewrites_only_changed_tiles(tmp_path):
+    settings = TileSettings(min_zoom=10, max_zoom=12, cluster_below=10)
+    first = write_tiles(_points(), tmp_path, settings, workers=2)
+    assert (first.written, first.unchanged, first.removed) == (6, 0, 0)
+    assert (tmp_path / "12/3424/1880.geojson").exists()
+
+    again = write_tiles(_points(), tmp_path, settings, workers=1)
+    assert (again.written, again.unchanged) == (0, 6)
+
+    # c moves to a and b's tiles; only those are rewritten and c's old ones go
+    moved = _points().with_columns(
+        longitude=pl.Series([121.000, 121.001, 121.002]),
+        latitude=pl.Series([14.600, 14.601, 14.602]),
+    )
+    update = write_tiles(moved, tmp_path, settings, workers=1)
+    assert (update.written, update.unchanged, update.removed) == (3, 0, 3)
+    assert not list(tmp_path.glob("12/3475/*.geojson"))
@@ -0,0 +1,74 @@
+import polars as pl
+import pytest
+
+from src.foundation.common import (
+    convert_trailing_roman,
+    normalize_geo_name,
+    normalize_region_name,
+)
+from src.foundation.plugins.matching.barangay import fix_barangay_enye_value
+from src.foundation.transforms.geo_names import (
+    barangay_name_expr,
+    digits_only_expr,
+    normalize_geo_name_expr,
+    normalize_region_name_expr,
+    trailing_roman_expr,
+)
+from src.foundation.transforms.normalize import _digits_only
+
+SAMPLES = [
+    "Sto. Tomas",
+    "Sta. Cruz (Pob.)",
+    "City of Manila",
+    "city of  San Fernando (Capital)",
+    "Quezon City (2nd District)",
+    "Parañaque",
+    "PEÃ‘AFRANCIA",
+    "Poblacion I.",
+    "Barangay VIII",
+    "X IX",
+    "i",
+    "Region IV-A (CALABARZON)",
+    "NATIONAL CAPITAL REGION",
+    "Santo  Niño",
+    "PSGC 0102-800000",
+    "lanao del norte-sur",
+    "DAS MARIÑAS-O'DONNELL",
+    "o'brien 3rd district",
+    "   ",
+    "",
+]
+
+
+def _apply(expr) -> list[str | None]:
+    df = pl.DataFrame({"v": SAMPLES}, schema={"v": pl.Utf8})
+    return df.select(expr(pl.col("v")))["v"].to_list()
+
+
+class TestGeoNameExpressions:
+    @pytest.mark.parametrize(
+        "expr, func",
+        [
+            (normalize_geo_name_expr, normalize_geo_name),
+            (normalize_region_name_expr, normalize_region_name),
+            (trailing_roman_expr, convert_trailing_roman),
+            (digits_only_expr, _digits_only),
+            (
+                barangay_name_expr,
+                lambda x: convert_trailing_roman(
+                    normalize_geo_name(fix_barangay_enye_value(x))
+                ),
+            ),
+            # Province casing in `_match_new_locations`
+            (lambda e: e.str.to_titlecase(), lambda x: x.title() if x else x),
+        ],
+    )
+    def test_parity_with_python_helpers(self, expr, func):
+        """Expression builders match the pure-Python helpers value for value."""
+        assert _apply(expr) == [func(x) for x in SAMPLES]
+
+    def test_nulls_are_preserved(self):
+        """Null inputs stay null, like `map_elements` did."""
+        df = pl.DataFrame({"v": [None]}, schema={"v": pl.Utf8})
+        out = df.select(normalize_geo_name_expr(pl.col("v")))
+        assert out["v"][0] is None